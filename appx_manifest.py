@@ -0,0 +1,168 @@
+"""AppxManifest.xml 的一次性解析结果，供枚举、名称解析、签名、依赖分析等各阶段共用。
+
+用 iterparse 流式读取，读完 <Capabilities> 即停止（其后的 <Extensions> 往往很大且用不到）；
+按元素本地名匹配，不依赖也不修改 ElementTree 的全局命名空间表。
+load() 按 (路径, mtime, 大小) 缓存，同一个包在一次运行中只解析一次。
+"""
+import hashlib, os, pathlib, threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+MANIFEST_NAME = "AppxManifest.xml"
+MEMO_MAX = 4096
+# PublisherId 使用的 Crockford Base32 字母表（小写）
+_CROCKFORD = "0123456789abcdefghjkmnpqrstvwxyz"
+
+
+def publisher_id(publisher: str) -> str:
+    """由 Publisher 计算 13 位 PublisherId：UTF-16LE 的 SHA-256 取前 8 字节，
+    末尾补 1 个 0 位凑成 65 位，再按 5 位一组做 Crockford Base32。"""
+    n = int.from_bytes(hashlib.sha256(publisher.encode("utf-16-le")).digest()[:8], "big") << 1
+    return "".join(_CROCKFORD[(n >> (5 * (12 - i))) & 31] for i in range(13))
+
+
+@dataclass
+class PackageDependency:
+    name: str
+    publisher: str = ""
+    min_version: str = ""
+    max_version_tested: str = ""
+    optional: bool = False
+
+
+@dataclass
+class ManifestInfo:
+    # <Identity>
+    name: str = ""
+    publisher: str = ""
+    version: str = ""
+    arch: str = ""
+    resource_id: str = ""
+    # <Properties>
+    display_name: str = ""
+    publisher_display_name: str = ""
+    description: str = ""
+    logo: str = ""
+    is_framework: bool = False
+    is_resource_package: bool = False
+    # <Dependencies>
+    dependencies: List[PackageDependency] = field(default_factory=list)
+    target_families: List[tuple] = field(default_factory=list)   # (Name, MinVersion)
+    # <Applications>：Id 与 VisualElements 上的各种 Logo 属性
+    app_ids: List[str] = field(default_factory=list)
+    logos: dict = field(default_factory=dict)
+    # <Capabilities>：所有命名空间的 Capability / DeviceCapability 名称
+    capabilities: List[str] = field(default_factory=list)
+
+    @property
+    def publisher_id(self) -> str:
+        return publisher_id(self.publisher)
+
+    @property
+    def family_name(self) -> str:
+        return f"{self.name}_{self.publisher_id}"
+
+    @property
+    def full_name(self) -> str:
+        # Name_Version_Arch_ResourceId_PublisherId，与 WindowsApps 下的目录名一致
+        return f"{self.name}_{self.version}_{self.arch}_{self.resource_id}_{self.publisher_id}"
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if tag[:1] == "{" else tag
+
+
+def _text(elem) -> str:
+    return (elem.text or "").strip()
+
+
+def parse(source) -> ManifestInfo:
+    """解析 source（路径或二进制文件对象），返回 ManifestInfo。格式错误时抛 ET.ParseError。"""
+    info = ManifestInfo()
+    # 栈中保存祖先元素的本地名，用于判断元素所处的段
+    stack = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(_local(elem.tag))
+            # <Extensions> 位于 <Capabilities> 之后，到这里即可停止
+            if len(stack) == 2 and stack[1] == "Extensions":
+                break
+            continue
+        tag = stack.pop()
+        parent = stack[-1] if stack else ""
+        if tag == "Identity" and parent == "Package":
+            info.name = elem.get("Name", "")
+            info.publisher = elem.get("Publisher", "")
+            info.version = elem.get("Version", "")
+            info.arch = (elem.get("ProcessorArchitecture") or "neutral").lower()
+            info.resource_id = elem.get("ResourceId", "")
+        elif parent == "Properties":
+            if tag == "DisplayName":
+                info.display_name = _text(elem)
+            elif tag == "PublisherDisplayName":
+                info.publisher_display_name = _text(elem)
+            elif tag == "Description":
+                info.description = _text(elem)
+            elif tag == "Logo":
+                info.logo = _text(elem)
+            elif tag == "Framework":
+                info.is_framework = _text(elem).lower() == "true"
+            elif tag == "ResourcePackage":
+                info.is_resource_package = _text(elem).lower() == "true"
+        elif parent == "Dependencies":
+            if tag == "PackageDependency":
+                info.dependencies.append(PackageDependency(
+                    name=elem.get("Name", ""), publisher=elem.get("Publisher", ""),
+                    min_version=elem.get("MinVersion", ""),
+                    max_version_tested=elem.get("MaxVersionTested", ""),
+                    optional=(elem.get("Optional") or "").lower() == "true"))
+            elif tag == "TargetDeviceFamily":
+                info.target_families.append((elem.get("Name", ""), elem.get("MinVersion", "")))
+        elif tag == "VisualElements":
+            for key, val in elem.attrib.items():
+                if "Logo" in key and val:
+                    info.logos.setdefault(key, val)
+            if not info.display_name:
+                info.display_name = elem.get("DisplayName", "")
+        elif tag == "Application" and parent == "Applications":
+            info.app_ids.append(elem.get("Id", ""))
+            elem.clear()
+        elif tag in ("Capability", "DeviceCapability", "CustomCapability") and parent == "Capabilities":
+            if elem.get("Name"):
+                info.capabilities.append(elem.get("Name"))
+        elif tag == "Capabilities" and parent == "Package":
+            break
+    return info
+
+
+def manifest_path(install_path) -> pathlib.Path:
+    p = pathlib.Path(install_path)
+    return p if p.name.lower() == MANIFEST_NAME.lower() else p / MANIFEST_NAME
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def load(install_path) -> Optional[ManifestInfo]:
+    """读取安装目录（或清单文件本身）的 ManifestInfo；清单不存在时返回 None。
+
+    结果按 (路径, mtime, 大小) 缓存，文件变化后自动重新解析。"""
+    path = manifest_path(install_path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = str(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _memo_lock:
+        hit = _memo.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    info = parse(str(path))
+    with _memo_lock:
+        if len(_memo) >= MEMO_MAX:
+            _memo.clear()
+        _memo[key] = (stamp, info)
+    return info
@@ -0,0 +1,536 @@
+"""resources.pri（包资源索引）的按需查找：只读取被请求的那一个资源条目。
+
+文件以 mmap 打开。一次查找只访问：文件头与段目录、资源映射及其 Schema/决策段的表头、
+沿资源名逐级定位时经过的 scope 子项、目标条目的候选值与限定符。不会把整个文件
+解码成字典，几十 MB 的 resources.pri 一次查找也只触及几 KB。
+
+文件由若干段组成，段以 16 字节标识区分：
+  [mrm_pridescex]  描述段：主资源映射等各段的下标
+  [mrm_hschema]    资源名的层次结构（scope/item 树，例如 Resources/AppName、Files/Assets/Logo.png）
+  [mrm_decn_info]  限定符（language-zh-CN、scale-200 …）、限定符组合与决策
+  [mrm_res_map__]  每个 item 的候选值，每个候选值对应决策中的一个限定符组合
+  [mrm_dataitem]   候选值较长时存放在这里
+"""
+import mmap, os, pathlib, struct, time
+from typing import List, Optional
+
+PRI_NAME = "resources.pri"
+
+# 限定符类型（DecisionInfo 中 distinct qualifier 的 type 字段）
+QUAL_LANGUAGE = 0
+QUAL_CONTRAST = 1
+QUAL_SCALE = 2
+QUAL_TARGETSIZE = 4
+# 候选值类型：String/Path 为 UTF-16LE，其余为单字节编码；EmbeddedData(2) 是二进制
+_VT_UTF16 = (0, 1)
+_VT_ASCII = (3, 5)
+_VT_UTF8 = (4, 6)
+
+_FILE_MAGICS = (b"mrm_pri0", b"mrm_pri1", b"mrm_pri2", b"mrm_pri3", b"mrm_prif")
+# 按其布局实现了读取的段标识（16 字节）；同一前缀的其它标识视为未知版本，查找时当作没有结果
+_KNOWN_SECTIONS = {b"[mrm_pridescex]\0", b"[mrm_hschema]  \0", b"[mrm_hschemaex] ", b"[mrm_decn_info]\0",
+                   b"[mrm_res_map__]\0", b"[mrm_res_map2_]\0", b"[mrm_dataitem] \0"}
+_FILE_END = 0xDEFFFADE
+_SECTION_END = 0xDEF5FADE
+_SECTION_HEADER = 32
+
+# 简体/繁体中文的地区标签与脚本标签互相匹配（zh-CN ≈ zh-Hans）
+_LANG_ALIASES = {"zh-cn": "zh-hans", "zh-sg": "zh-hans", "zh-tw": "zh-hant",
+                 "zh-hk": "zh-hant", "zh-mo": "zh-hant"}
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_PAIR16 = struct.Struct("<HH")
+_PAIR32 = struct.Struct("<II")
+# scope/item 表项：parent, fullPathLength, 首字母大写, 名称长度, flags, 名称偏移低 16 位, 下标
+_ENTRY = struct.Struct("<HHHBBHH")
+# 候选值：类型 0 为内联字符串（值类型, 长度, 偏移），类型 1 为数据项引用（值类型, 源文件, 数据项, 段）
+_CAND_INLINE = struct.Struct("<BBHI")
+_CAND_ITEM = struct.Struct("<BBHHH")
+
+
+class PriError(ValueError):
+    pass
+
+
+class PriUnsupported(PriError):
+    """文件或段是尚未支持的格式版本；lookup 系列函数捕获后返回 None。"""
+
+
+class PriTimeout(PriError):
+    """查找超出调用方给定的截止时间（time.monotonic()）。"""
+
+
+def _check_deadline(deadline: Optional[float]):
+    if deadline is not None and time.monotonic() > deadline:
+        raise PriTimeout("deadline exceeded")
+
+
+def pri_path(install_path) -> pathlib.Path:
+    p = pathlib.Path(install_path)
+    return p if p.suffix.lower() == ".pri" else p / PRI_NAME
+
+
+def _split(path: str) -> List[str]:
+    return [s for s in path.replace("\\", "/").split("/") if s]
+
+
+def resource_paths(ref: str) -> List[List[str]]:
+    """把 ms-resource 引用转换为要尝试的资源路径（按顺序）。
+
+    ms-resource:AppName            -> Resources/AppName，其次 AppName
+    ms-resource:///Resources/Name  -> Resources/Name
+    ms-resource://Pkg/Resources/X  -> Resources/X（只查本包的主资源映射）"""
+    s = ref.strip()
+    if s.lower().startswith("ms-resource:"):
+        s = s[len("ms-resource:"):]
+    if s.startswith("//"):
+        rest = s[2:]
+        return [_split(rest.split("/", 1)[1] if "/" in rest else "")]
+    if s.startswith("/"):
+        return [_split(s)]
+    parts = _split(s)
+    if parts and parts[0].lower() == "resources":
+        return [parts]
+    return [["Resources"] + parts, parts]
+
+
+def _lang_key(tag: str) -> str:
+    tag = tag.strip().lower().replace("_", "-")
+    return _LANG_ALIASES.get(tag, tag)
+
+
+def _lang_score(value: str, languages: List[str]) -> int:
+    """候选值的语言限定符与首选语言列表的匹配分：越靠前、越精确分越高，不匹配为 0。"""
+    best = 0
+    for tag in value.replace(",", ";").split(";"):
+        cand = _lang_key(tag)
+        if not cand:
+            continue
+        for rank, want in enumerate(languages):
+            want = _lang_key(want)
+            base = 2 * (len(languages) - rank)
+            if cand == want:
+                best = max(best, base + 1)
+            elif cand.split("-")[0] == want.split("-")[0]:
+                # zh-hans 与 zh-hant 不能互相替代
+                if cand.split("-")[0] == "zh" and cand[:7] != want[:7]:
+                    continue
+                best = max(best, base)
+    return best
+
+
+class PriFile:
+    """以 mmap 打开的 resources.pri；各段的表头在首次查找时才读取。
+
+        with PriFile(path) as pri:
+            pri.lookup("ms-resource:AppName", ["zh-CN", "en-US"])
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _SECTION_HEADER:
+                raise PriError(f"{self.path}: file too small")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._map = None
+        try:
+            self._read_toc()
+        except (struct.error, IndexError) as e:
+            self.close()
+            raise PriError(f"{self.path}: {e}") from None
+        except PriError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 文件头与段 ----------
+    def _read_toc(self):
+        mm = self._mm
+        magic = bytes(mm[:8])
+        if magic not in _FILE_MAGICS:
+            if magic.startswith(b"mrm_pri"):
+                raise PriUnsupported(f"{self.path}: unsupported PRI version {magic!r}")
+            raise PriError(f"{self.path}: not a PRI file")
+        total, toc, start = struct.unpack_from("<III", mm, 12)
+        count = _U16.unpack_from(mm, 24)[0]
+        if total > len(mm) or _U32.unpack_from(mm, total - 16)[0] != _FILE_END:
+            raise PriError(f"{self.path}: truncated")
+        self._sections = []
+        for i in range(count):
+            pos = toc + 32 * i
+            offset, length = _PAIR32.unpack_from(mm, pos + 24)
+            self._sections.append((bytes(mm[pos:pos + 16]), start + offset, length))
+
+    def _section(self, index: int, kind: bytes):
+        """返回段内容的 [起, 止) 偏移；kind 为标识前缀，例如 b"[mrm_hschema"。"""
+        if index >= len(self._sections):
+            raise PriError(f"{self.path}: no section {index}")
+        ident, pos, length = self._sections[index]
+        mm = self._mm
+        if not ident.startswith(kind) or bytes(mm[pos:pos + 16]) != ident:
+            raise PriError(f"{self.path}: section {index} is not {kind.decode()}")
+        if ident not in _KNOWN_SECTIONS:
+            raise PriUnsupported(f"{self.path}: unsupported section version {ident!r}")
+        if _PAIR32.unpack_from(mm, pos + length - 8) != (_SECTION_END, length):
+            raise PriError(f"{self.path}: section {index} is corrupt")
+        return pos + _SECTION_HEADER, pos + length - 8
+
+    def _primary_map_index(self) -> int:
+        maps = [i for i, s in enumerate(self._sections) if s[0].startswith(b"[mrm_res_map")]
+        if not maps:
+            raise PriError(f"{self.path}: no resource map")
+        for i, s in enumerate(self._sections):
+            if s[0].startswith(b"[mrm_pridescex]"):
+                begin, _ = self._section(i, b"[mrm_pridescex]")
+                primary = _U16.unpack_from(self._mm, begin + 12)[0]
+                if primary in maps:
+                    return primary
+                break
+        return maps[0]
+
+    # ---------- 资源映射 ----------
+    def _load_map(self):
+        if self._map is not None:
+            return self._map
+        mm = self._mm
+        begin, _ = self._section(self._primary_map_index(), b"[mrm_res_map")
+        (env_len, _n_env, schema_sec, schema_ref_len, decision_sec, n_types, n_item_groups,
+         n_groups) = struct.unpack_from("<8H", mm, begin)
+        n_infos, n_cands, _data_len, large_len = struct.unpack_from("<4I", mm, begin + 16)
+        m = {"n_item_groups": n_item_groups, "n_groups": n_groups, "n_infos": n_infos}
+        pos = begin + 32 + env_len + schema_ref_len
+        # 值类型表：每项 (4, 类型)
+        m["types"] = [_U32.unpack_from(mm, pos + 8 * i + 4)[0] for i in range(n_types)]
+        pos += 8 * n_types
+        m["item_groups"] = pos
+        pos += 4 * n_item_groups
+        m["groups"] = pos
+        pos += 4 * n_groups
+        m["infos"] = pos
+        pos += 4 * n_infos
+        # 超出 16 位范围的部分放在“大表”中，接在各自的小表之后编号
+        m["large"] = None
+        if large_len:
+            li, lg, lf = struct.unpack_from("<III", mm, pos)
+            m["large"] = (pos + 12, li, pos + 12 + 8 * li, lg, pos + 12 + 8 * (li + lg), lf)
+        pos += large_len
+        m["cands"] = pos
+        m["strings"] = pos + 8 * n_cands
+        m["schema"] = self._load_schema(schema_sec)
+        m["decision"] = self._load_decisions(decision_sec)
+        self._map = m
+        return m
+
+    def _item_groups(self, m):
+        mm = self._mm
+        for first, group in struct.iter_unpack("<HH", mm[m["item_groups"]:m["item_groups"] + 4 * m["n_item_groups"]]):
+            yield first, group
+        if m["large"]:
+            off, count = m["large"][0], m["large"][1]
+            yield from struct.iter_unpack("<II", mm[off:off + 8 * count])
+
+    def _group(self, m, index: int):
+        """(组大小, 首个 item info 下标)；超出组表的编号表示只含一个 item 的组。"""
+        n_small = m["n_groups"]
+        n_large = m["large"][3] if m["large"] else 0
+        if index < n_small:
+            return _PAIR16.unpack_from(self._mm, m["groups"] + 4 * index)
+        if index < n_small + n_large:
+            return _PAIR32.unpack_from(self._mm, m["large"][2] + 8 * (index - n_small))
+        return 1, index - n_small - n_large
+
+    def _item_info(self, m, index: int):
+        """(决策下标, 首个候选值下标)"""
+        if index < m["n_infos"]:
+            return _PAIR16.unpack_from(self._mm, m["infos"] + 4 * index)
+        return _PAIR32.unpack_from(self._mm, m["large"][4] + 8 * (index - m["n_infos"]))
+
+    def _candidates(self, item: int):
+        """item 的候选值：[(限定符组合下标, 候选值下标)]。"""
+        m = self._load_map()
+        for first, group in self._item_groups(m):
+            if item < first:
+                continue
+            size, first_info = self._group(m, group)
+            if item < first + size:
+                decision, first_cand = self._item_info(m, first_info + item - first)
+                return [(qset, first_cand + i) for i, qset in enumerate(self._decision_sets(decision))]
+        return []
+
+    def _value(self, index: int) -> Optional[str]:
+        m = self._map
+        mm = self._mm
+        pos = m["cands"] + 8 * index
+        kind = mm[pos]
+        if kind == 0:
+            _, vt, length, offset = _CAND_INLINE.unpack_from(mm, pos)
+            start = m["strings"] + offset
+        elif kind == 1:
+            _, vt, source_file, item, section = _CAND_ITEM.unpack_from(mm, pos)
+            if source_file:
+                # 值在其它文件中，这里不跟随
+                return None
+            start, length = self._data_item(section, item)
+        else:
+            raise PriError(f"{self.path}: bad candidate {index}")
+        vt = m["types"][vt] if vt < len(m["types"]) else -1
+        raw = bytes(mm[start:start + length])
+        if vt in _VT_UTF16:
+            return raw.decode("utf-16-le", "replace").rstrip("\0")
+        if vt in _VT_ASCII or vt in _VT_UTF8:
+            return raw.decode("utf-8", "replace").rstrip("\0")
+        return None
+
+    def _data_item(self, section: int, item: int):
+        mm = self._mm
+        begin, _ = self._section(section, b"[mrm_dataitem]")
+        n_strings, n_blobs = _PAIR16.unpack_from(mm, begin + 4)
+        data = begin + 12 + 4 * n_strings + 8 * n_blobs
+        if item < n_strings:
+            offset, length = _PAIR16.unpack_from(mm, begin + 12 + 4 * item)
+        elif item < n_strings + n_blobs:
+            offset, length = _PAIR32.unpack_from(mm, begin + 12 + 4 * n_strings + 8 * (item - n_strings))
+        else:
+            raise PriError(f"{self.path}: no data item {item}")
+        return data + offset, length
+
+    # ---------- 决策与限定符 ----------
+    def _load_decisions(self, section: int) -> dict:
+        mm = self._mm
+        begin, _ = self._section(section, b"[mrm_decn_info]")
+        n_distinct, n_quals, n_sets, n_decisions, n_index = struct.unpack_from("<5H", mm, begin)
+        d = {"decisions": begin + 12}
+        d["sets"] = d["decisions"] + 4 * n_decisions
+        d["quals"] = d["sets"] + 4 * n_sets
+        d["distinct"] = d["quals"] + 8 * n_quals
+        d["index"] = d["distinct"] + 12 * n_distinct
+        d["data"] = d["index"] + 2 * n_index
+        return d
+
+    def _decision_sets(self, decision: int) -> List[int]:
+        d = self._map["decision"]
+        first, count = _PAIR16.unpack_from(self._mm, d["decisions"] + 4 * decision)
+        return [_U16.unpack_from(self._mm, d["index"] + 2 * (first + i))[0] for i in range(count)]
+
+    def _qualifiers(self, qset: int):
+        """限定符组合中的各限定符：[(类型, 值, fallback 分)]。"""
+        mm = self._mm
+        d = self._map["decision"]
+        first, count = _PAIR16.unpack_from(mm, d["sets"] + 4 * qset)
+        out = []
+        for i in range(count):
+            q = _U16.unpack_from(mm, d["index"] + 2 * (first + i))[0]
+            distinct, _priority, fallback = struct.unpack_from("<3H", mm, d["quals"] + 8 * q)
+            qtype = _U16.unpack_from(mm, d["distinct"] + 12 * distinct + 2)[0]
+            offset = _U32.unpack_from(mm, d["distinct"] + 12 * distinct + 8)[0]
+            out.append((qtype, self._cstr16(d["data"] + 2 * offset), fallback))
+        return out
+
+    # ---------- 层次结构（资源名） ----------
+    def _load_schema(self, section: int) -> dict:
+        mm = self._mm
+        begin, end = self._section(section, b"[mrm_hschema")
+        s = {"scopes": 0}
+        if begin >= end:
+            return s
+        pos = begin + 8
+        if bytes(mm[pos:pos + 11]) == b"[def_hnames":
+            extended = mm[pos + 11] == ord("x")
+            pos += 16
+        else:
+            extended = False
+        n_scopes, n_items = struct.unpack_from("<II", mm, pos + 12)
+        pos += 20
+        # 唯一名与名称（均为 0 结尾的 UTF-16）
+        for _ in range(2):
+            pos = self._cstr16_end(pos)
+        total, scopes, items, unicode_len = struct.unpack_from("<4I", mm, pos + 6)
+        if (total, scopes, items) != (n_scopes + n_items, n_scopes, n_items):
+            raise PriError(f"{self.path}: unexpected schema layout")
+        pos += 6 + 20 + (4 if extended else 0)
+        s["scopes"] = n_scopes
+        s["entries"] = pos
+        s["scope_ex"] = pos + _ENTRY.size * (n_scopes + n_items)
+        s["unicode"] = s["scope_ex"] + 8 * n_scopes + 2 * n_items
+        s["ascii"] = s["unicode"] + 2 * unicode_len
+        # 表项里的首字母（大写）与名称长度可用来跳过不可能匹配的子项；先抽查确认含义一致
+        sample = [(e, self._entry_name(s, e)) for e in (self._entry(s, i) for i in range(1, min(9, n_scopes + n_items)))
+                  if e[1]]
+        s["lead"] = all(e[2] == ord(name[:1].upper()[:1] or "\0") for e, name in sample)
+        s["name_len"] = all(e[3] == len(name) & 0xFF for e, name in sample)
+        return s
+
+    def _entry(self, s: dict, index: int):
+        return _ENTRY.unpack_from(self._mm, s["entries"] + _ENTRY.size * index)
+
+    def _entry_name(self, s: dict, entry) -> str:
+        _parent, full_len, _lead, _name_len, flags, offset, _index = entry
+        if not full_len:
+            return ""
+        offset |= (flags & 0xF) << 16
+        if flags & 0x20:
+            pos = s["ascii"] + offset
+            return bytes(self._mm[pos:self._mm.find(b"\0", pos)]).decode("ascii", "replace")
+        return self._cstr16(s["unicode"] + 2 * offset)
+
+    def _children(self, s: dict, scope: int):
+        mm = self._mm
+        index, count, first = struct.unpack_from("<3H", mm, s["scope_ex"] + 8 * scope)
+        if index != scope:
+            for i in range(s["scopes"]):
+                index, count, first = struct.unpack_from("<3H", mm, s["scope_ex"] + 8 * i)
+                if index == scope:
+                    break
+            else:
+                return range(0)
+        return range(first, first + count)
+
+    def _name_is(self, s: dict, entry, want: str, want_ascii: bytes) -> bool:
+        flags, offset = entry[4], entry[5] | (entry[4] & 0xF) << 16
+        if flags & 0x20 and want_ascii is not None:
+            # ASCII 名称直接比较字节，不解码
+            pos = s["ascii"] + offset
+            return self._mm[pos:pos + len(want_ascii) + 1].lower() == want_ascii + b"\0"
+        return self._entry_name(s, entry).lower() == want
+
+    def _find_item(self, parts: List[str], deadline: float = None) -> Optional[int]:
+        """沿 scope 逐级查找 parts（不区分大小写），返回 item 下标。每进入一级检查一次 deadline。"""
+        s = self._load_map()["schema"]
+        if not parts or not s["scopes"]:
+            return None
+        scope = 0
+        for depth, part in enumerate(parts):
+            _check_deadline(deadline)
+            want = part.lower()
+            try:
+                want_ascii = want.encode("ascii")
+            except UnicodeEncodeError:
+                want_ascii = None
+            lead = ord(part[0].upper()[0]) if s["lead"] else None
+            size = len(part) & 0xFF if s["name_len"] else None
+            last = depth == len(parts) - 1
+            children = self._children(s, scope)
+            block = self._mm[s["entries"] + _ENTRY.size * children.start:s["entries"] + _ENTRY.size * children.stop]
+            for entry in _ENTRY.iter_unpack(block):
+                if (lead is not None and entry[2] != lead) or (size is not None and entry[3] != size):
+                    continue
+                if bool(entry[4] & 0x10) == last or not self._name_is(s, entry, want, want_ascii):
+                    continue
+                if last:
+                    return entry[6]
+                scope = entry[6]
+                break
+            else:
+                return None
+        return None
+
+    # ---------- 字符串 ----------
+    def _cstr16_end(self, pos: int) -> int:
+        mm = self._mm
+        while mm[pos] or mm[pos + 1]:
+            pos += 2
+        return pos + 2
+
+    def _cstr16(self, pos: int) -> str:
+        return bytes(self._mm[pos:self._cstr16_end(pos) - 2]).decode("utf-16-le", "replace")
+
+    # ---------- 查找 ----------
+    def _best(self, candidates, languages: List[str], scale: int):
+        """按限定符为候选值打分，返回得分最高的候选值下标。
+
+        顺序：语言匹配（首选语言越靠前越好，没有语言限定的候选值次之）、
+        非默认的对比度等其它限定符越少越好、缩放比例不小于 scale 且最接近、fallback 分。"""
+        best, best_key = None, None
+        for qset, cand in candidates:
+            lang, penalty, scale_key, fallback = 1, 0, -500, 0
+            for qtype, value, fb in self._qualifiers(qset):
+                fallback += fb
+                if qtype == QUAL_LANGUAGE:
+                    lang = _lang_score(value, languages)
+                elif qtype == QUAL_SCALE and value.isdigit():
+                    s = int(value)
+                    scale_key = -(s - scale) if s >= scale else -1000 - (scale - s)
+                elif qtype == QUAL_TARGETSIZE:
+                    continue
+                elif qtype != QUAL_CONTRAST or value.lower() != "standard":
+                    penalty += 1
+            key = (lang, -penalty, scale_key, fallback)
+            if best_key is None or key > best_key:
+                best, best_key = cand, key
+        return best
+
+    def lookup(self, ref: str, languages: List[str] = None, scale: int = 100,
+               deadline: float = None) -> Optional[str]:
+        """查找 ms-resource 引用（或资源路径），返回最匹配 languages 的字符串；找不到返回 None。
+        超过 deadline 时抛 PriTimeout。"""
+        languages = languages or ["en-US"]
+        try:
+            for parts in resource_paths(ref):
+                item = self._find_item(parts, deadline)
+                if item is None:
+                    continue
+                cand = self._best(self._candidates(item), languages, scale)
+                if cand is not None:
+                    return self._value(cand)
+        except PriUnsupported:
+            return None
+        return None
+
+    def lookup_file(self, relpath: str, scale: int = 100, languages: List[str] = None) -> Optional[str]:
+        """查找包内文件（如清单中的 Assets\\StoreLogo.png）最匹配的变体，返回相对路径。"""
+        try:
+            item = self._find_item(["Files"] + _split(relpath))
+            if item is None:
+                return None
+            cand = self._best(self._candidates(item), languages or ["en-US"], scale)
+            return self._value(cand) if cand is not None else None
+        except PriUnsupported:
+            return None
+
+
+def _open(install_path) -> Optional[PriFile]:
+    """打开安装目录的 resources.pri；不存在或是未知版本时返回 None。"""
+    path = pri_path(install_path)
+    if not path.is_file():
+        return None
+    try:
+        return PriFile(path)
+    except PriUnsupported:
+        return None
+
+
+def lookup_string(install_path, ref: str, languages: List[str] = None,
+                  deadline: float = None) -> Optional[str]:
+    """在安装目录的 resources.pri 中查找 ms-resource 引用；没有 resources.pri 时返回 None。
+    文件或段是未知版本时同样返回 None；文件损坏时抛 PriError，超过 deadline 时抛 PriTimeout。"""
+    pri = _open(install_path)
+    if pri is None:
+        return None
+    with pri:
+        try:
+            return pri.lookup(ref, languages, deadline=deadline)
+        except (struct.error, IndexError) as e:
+            raise PriError(f"{pri.path}: {e}") from None
+
+
+def lookup_file(install_path, relpath: str, scale: int = 100, languages: List[str] = None) -> Optional[str]:
+    """按 resources.pri 选出 relpath 最匹配 scale/语言的变体（相对路径）；找不到返回 None。"""
+    pri = _open(install_path)
+    if pri is None:
+        return None
+    with pri:
+        try:
+            return pri.lookup_file(relpath, scale, languages)
+        except (struct.error, IndexError) as e:
+            raise PriError(f"{pri.path}: {e}") from None
@@ -0,0 +1,556 @@
+"""读取已生成的 APPX/MSIX：ZIP 中央目录、AppxBlockMap.xml，以及打包后的流式校验。
+
+verify_package() 从头到尾顺序读一遍包文件：逐项核对本地文件头与中央目录，
+把每个 64 KiB 块交给线程池解压并计算 SHA-256（zlib / hashlib 计算时会释放 GIL），
+与 AppxBlockMap.xml 中记录的块哈希比对，同时按 ZIP 记录的 CRC-32 核对整个文件；
+给出源目录时再核对文件清单与大小。读取线程只负责顺序读盘，吞吐接近磁盘速度。
+
+PackageArchive 用于查看已有的包：打开时只读取中央目录，清单与单个文件经 mmap 按需读取，
+打开一个 10 GB 的包只会触及文件末尾的几十 KB。
+"""
+import base64, hashlib, io, mmap, os, pathlib, struct, threading, time, zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import unquote
+import xml.etree.ElementTree as ET
+
+import appx_manifest
+from appx_writer import BLOCK_SIZE, BLOCKMAP_NS, FOOTPRINT_FILES, iter_payload, part_name
+
+BLOCKMAP_NAME = "AppxBlockMap.xml"
+SIGNATURE_NAME = "AppxSignature.p7x"
+# 查看已有包时识别的扩展名
+PACKAGE_SUFFIXES = (".appx", ".msix")
+# 顺序读取的缓冲区大小
+READ_BUFFER = 1024 * 1024
+# 报告中最多列出的问题数；超过后停止校验
+MAX_ERRORS = 20
+
+_EOCD_SIG = 0x06054b50
+_EOCD64_SIG = 0x06064b50
+_EOCD64_LOCATOR_SIG = 0x07064b50
+_CENTRAL_SIG = 0x02014b50
+_LOCAL_SIG = 0x04034b50
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+_UTF8_FLAG = 0x800
+# 中央目录项的定长部分：签名、标志、方法、时间、日期、CRC、大小、名称/扩展/注释长度与本地头偏移
+_CENTRAL = struct.Struct("<I4xHHHHIIIHHH8xI")
+
+
+class PackageError(ValueError):
+    """包的 ZIP 结构不完整或不一致。"""
+
+
+@dataclass
+class ZipEntry:
+    name: str            # ZIP 中的名称（OPC 部件名，百分号编码、/ 分隔）
+    method: int
+    flags: int
+    crc: int
+    csize: int
+    size: int
+    offset: int          # 本地文件头的偏移
+
+    @property
+    def path(self) -> str:
+        """解码后的相对路径（/ 分隔）。"""
+        return unquote(self.name)
+
+    @property
+    def is_footprint(self) -> bool:
+        return self.path.lower() in FOOTPRINT_FILES
+
+
+@dataclass
+class BlockMapFile:
+    name: str            # 块映射中的名称（\ 分隔）
+    size: int
+    lfh_size: int
+    blocks: list         # [(Base64 SHA-256, 压缩后大小或 None)]
+
+    @property
+    def zip_name(self) -> str:
+        return part_name(self.name.replace("\\", "/"))
+
+
+# --------------------------------------------------
+# 中央目录
+# --------------------------------------------------
+def _zip64_values(extra: bytes, wanted: int) -> list:
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, size = struct.unpack_from("<HH", extra, pos)
+        if tag == 0x0001:
+            return list(struct.unpack_from(f"<{min(wanted, size // 8)}Q", extra, pos + 4))
+        pos += 4 + size
+    return []
+
+
+def read_central_directory(fp, file_size: int):
+    """读取 fp 的中央目录，返回 (ZipEntry 列表, 中央目录起始偏移)。只读取文件末尾与中央目录本身。"""
+    tail_len = min(file_size, 65536 + 22)
+    fp.seek(file_size - tail_len)
+    tail = fp.read(tail_len)
+    pos = tail.rfind(struct.pack("<I", _EOCD_SIG))
+    if pos < 0 or pos + 22 > len(tail):
+        raise PackageError("end of central directory not found")
+    _, _, _, _, count, cd_size, cd_offset, _ = struct.unpack_from("<IHHHHIIH", tail, pos)
+    eocd_at = file_size - tail_len + pos
+    if count == _ZIP64_COUNT_MARKER or cd_size == _ZIP64_MARKER or cd_offset == _ZIP64_MARKER:
+        if pos < 20:
+            raise PackageError("Zip64 locator not found")
+        sig, _, eocd64_at, _ = struct.unpack_from("<IIQI", tail, pos - 20)
+        if sig != _EOCD64_LOCATOR_SIG:
+            raise PackageError("Zip64 locator not found")
+        fp.seek(eocd64_at)
+        rec = fp.read(56)
+        if len(rec) < 56 or struct.unpack_from("<I", rec)[0] != _EOCD64_SIG:
+            raise PackageError("Zip64 end of central directory not found")
+        count, _, cd_size, cd_offset = struct.unpack_from("<QQQQ", rec, 24)
+        eocd_at = eocd64_at
+    if cd_offset + cd_size > eocd_at:
+        raise PackageError("central directory is out of range")
+    fp.seek(cd_offset)
+    cd = fp.read(cd_size)
+    if len(cd) != cd_size:
+        raise PackageError("central directory is truncated")
+    entries, pos = [], 0
+    for i in range(count):
+        if pos + 46 > len(cd):
+            raise PackageError(f"central directory entry {i} is corrupt")
+        (sig, flags, method, _, _, crc, csize, size, nlen, xlen, clen, offset) = _CENTRAL.unpack_from(cd, pos)
+        if sig != _CENTRAL_SIG:
+            raise PackageError(f"central directory entry {i} is corrupt")
+        raw = cd[pos + 46:pos + 46 + nlen]
+        extra = cd[pos + 46 + nlen:pos + 46 + nlen + xlen]
+        big = [v == _ZIP64_MARKER for v in (size, csize, offset)]
+        if any(big):
+            vals = iter(_zip64_values(extra, sum(big)))
+            try:
+                size = next(vals) if big[0] else size
+                csize = next(vals) if big[1] else csize
+                offset = next(vals) if big[2] else offset
+            except StopIteration:
+                raise PackageError(f"central directory entry {i} lacks its Zip64 sizes") from None
+        name = raw.decode("utf-8" if flags & _UTF8_FLAG else "cp437", "replace")
+        entries.append(ZipEntry(name, method, flags, crc, csize, size, offset))
+        pos += 46 + nlen + xlen + clen
+    return entries, cd_offset
+
+
+def _data_offset(fp, entry: ZipEntry) -> int:
+    """读取并核对 entry 的本地文件头，返回数据起始偏移，并把 fp 定位到该处。"""
+    fp.seek(entry.offset)
+    head = fp.read(30)
+    if len(head) < 30 or struct.unpack_from("<I", head)[0] != _LOCAL_SIG:
+        raise PackageError(f"{entry.name}: local file header not found")
+    nlen, xlen = struct.unpack_from("<HH", head, 26)
+    raw = fp.read(nlen)
+    if raw.decode("utf-8" if entry.flags & _UTF8_FLAG else "cp437", "replace") != entry.name:
+        raise PackageError(f"{entry.name}: local file header names {raw!r}")
+    start = entry.offset + 30 + nlen + xlen
+    # 跳过扩展字段（Zip64 条目的本地头带 20 字节扩展），调用方从当前位置顺序读取数据
+    fp.seek(start)
+    return start
+
+
+def _inflate(entry: ZipEntry, data: bytes) -> bytes:
+    if entry.method == 0:
+        return data
+    if entry.method == 8:
+        return zlib.decompress(data, -15)
+    raise PackageError(f"{entry.name}: unsupported compression method {entry.method}")
+
+
+def read_entry(fp, entry: ZipEntry) -> bytes:
+    """读出 entry 的完整内容（解压并核对 CRC-32），适合清单、块映射等小文件。"""
+    fp.seek(_data_offset(fp, entry))
+    data = _inflate(entry, fp.read(entry.csize))
+    if len(data) != entry.size or zlib.crc32(data) != entry.crc:
+        raise PackageError(f"{entry.name}: CRC mismatch")
+    return data
+
+
+def parse_block_map(data: bytes) -> List[BlockMapFile]:
+    files = []
+    for elem in ET.fromstring(data).iter(f"{{{BLOCKMAP_NS}}}File"):
+        blocks = []
+        for b in elem.iter(f"{{{BLOCKMAP_NS}}}Block"):
+            size = b.get("Size")
+            blocks.append((b.get("Hash", ""), int(size) if size else None))
+        files.append(BlockMapFile(elem.get("Name", ""), int(elem.get("Size") or 0),
+                                  int(elem.get("LfhSize") or 0), blocks))
+    return files
+
+
+# --------------------------------------------------
+# 流式校验
+# --------------------------------------------------
+@dataclass
+class VerifyResult:
+    path: pathlib.Path
+    files: int = 0
+    blocks: int = 0
+    bytes_in: int = 0        # 读取的（压缩）数据
+    bytes_out: int = 0       # 解压后核对的数据
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.error_count
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_in / 1048576 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def fail(self, msg: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(msg)
+
+
+class _Tracked:
+    """一个负载文件的校验进度：剩余块数与按顺序累计的 CRC-32。"""
+    __slots__ = ("entry", "left", "crc")
+
+    def __init__(self, entry: ZipEntry, blocks: int):
+        self.entry = entry
+        self.left = blocks
+        self.crc = 0
+
+
+def _check_block(data: bytes, deflated: bool):
+    # 每块独立压缩（以 FULL_FLUSH 结束），可以单独解压
+    raw = zlib.decompressobj(-15).decompress(data) if deflated else data
+    return base64.b64encode(hashlib.sha256(raw).digest()).decode("ascii"), raw
+
+
+class _Verifier:
+    def __init__(self, fp, res: VerifyResult, workers: int, progress):
+        self.fp = fp
+        self.res = res
+        self.workers = workers
+        self.progress = progress
+        self.pending = deque()
+        self.total = 0
+
+    def run(self) -> Optional[List[BlockMapFile]]:
+        fp, res = self.fp, self.res
+        entries, cd_offset = read_central_directory(fp, os.fstat(fp.fileno()).st_size)
+        by_name = {}
+        for e in entries:
+            if e.name in by_name:
+                res.fail(f"{e.name}: duplicate entry")
+            by_name[e.name] = e
+        bm = by_name.get(BLOCKMAP_NAME)
+        if bm is None:
+            res.fail(f"{BLOCKMAP_NAME} is missing")
+            return None
+        block_map = parse_block_map(read_entry(fp, bm))
+        expected = {f.zip_name: f for f in block_map}
+        for name, f in expected.items():
+            if name not in by_name:
+                res.fail(f"{f.name}: listed in {BLOCKMAP_NAME} but not in the archive")
+        ordered = sorted(entries, key=lambda e: e.offset)
+        self.total = sum(e.csize for e in ordered)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="verify") as pool:
+            for i, e in enumerate(ordered):
+                if res.error_count >= MAX_ERRORS:
+                    break
+                limit = ordered[i + 1].offset if i + 1 < len(ordered) else cd_offset
+                start = _data_offset(fp, e)
+                if start + e.csize > limit:
+                    res.fail(f"{e.name}: data overlaps the next entry")
+                    continue
+                f = expected.get(e.name)
+                if f is None:
+                    self._check_footprint(e)
+                else:
+                    self._check_payload(pool, e, f, start - e.offset)
+            while self.pending:
+                self._drain_one()
+        return block_map
+
+    def _check_footprint(self, e: ZipEntry):
+        if not e.is_footprint:
+            self.res.fail(f"{e.path}: not listed in {BLOCKMAP_NAME}")
+            return
+        data = self.fp.read(e.csize)
+        raw = _inflate(e, data)
+        if len(raw) != e.size or zlib.crc32(raw) != e.crc:
+            self.res.fail(f"{e.path}: CRC mismatch")
+        self.res.bytes_in += len(data)
+
+    def _check_payload(self, pool, e: ZipEntry, f: BlockMapFile, lfh_size: int):
+        res = self.res
+        if f.lfh_size and f.lfh_size != lfh_size:
+            res.fail(f"{f.name}: local header is {lfh_size} bytes, block map says {f.lfh_size}")
+        if f.size != e.size:
+            res.fail(f"{f.name}: {e.size} bytes in the archive, block map says {f.size}")
+            return
+        if len(f.blocks) != (e.size + BLOCK_SIZE - 1) // BLOCK_SIZE:
+            res.fail(f"{f.name}: {len(f.blocks)} blocks for {e.size} bytes")
+            return
+        deflated = e.method == 8
+        tracked = _Tracked(e, len(f.blocks))
+        remaining, read = e.size, 0
+        for index, (digest, csize) in enumerate(f.blocks):
+            raw_len = min(BLOCK_SIZE, remaining)
+            n = csize if deflated else raw_len
+            if n is None:
+                res.fail(f"{f.name}: compressed block without a Size")
+                return
+            data = self.fp.read(n)
+            if len(data) != n:
+                res.fail(f"{f.name}: archive is truncated")
+                return
+            remaining -= raw_len
+            read += n
+            self.pending.append((tracked, index, pool.submit(_check_block, data, deflated), digest, raw_len, n))
+            if len(self.pending) >= self.workers * 4:
+                self._drain_one()
+        if read != e.csize:
+            res.fail(f"{f.name}: blocks add up to {read} bytes, archive says {e.csize}")
+        if not f.blocks:
+            res.files += 1
+
+    def _drain_one(self):
+        tracked, index, fut, digest, raw_len, n = self.pending.popleft()
+        res = self.res
+        name = tracked.entry.path
+        try:
+            got, raw = fut.result()
+        except zlib.error as e:
+            res.fail(f"{name}: block does not decompress ({e})")
+            got, raw = None, b""
+        if got is not None and (got != digest or len(raw) != raw_len):
+            res.fail(f"{name}: block {index} hash mismatch")
+        tracked.crc = zlib.crc32(raw, tracked.crc)
+        tracked.left -= 1
+        res.blocks += 1
+        res.bytes_in += n
+        res.bytes_out += len(raw)
+        if not tracked.left:
+            res.files += 1
+            if tracked.crc != tracked.entry.crc:
+                res.fail(f"{name}: CRC mismatch")
+        if self.progress:
+            self.progress(res.bytes_in, self.total)
+
+
+def compare_with_source(res: VerifyResult, block_map: List[BlockMapFile], src_dir):
+    """核对包内文件清单与源目录：缺少、多出的文件及大小不一致的文件。"""
+    in_pkg = {f.name.replace("\\", "/").lower(): f for f in block_map}
+    missing, changed = [], []
+    seen = set()
+    for full, rel in iter_payload(pathlib.Path(src_dir)):
+        key = rel.lower()
+        seen.add(key)
+        f = in_pkg.get(key)
+        if f is None:
+            missing.append(rel)
+        elif full.stat().st_size != f.size:
+            changed.append(rel)
+    extra = [f.name for key, f in in_pkg.items() if key not in seen]
+    for label, names in (("missing from the package", missing), ("not in the source", extra),
+                         ("differ in size from the source", changed)):
+        if names:
+            more = f" (+{len(names) - 5} more)" if len(names) > 5 else ""
+            res.fail(f"{len(names)} file(s) {label}: {', '.join(names[:5])}{more}")
+
+
+def verify_package(path, src_dir=None, workers: int = None, progress=None) -> VerifyResult:
+    """顺序读取一遍 path 并校验；给出 src_dir 时再与源目录的文件清单比对。
+
+    progress(已读字节, 总字节) 每核对完一块回调一次，可以抛出异常来中止校验。
+    结构或数据问题记录在返回值的 errors 中，不抛异常。"""
+    res = VerifyResult(pathlib.Path(path))
+    start = time.perf_counter()
+    block_map = None
+    try:
+        with open(res.path, "rb", buffering=READ_BUFFER) as fp:
+            block_map = _Verifier(fp, res, workers or os.cpu_count() or 2, progress).run()
+    except (OSError, PackageError, zlib.error, ET.ParseError, ValueError) as e:
+        res.fail(str(e))
+    if src_dir is not None and block_map is not None:
+        try:
+            compare_with_source(res, block_map, src_dir)
+        except OSError as e:
+            res.fail(str(e))
+    res.elapsed = time.perf_counter() - start
+    return res
+
+
+# --------------------------------------------------
+# 按需读取已有的包
+# --------------------------------------------------
+def _entry_key(name: str) -> str:
+    return name.replace("\\", "/").strip("/").lower()
+
+
+def _safe_destination(entry: ZipEntry, dest_dir) -> pathlib.Path:
+    """entry 在 dest_dir 下的目标路径。拒绝带盘符、NTFS 备用数据流（含 :）的名称，
+    以及解析后（含 .. 与符号链接）落到 dest_dir 之外的路径。"""
+    parts = [p for p in entry.path.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or any(":" in p for p in parts):
+        raise PackageError(f"{entry.name}: not a valid relative path")
+    root = pathlib.Path(dest_dir).resolve()
+    dest = root.joinpath(*parts).resolve()
+    if dest == root or not dest.is_relative_to(root):
+        raise PackageError(f"{entry.name}: path leaves the destination folder")
+    return dest
+
+
+class PackageArchive:
+    """已有 .appx/.msix 的只读视图。打开时只读取中央目录；清单、单个文件在首次访问时
+    通过 mmap 随机读取，不会顺序扫描整个包。可在多个线程中同时读取不同的文件。"""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._fp = open(self.path, "rb")
+        try:
+            self.size = os.fstat(self._fp.fileno()).st_size
+            if not self.size:
+                raise PackageError("end of central directory not found")
+            self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+            self.entries, self.cd_offset = read_central_directory(self._mm, self.size)
+        except BaseException:
+            self.close()
+            raise
+        self._by_key = None
+        # mmap 的 seek/read 共用一个位置，只在读取本地文件头时加锁，数据本身按切片读取
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 目录 ----
+    @property
+    def files(self) -> List[ZipEntry]:
+        """负载文件（不含 AppxBlockMap.xml、签名等打包工具生成的文件），按包内顺序。"""
+        return [e for e in self.entries if not e.is_footprint]
+
+    @property
+    def unpacked_size(self) -> int:
+        return sum(e.size for e in self.entries)
+
+    @property
+    def is_signed(self) -> bool:
+        return self._find(SIGNATURE_NAME) is not None
+
+    def _find(self, name: str) -> Optional[ZipEntry]:
+        # 清单、签名等文件名固定、不需解码，直接比较原始名称，免得为整个包建索引
+        return next((e for e in self.entries if e.name == name), None)
+
+    def entry(self, name: str) -> Optional[ZipEntry]:
+        """按相对路径查找（不区分大小写，\\ 与 / 均可）。索引在第一次查找时才建立。"""
+        if self._by_key is None:
+            self._by_key = {_entry_key(e.path): e for e in self.entries}
+        return self._by_key.get(_entry_key(name))
+
+    @property
+    def manifest(self) -> Optional[appx_manifest.ManifestInfo]:
+        """包内 AppxManifest.xml 的解析结果（首次访问时读取）；包内没有清单时为 None。"""
+        if self._manifest is None:
+            e = self._find(appx_manifest.MANIFEST_NAME) or self.entry(appx_manifest.MANIFEST_NAME)
+            if e is None:
+                return None
+            self._manifest = appx_manifest.parse(io.BytesIO(self.read(e)))
+        return self._manifest
+
+    # ---- 读取 ----
+    def _span(self, entry: ZipEntry):
+        with self._lock:
+            start = _data_offset(self._mm, entry)
+        if start + entry.csize > self.cd_offset:
+            raise PackageError(f"{entry.name}: data runs past the central directory")
+        return start, start + entry.csize
+
+    def iter_chunks(self, entry, chunk: int = READ_BUFFER):
+        """逐段产出 entry 解压后的内容，读完后核对大小与 CRC-32；大文件也只占用一个缓冲区。"""
+        if isinstance(entry, str):
+            name, entry = entry, self.entry(entry)
+            if entry is None:
+                raise KeyError(name)
+        if entry.method not in (0, 8):
+            raise PackageError(f"{entry.name}: unsupported compression method {entry.method}")
+        pos, end = self._span(entry)
+        inflater = zlib.decompressobj(-15) if entry.method == 8 else None
+        crc = size = 0
+        while pos < end:
+            data = self._mm[pos:min(end, pos + chunk)]
+            pos += len(data)
+            if inflater is not None:
+                data = inflater.decompress(data)
+            crc, size = zlib.crc32(data, crc), size + len(data)
+            yield data
+        if inflater is not None:
+            tail = inflater.flush()
+            if tail:
+                crc, size = zlib.crc32(tail, crc), size + len(tail)
+                yield tail
+        if size != entry.size or crc != entry.crc:
+            raise PackageError(f"{entry.name}: CRC mismatch")
+
+    def read(self, entry) -> bytes:
+        """读出单个文件的完整内容；适合清单、图标等小文件，大文件用 extract() 或 iter_chunks()。"""
+        return b"".join(self.iter_chunks(entry))
+
+    def extract(self, entry, dest_dir) -> pathlib.Path:
+        """把单个文件解压到 dest_dir 下与包内相同的相对路径，返回写出的路径。"""
+        if isinstance(entry, str):
+            name, entry = entry, self.entry(entry)
+            if entry is None:
+                raise KeyError(name)
+        dest = _safe_destination(entry, dest_dir)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".tmp")
+        try:
+            with open(tmp, "wb") as out:
+                for data in self.iter_chunks(entry):
+                    out.write(data)
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return dest
+
+
+@dataclass
+class ArchiveSummary:
+    """输出目录中一个包的概要，供目录浏览使用。"""
+    path: pathlib.Path
+    size: int = 0
+    files: int = 0
+    unpacked_size: int = 0
+    signed: bool = False
+    manifest: Optional[appx_manifest.ManifestInfo] = None
+    error: str = ""
+
+
+def summarize(path) -> ArchiveSummary:
+    """只读中央目录与清单得到包的概要；包损坏时把原因放在 error 中，不抛异常。"""
+    res = ArchiveSummary(pathlib.Path(path))
+    try:
+        with PackageArchive(res.path) as pkg:
+            res.size, res.files = pkg.size, len(pkg.files)
+            res.unpacked_size, res.signed = pkg.unpacked_size, pkg.is_signed
+            res.manifest = pkg.manifest
+    except (OSError, PackageError, zlib.error, ET.ParseError, ValueError) as e:
+        res.error = str(e)
+    return res
@@ -0,0 +1,405 @@
+"""纯 Python 的流式 APPX/MSIX 打包器。
+
+遍历安装目录，把每个文件按 64 KiB 分块流式写入 ZIP 容器，同时生成
+AppxBlockMap.xml（每块 SHA-256）与 [Content_Types].xml。各块独立压缩，
+因此可以在线程池中并行压缩（zlib / hashlib 计算时会释放 GIL）。
+超过 4 GiB 的文件或包自动使用 Zip64。不依赖 Qt，可在 Linux 上运行。
+"""
+import os, zlib, struct, base64, hashlib, time, pathlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+BLOCK_SIZE = 64 * 1024
+
+BLOCKMAP_NS = "http://schemas.microsoft.com/appx/2010/blockmap"
+HASH_METHOD = "http://www.w3.org/2001/04/xmlenc#sha256"
+
+# 已安装包目录中由系统生成的“足迹”文件，重新打包时必须由打包器/签名工具重新生成
+FOOTPRINT_FILES = {
+    "appxblockmap.xml",
+    "appxsignature.p7x",
+    "[content_types].xml",
+    "appxmetadata/codeintegrity.cat",
+}
+
+# 本身已压缩的格式直接存储，避免浪费 CPU
+STORED_EXTS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".7z", ".rar", ".gz", ".xz",
+    ".appx", ".msix", ".appxbundle", ".msixbundle", ".mp3", ".mp4", ".m4a", ".ogg",
+    ".wma", ".wmv", ".avi", ".mkv", ".webm", ".cab", ".pak", ".bk2", ".bnk", ".woff2",
+}
+
+CONTENT_TYPES = {
+    "xml": "application/xml",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "ico": "image/vnd.microsoft.icon",
+    "dll": "application/x-msdownload",
+    "exe": "application/x-msdownload",
+    "winmd": "application/vnd.ms-windows.winmd",
+    "pri": "application/octet-stream",
+    "json": "application/json",
+    "txt": "text/plain",
+    "html": "text/html",
+    "htm": "text/html",
+    "js": "application/javascript",
+    "css": "text/css",
+    "svg": "image/svg+xml",
+    "ttf": "application/x-font-ttf",
+}
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+MANIFEST_CONTENT_TYPE = "application/vnd.ms-appx.manifest+xml"
+BLOCKMAP_CONTENT_TYPE = "application/vnd.ms-appx.blockmap+xml"
+
+# 32/16 位字段的占位值（表示真实值在 Zip64 扩展字段中）
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+# 触发 Zip64 的阈值；文件级阈值预留 deflate 最坏情况下的膨胀空间
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_FILE_LIMIT = _ZIP64_LIMIT - 64 * 1024 * 1024
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_UTF8_FLAG = 0x800
+_DESCRIPTOR_FLAG = 0x08
+
+
+@dataclass
+class _Entry:
+    path: Optional[pathlib.Path]
+    zip_name: str
+    map_name: str
+    size: int
+    method: int
+    dos_time: int
+    dos_date: int
+    zip64: bool = False
+    offset: int = 0
+    crc: int = 0
+    csize: int = 0
+    lfh_size: int = 0
+    blocks: list = field(default_factory=list)
+
+    @property
+    def flags(self) -> int:
+        flags = _DESCRIPTOR_FLAG
+        if not self.zip_name.isascii():
+            flags |= _UTF8_FLAG
+        return flags
+
+
+@dataclass
+class PackStats:
+    files: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_in / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def part_name(rel: str) -> str:
+    """把相对路径转换成 OPC 部件名（ZIP 中使用的百分号编码形式）。"""
+    return quote(rel.replace("\\", "/"), safe="/!$&'()*+,;=:@-._~")
+
+
+def _dos_datetime(mtime: float):
+    lt = time.localtime(mtime)
+    year = min(max(lt.tm_year, 1980), 2107)
+    dos_date = ((year - 1980) << 9) | (lt.tm_mon << 5) | lt.tm_mday
+    dos_time = (lt.tm_hour << 11) | (lt.tm_min << 5) | (lt.tm_sec // 2)
+    return dos_time, dos_date
+
+
+def _hash_block(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode("ascii")
+
+
+def _deflate_block(data: bytes, level: int, last: bool):
+    # 每块使用独立的压缩器并以 FULL_FLUSH 结束：块之间没有回溯引用，
+    # 拼接后仍是合法的 deflate 流，而且每块可以单独解压、单独并行压缩
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    out = c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH)
+    return _hash_block(data), out
+
+
+def _store_block(data: bytes, level: int, last: bool):
+    return _hash_block(data), data
+
+
+def iter_payload(src_dir: pathlib.Path):
+    """按确定顺序遍历源目录，返回 (绝对路径, 以 / 分隔的相对路径)，跳过足迹文件。"""
+    src_dir = pathlib.Path(src_dir)
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        for fn in sorted(files):
+            full = pathlib.Path(root) / fn
+            rel = full.relative_to(src_dir).as_posix()
+            if rel.lower() in FOOTPRINT_FILES:
+                continue
+            yield full, rel
+
+
+class AppxWriter:
+    """流式 APPX 写入器。
+
+    用法：
+        with AppxWriter(out_path) as w:
+            for full, rel in iter_payload(src):
+                w.add_file(full, rel)
+    退出 with 时写入 AppxBlockMap.xml、[Content_Types].xml 与中央目录。"""
+
+    def __init__(self, out_path, level: int = 6, workers: int = None, progress=None):
+        self.out_path = pathlib.Path(out_path)
+        self.level = level
+        self.workers = workers or os.cpu_count() or 2
+        # 同时在途的块数量上限，决定内存占用上限（约 window * 64 KiB * 2）
+        self.window = self.workers * 4
+        self.progress = progress
+        self.stats = PackStats()
+        self._entries: List[_Entry] = []
+        self._pending = deque()
+        self._fp = None
+        self._pool = None
+        self._pos = 0
+        self._total_bytes = 0
+        self._started = 0.0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        try:
+            self.close()
+        except BaseException:
+            # 写块映射或中央目录时出错（如磁盘已满）：同样关闭线程池并删除半成品
+            self.abort()
+            raise
+        return False
+
+    def open(self):
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = open(self.out_path, "wb", buffering=1024 * 1024)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="deflate")
+        self._started = time.perf_counter()
+
+    def abort(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        self.out_path.unlink(missing_ok=True)
+
+    def set_total_bytes(self, total: int):
+        # 仅用于进度回调的百分比计算
+        self._total_bytes = total
+
+    # ---------- 负载文件 ----------
+    def add_file(self, path, rel: str):
+        path = pathlib.Path(path)
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            stored = self.level == 0 or size == 0 or path.suffix.lower() in STORED_EXTS
+            dos_time, dos_date = _dos_datetime(st.st_mtime)
+            entry = _Entry(path=path, zip_name=part_name(rel), map_name=rel.replace("/", "\\"),
+                           size=size, method=0 if stored else 8,
+                           dos_time=dos_time, dos_date=dos_date, zip64=size >= _ZIP64_FILE_LIMIT)
+            self._entries.append(entry)
+            # 本地头也排进队列：ZIP 必须按顺序写，但下一个文件的块可以在
+            # 上一个文件的块尚未写出时就开始压缩，小文件也能跨文件并行
+            self._pending.append((entry, None, 0, size == 0))
+            work = _store_block if stored else _deflate_block
+            n_blocks = (size + BLOCK_SIZE - 1) // BLOCK_SIZE
+            for idx in range(n_blocks):
+                data = f.read(BLOCK_SIZE)
+                if not data:
+                    raise IOError(f"{path} changed while packing")
+                entry.crc = zlib.crc32(data, entry.crc)
+                last = idx == n_blocks - 1
+                fut = self._pool.submit(work, data, self.level, last)
+                self._pending.append((entry, fut, len(data), last))
+                if len(self._pending) >= self.window:
+                    self._drain_one()
+
+    def _drain_one(self):
+        entry, fut, raw_len, last = self._pending.popleft()
+        if fut is None:
+            self._write_local_header(entry)
+            if last:
+                self._finish_entry(entry)
+            return
+        digest, payload = fut.result()
+        self._fp.write(payload)
+        self._pos += len(payload)
+        entry.csize += len(payload)
+        entry.blocks.append((digest, len(payload) if entry.method == 8 else None))
+        self.stats.bytes_in += raw_len
+        if self.progress:
+            self.progress(self.stats.bytes_in, self._total_bytes)
+        if last:
+            self._finish_entry(entry)
+
+    def _drain_all(self):
+        while self._pending:
+            self._drain_one()
+
+    def _write_local_header(self, e: _Entry):
+        name = e.zip_name.encode("utf-8")
+        if e.zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            sizes = (_ZIP64_MARKER, _ZIP64_MARKER)
+            version = 45
+        else:
+            extra = b""
+            sizes = (0, 0)
+            version = 20
+        header = struct.pack("<IHHHHHIIIHH", 0x04034b50, version, e.flags, e.method,
+                             e.dos_time, e.dos_date, 0, sizes[0], sizes[1], len(name), len(extra))
+        e.offset = self._pos
+        e.lfh_size = len(header) + len(name) + len(extra)
+        self._fp.write(header + name + extra)
+        self._pos += e.lfh_size
+
+    def _finish_entry(self, e: _Entry):
+        if e.zip64:
+            desc = struct.pack("<IIQQ", 0x08074b50, e.crc, e.csize, e.size)
+        else:
+            desc = struct.pack("<IIII", 0x08074b50, e.crc, e.csize, e.size)
+        self._fp.write(desc)
+        self._pos += len(desc)
+        self.stats.files += 1
+
+    def _add_bytes(self, rel: str, data: bytes):
+        # 足迹文件（块映射、内容类型）不出现在块映射中，直接整体压缩写入
+        dos_time, dos_date = _dos_datetime(time.time())
+        # [Content_Types].xml 按 OPC 约定以原名存放，不做百分号编码
+        e = _Entry(path=None, zip_name=rel, map_name=rel, size=len(data), method=8,
+                   dos_time=dos_time, dos_date=dos_date)
+        self._drain_all()
+        self._entries.append(e)
+        self._write_local_header(e)
+        c = zlib.compressobj(self.level or 6, zlib.DEFLATED, -15)
+        payload = c.compress(data) + c.flush()
+        e.crc = zlib.crc32(data)
+        e.csize = len(payload)
+        self._fp.write(payload)
+        self._pos += len(payload)
+        self._finish_entry(e)
+
+    # ---------- 足迹文件 ----------
+    def _block_map_xml(self) -> bytes:
+        parts = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>\r\n',
+                 f'<BlockMap xmlns="{BLOCKMAP_NS}" HashMethod="{HASH_METHOD}">']
+        for e in self._entries:
+            parts.append(f'<File Name={quoteattr(e.map_name)} Size="{e.size}" LfhSize="{e.lfh_size}"')
+            if not e.blocks:
+                parts.append('/>')
+                continue
+            parts.append('>')
+            for digest, csize in e.blocks:
+                if csize is None:
+                    parts.append(f'<Block Hash="{digest}"/>')
+                else:
+                    parts.append(f'<Block Hash="{digest}" Size="{csize}"/>')
+            parts.append('</File>')
+        parts.append('</BlockMap>')
+        return "".join(parts).encode("utf-8")
+
+    def _content_types_xml(self) -> bytes:
+        defaults = {}
+        overrides = {"/AppxManifest.xml": MANIFEST_CONTENT_TYPE,
+                     "/AppxBlockMap.xml": BLOCKMAP_CONTENT_TYPE}
+        for e in self._entries:
+            name = e.zip_name.rsplit("/", 1)[-1]
+            if "/" + e.zip_name in overrides:
+                continue
+            if "." in name:
+                ext = name.rsplit(".", 1)[1].lower()
+                defaults.setdefault(ext, CONTENT_TYPES.get(ext, DEFAULT_CONTENT_TYPE))
+            else:
+                overrides["/" + e.zip_name] = DEFAULT_CONTENT_TYPE
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">']
+        for ext, ctype in defaults.items():
+            parts.append(f'<Default Extension={quoteattr(ext)} ContentType="{escape(ctype)}"/>')
+        for pn, ctype in overrides.items():
+            parts.append(f'<Override PartName={quoteattr(pn)} ContentType="{escape(ctype)}"/>')
+        parts.append('</Types>')
+        return "".join(parts).encode("utf-8")
+
+    # ---------- 收尾 ----------
+    def close(self) -> PackStats:
+        self._drain_all()
+        self._add_bytes("AppxBlockMap.xml", self._block_map_xml())
+        self._add_bytes("[Content_Types].xml", self._content_types_xml())
+        self._write_central_directory()
+        self._pool.shutdown(wait=True)
+        self._pool = None
+        self._fp.close()
+        self._fp = None
+        self.stats.bytes_out = self._pos
+        self.stats.elapsed = time.perf_counter() - self._started
+        return self.stats
+
+    def _write_central_directory(self):
+        cd_start = self._pos
+        for e in self._entries:
+            name = e.zip_name.encode("utf-8")
+            extra_vals = []
+            usize, csize, offset = e.size, e.csize, e.offset
+            # 本地头已带 Zip64 扩展（并使用 64 位数据描述符）时，中央目录也必须带上同样的大小，
+            # 否则本地记录与中央目录不一致，严格的读取方（如 AppX 打包 API）会拒绝该包
+            if usize >= _ZIP64_LIMIT or e.zip64:
+                extra_vals.append(usize)
+                usize = _ZIP64_MARKER
+            if csize >= _ZIP64_LIMIT or e.zip64:
+                extra_vals.append(csize)
+                csize = _ZIP64_MARKER
+            if offset >= _ZIP64_LIMIT:
+                extra_vals.append(offset)
+                offset = _ZIP64_MARKER
+            extra = b""
+            if extra_vals:
+                extra = struct.pack(f"<HH{len(extra_vals)}Q", 0x0001, 8 * len(extra_vals), *extra_vals)
+            version = 45 if (extra_vals or e.zip64) else 20
+            rec = struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, version, version, e.flags, e.method,
+                              e.dos_time, e.dos_date, e.crc, csize, usize, len(name), len(extra),
+                              0, 0, 0, 0, offset)
+            self._fp.write(rec + name + extra)
+            self._pos += len(rec) + len(name) + len(extra)
+        cd_size = self._pos - cd_start
+        count = len(self._entries)
+        if count >= _ZIP64_COUNT_LIMIT or cd_start >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+            eocd64_pos = self._pos
+            self._fp.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0,
+                                       count, count, cd_size, cd_start))
+            self._fp.write(struct.pack("<IIQI", 0x07064b50, 0, eocd64_pos, 1))
+            self._pos += 56 + 20
+            count, cd_size, cd_start = _ZIP64_COUNT_MARKER, _ZIP64_MARKER, _ZIP64_MARKER
+        self._fp.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count, count, cd_size, cd_start, 0))
+        self._pos += 22
+
+
+def pack_directory(src_dir, out_path, level: int = 6, workers: int = None, progress=None) -> PackStats:
+    """把 src_dir 打包为 out_path（.appx/.msix），返回统计信息。"""
+    src_dir = pathlib.Path(src_dir)
+    payload = list(iter_payload(src_dir))
+    with AppxWriter(out_path, level=level, workers=workers, progress=progress) as w:
+        if progress:
+            w.set_total_bytes(sum(p.stat().st_size for p, _ in payload))
+        for full, rel in payload:
+            w.add_file(full, rel)
+    return w.stats
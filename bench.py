@@ -0,0 +1,511 @@
+"""热点路径基准测试：PowerShell 输出解析、名称解析、清单解析、打包与整条流水线。
+
+在临时目录中生成可复现的合成数据（固定随机种子），逐阶段报告耗时、吞吐与 Python 峰值内存：
+
+    python bench.py                                  # 默认规模
+    python bench.py --sizes 50,500,5000 --blob-mb 2048 --blobs 2 > bench_output.txt
+    python bench.py --stages enum,resolve --ps-capture captured.txt
+
+合成包目录包含大量小资源文件、若干大文件，以及多层 Strings/ 下的数百个 .resw
+（名称解析另有一组只带同等规模 resources.pri 的目录）；
+合成的 PowerShell 输出分为 clean / noisy（警告、ANSI 控制符、BOM、CRLF、报错行）/
+truncated（进程被中途结束，最后一条记录不完整）三种。--ps-capture 可加入真实抓取的输出。
+工具调用使用 toolrun.FakeBackend，不需要 Windows 与 SDK 工具。
+"""
+import argparse, json, os, pathlib, random, shutil, struct, sys, tempfile, time, tracemalloc
+from xml.sax.saxutils import escape
+
+import appx_manifest   # 不读取缓存目录，可以在设置 UWP_CACHE_DIR 之前导入
+import appx_reader
+
+STAGES = ("enum", "resolve", "manifest", "pack", "pipeline")
+PUBLISHER = "CN=Bench Corp, O=Bench Corp, L=Redmond, S=Washington, C=US"
+PUBLISHER_ID = appx_manifest.publisher_id(PUBLISHER)
+LANGS = ("en-US", "zh-CN", "de-DE", "fr-FR", "ja-JP", "ko-KR", "es-ES", "it-IT", "pt-BR", "ru-RU")
+
+MANIFEST = """<?xml version="1.0" encoding="utf-8"?>
+<Package xmlns="http://schemas.microsoft.com/appx/manifest/foundation/windows10"
+         xmlns:uap="http://schemas.microsoft.com/appx/manifest/uap/windows10"
+         IgnorableNamespaces="uap">
+  <Identity Name="{name}" Publisher="{publisher}" Version="1.0.{idx}.0" ProcessorArchitecture="x64" />
+  <Properties>
+    <DisplayName>ms-resource:AppDisplayName</DisplayName>
+    <PublisherDisplayName>Bench Corp</PublisherDisplayName>
+    <Logo>Assets\\StoreLogo.png</Logo>
+  </Properties>
+  <Dependencies>
+    <TargetDeviceFamily Name="Windows.Desktop" MinVersion="10.0.17763.0" MaxVersionTested="10.0.22621.0" />
+  </Dependencies>
+  <Resources>{resources}
+  </Resources>
+  <Applications>
+    <Application Id="App" Executable="{name}.exe" EntryPoint="Windows.FullTrustApplication">
+      <uap:VisualElements DisplayName="ms-resource:AppDisplayName" Description="ms-resource:AppDescription"
+                          BackgroundColor="transparent" Square150x150Logo="Assets\\Square150x150Logo.png"
+                          Square44x44Logo="Assets\\Square44x44Logo.png" />
+    </Application>
+  </Applications>
+</Package>
+"""
+
+
+# --------------------------------------------------
+# 合成数据
+# --------------------------------------------------
+def _resw(rng: random.Random, n_keys: int, app_name: str = None) -> str:
+    rows = []
+    if app_name:
+        rows.append(f'  <data name="AppDisplayName" xml:space="preserve"><value>{escape(app_name)}</value></data>')
+    for k in range(n_keys):
+        text = " ".join(rng.choice(("alpha", "beta", "gamma", "delta", "omega", "zeta")) for _ in range(8))
+        rows.append(f'  <data name="Key{k}" xml:space="preserve"><value>{text}</value>'
+                    f'<comment>generated</comment></data>')
+    return '<?xml version="1.0" encoding="utf-8"?>\n<root>\n' + "\n".join(rows) + "\n</root>\n"
+
+
+def _pri_section(ident: bytes, content: bytes) -> bytes:
+    content += b"\0" * (-len(content) % 8)
+    length = 32 + len(content) + 8
+    return ident + struct.pack("<IHHII", 0, 0, 0, length, 0) + content + struct.pack("<II", 0xDEF5FADE, length)
+
+
+def make_pri(path: pathlib.Path, strings: dict, files: dict = None):
+    """写出一个最小的 resources.pri（mrm_pri2）：strings 为 {键: {语言或 "": 文本}}，
+    放在 Resources/ 下；files 为 {相对路径: {缩放比例: 变体相对路径}}，放在 Files/ 下。"""
+    files = files or {}
+    # 层次结构：scope 树按广度优先排列，每个 scope 的子项连续
+    tree = {"Resources": {k: strings[k] for k in strings}}
+    for rel, variants in files.items():
+        node = tree.setdefault("Files", {})
+        *dirs, leaf = rel.replace("\\", "/").split("/")
+        for d in dirs:
+            node = node.setdefault(d, {})
+        # 文件变体按缩放比例限定，用元组与 scope（dict）区分
+        node[leaf] = tuple(((2, str(sc)), v) for sc, v in variants.items())
+    entries, scope_ex, items, ascii_data = [(0, 0, 0, 0, 0x10, 0, 0)], [], [], b""
+    queue = [(0, 0, tree, "")]
+    n_scopes = 1
+    while queue:
+        entry_idx, scope_idx, node, prefix = queue.pop(0)
+        scope_ex.append((scope_idx, len(node), len(entries), 0))
+        for name, child in node.items():
+            full = f"{prefix}\\{name}" if prefix else name
+            off = len(ascii_data)
+            ascii_data += name.encode("ascii") + b"\0"
+            flags = 0x20 | (off >> 16 & 0xF)
+            if isinstance(child, dict) and prefix != "Resources":
+                flags |= 0x10
+                queue.append((len(entries), n_scopes, child, full))
+                index = n_scopes
+                n_scopes += 1
+            else:
+                index = len(items)
+                items.append([((0, lang), text) for lang, text in child.items()]
+                             if isinstance(child, dict) else list(child))
+            entries.append((entry_idx, len(full), ord(name[0].upper()), len(name) & 0xFF, flags, off & 0xFFFF, index))
+    scope_ex.sort()
+    n_items = len(items)
+    unique, pname = "ms-appx://Bench.App/\0".encode("utf-16-le"), "Bench.App\0".encode("utf-16-le")
+    schema = struct.pack("<HHHHHHIIII", 1, len(unique) // 2, len(pname) // 2, 0, 1, 0, 0, 0, n_scopes, n_items)
+    schema += unique + pname + struct.pack("<HHHIIIII", 0, 255, 0, n_scopes + n_items, n_scopes, n_items, 0, 0)
+    schema += b"".join(struct.pack("<HHHBBHH", *e) for e in entries)
+    schema += b"".join(struct.pack("<HHHH", *e) for e in scope_ex)
+    schema += struct.pack(f"<{n_items}H", *range(n_items)) + ascii_data
+    # 限定符：每个 (类型, 值) 一个；限定符组合 0 为空（不限定）
+    distinct = sorted({q for vals in items for q, _ in vals if q[1]})
+    qset_of = {q: i + 1 for i, q in enumerate(distinct)}
+    decisions, decision_of = [], {}
+    for vals in items:
+        sets = tuple(qset_of.get(q, 0) for q, _ in vals)
+        if sets not in decision_of:
+            decision_of[sets] = len(decisions)
+            decisions.append(sets)
+    index_table, data = [], b""
+    quals_b, distinct_b = b"", b""
+    for i, (qtype, value) in enumerate(distinct):
+        distinct_b += struct.pack("<HHHHI", 0, qtype, 0, 0, len(data) // 2)
+        data += (value + "\0").encode("utf-16-le")
+        quals_b += struct.pack("<HHHH", i, 100, 0, 0)
+    sets_b = struct.pack("<HH", 0, 0)
+    for i in range(len(distinct)):
+        sets_b += struct.pack("<HH", len(index_table), 1)
+        index_table.append(i)
+    decisions_b = b""
+    for sets in decisions:
+        decisions_b += struct.pack("<HH", len(index_table), len(sets))
+        index_table.extend(sets)
+    decn = struct.pack("<6H", len(distinct), len(distinct), len(distinct) + 1, len(decisions),
+                       len(index_table), len(data)) + decisions_b + sets_b + quals_b + distinct_b
+    decn += struct.pack(f"<{len(index_table)}H", *index_table) + data
+    # 资源映射：一个组覆盖全部 item，候选值均为内联字符串
+    infos_b, cands_b, str_data, n_cands = b"", b"", b"", 0
+    for vals in items:
+        infos_b += struct.pack("<HH", decision_of[tuple(qset_of.get(q, 0) for q, _ in vals)], n_cands)
+        for q, text in vals:
+            raw = (text + "\0").encode("utf-16-le")
+            # 值类型表：0 = String，1 = Path
+            cands_b += struct.pack("<BBHI", 0, 0 if q[0] == 0 else 1, len(raw), len(str_data))
+            str_data += raw
+            n_cands += 1
+    resmap = struct.pack("<8H4I", 0, 0, 1, 0, 2, 2, 1, 1, n_items, n_cands, len(str_data), 0)
+    resmap += struct.pack("<4I", 4, 0, 4, 1) + struct.pack("<HHHH", 0, 0, n_items, 0)
+    resmap += infos_b + cands_b + str_data
+    desc = struct.pack("<10H", 0, 0xFFFF, 0, 1, 1, 1, 3, 0, 0, 0) + struct.pack("<3H", 1, 2, 3)
+    sections = [_pri_section(b"[mrm_pridescex]\0", desc), _pri_section(b"[mrm_hschema]  \0", schema),
+                _pri_section(b"[mrm_decn_info]\0", decn), _pri_section(b"[mrm_res_map2_]\0", resmap)]
+    toc_off, start = 32, 32 + 32 * len(sections)
+    total = start + sum(len(s) for s in sections) + 16
+    head = b"mrm_pri2" + struct.pack("<HHIIIHHI", 0, 1, total, toc_off, start, len(sections), 0xFFFF, 0)
+    toc, off = b"", 0
+    for sec in sections:
+        toc += sec[:16] + struct.pack("<HHIII", 0, 0, 0, off, len(sec))
+        off += len(sec)
+    path.write_bytes(head + toc + b"".join(sections) + struct.pack("<I", 0xDEFFFADE) + struct.pack("<I", total)
+                     + b"mrm_pri2")
+
+
+def make_package_tree(root: pathlib.Path, idx: int, rng: random.Random, tiny: int, resw: int,
+                      resw_keys: int, blobs: int, blob_mb: int) -> pathlib.Path:
+    """生成一个安装目录：AppxManifest.xml、tiny 个小资源、resw 个 .resw（多层 Strings/）、blobs 个大文件。"""
+    name = f"Bench.App{idx}"
+    d = root / f"{name}_1.0.{idx}.0_x64__{PUBLISHER_ID}"
+    d.mkdir(parents=True, exist_ok=True)
+    resources = "".join(f'\n    <Resource Language="{lang}" />' for lang in LANGS)
+    (d / "AppxManifest.xml").write_text(
+        MANIFEST.format(name=name, publisher=escape(PUBLISHER, {'"': "&quot;"}), idx=idx, resources=resources),
+        encoding="utf-8")
+    # 小资源：大小 200 B ~ 8 KiB，一半可压缩
+    assets = d / "Assets"
+    for i in range(tiny):
+        sub = assets / f"scale-{(100, 125, 150, 200, 400)[i % 5]}" / f"g{i % 16:02d}"
+        sub.mkdir(parents=True, exist_ok=True)
+        size = rng.randint(200, 8192)
+        data = rng.randbytes(size) if i % 2 else (b"PNGDATA-" * (size // 8 + 1))[:size]
+        (sub / f"Asset{i}.png").write_bytes(data)
+    # 多层 Strings/<lang>/<module>/<sub>/Resources.resw；第一个文件含显示名
+    for i in range(resw):
+        lang = LANGS[i % len(LANGS)]
+        sub = d / "Strings" / lang / f"Module{i // len(LANGS) % 20}" / f"Part{i // 200}"
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"Resources{i}.resw").write_text(
+            _resw(rng, resw_keys, f"Bench App {idx}" if i == 0 else None), encoding="utf-8")
+    # 大文件：按 1 MiB 写入，前半随机（不可压缩），后半重复（高度可压缩）
+    chunk_rand = rng.randbytes(1 << 20)
+    chunk_rep = b"BLOBDATA" * (1 << 17)
+    for i in range(blobs):
+        with open(d / f"blob{i}.bin", "wb") as f:
+            for mb in range(blob_mb):
+                f.write(chunk_rand if mb < blob_mb // 2 else chunk_rep)
+    return d
+
+
+def make_ps_lines(n: int, install_dirs: list, rng: random.Random, variant: str = "clean") -> list:
+    """合成 n 个包的 Get-AppxPackage NDJSON 输出（与 PS_ENUM_SCRIPT 格式一致）。"""
+    lines = []
+    for i in range(n):
+        full = f"Bench.App{i}_1.0.{i}.0_x64__{PUBLISHER_ID}"
+        loc = f"C:\\Program Files\\WindowsApps\\{full}"
+        if install_dirs:
+            # 真实环境中 PackageFullName 与安装目录一一对应，复用目录时也复用全名，资源缓存才有意义
+            d = install_dirs[i % len(install_dirs)]
+            full, loc = d.name, str(d)
+        family = f"Bench.App{i}_{PUBLISHER_ID}"
+        rec = {
+            # 与 PS_ENUM_SCRIPT 一致：Name 为包标识名，显示名由 Python 侧读取清单
+            "Name": f"Bench.App{i}",
+            "PackageFullName": full,
+            "PackageFamilyName": family,
+            "Publisher": PUBLISHER,
+            "Version": f"1.0.{i}.0",
+            "Architecture": rng.choice((0, 5, 9, 11)),
+            "InstallLocation": loc,
+        }
+        lines.append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    if variant == "noisy":
+        noisy = ["\ufeff" + lines[0]] if lines else []
+        for i, line in enumerate(lines[1:], 1):
+            r = rng.random()
+            if r < 0.05:
+                noisy.append("\x1b[33;1mWARNING: The package manifest could not be read.\x1b[0m\n")
+            elif r < 0.08:
+                noisy.append("Get-AppxPackageManifest : The system cannot find the path specified.\n")
+                noisy.append("    + CategoryInfo          : ObjectNotFound: (:) [], ItemNotFoundException\n")
+            elif r < 0.10:
+                noisy.append("\n")
+            elif r < 0.12:
+                # 被其他输出打断的半行
+                noisy.append(line[: len(line) // 2] + "\n")
+                continue
+            noisy.append(line.replace("\n", "\r\n") if i % 2 else line)
+        lines = noisy
+    elif variant == "truncated":
+        # 进程被看门狗结束：在最后 30% 的某个位置截断，末行不完整
+        cut = max(1, int(len(lines) * 0.7))
+        lines = lines[:cut]
+        lines[-1] = lines[-1][: rng.randint(1, len(lines[-1]) - 2)]
+    return lines
+
+
+# --------------------------------------------------
+# 计时
+# --------------------------------------------------
+class Report:
+    def __init__(self):
+        self.rows = []
+
+    def measure(self, stage: str, case: str, fn, units: float = 0, unit: str = "", nbytes: int = 0):
+        """运行 fn 并记录耗时、吞吐与 tracemalloc 峰值；fn 的返回值作为备注。"""
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        note = fn()
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        row = {
+            "stage": stage, "case": case, "seconds": round(elapsed, 4),
+            "units": units, "unit": unit,
+            "units_per_s": round(units / elapsed, 1) if units and elapsed > 0 else None,
+            "mb_per_s": round(nbytes / 1048576 / elapsed, 1) if nbytes and elapsed > 0 else None,
+            "py_peak_mb": round(peak / 1048576, 2),
+            "note": "" if note is None else str(note),
+        }
+        self.rows.append(row)
+        print(self._fmt(row), flush=True)
+        return row
+
+    HEADER = f"{'stage':<10} {'case':<28} {'seconds':>9} {'rate':>16} {'MB/s':>8} {'peak MB':>8}  note"
+
+    @staticmethod
+    def _fmt(r) -> str:
+        rate = f"{r['units_per_s']:.1f} {r['unit']}/s" if r["units_per_s"] else ""
+        mbs = f"{r['mb_per_s']:.1f}" if r["mb_per_s"] else ""
+        return (f"{r['stage']:<10} {r['case']:<28} {r['seconds']:>9.3f} {rate:>16} {mbs:>8} "
+                f"{r['py_peak_mb']:>8.2f}  {r['note']}")
+
+
+def _tree_bytes(path: pathlib.Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for fn in files:
+            total += os.path.getsize(os.path.join(root, fn))
+    return total
+
+
+# --------------------------------------------------
+# 各阶段
+# --------------------------------------------------
+def bench_enum(rep: Report, core, sizes, small_dirs, rng, capture=None):
+    quiet = lambda *a: None
+    for n in sizes:
+        for variant in ("clean", "noisy", "truncated"):
+            lines = make_ps_lines(n, small_dirs, rng, variant)
+            nbytes = sum(len(ln.encode("utf-8")) for ln in lines)
+            rep.measure("enum", f"parse n={n} {variant}",
+                        lambda: f"{sum(1 for _ in core.parse_package_lines(lines, log=quiet))} records",
+                        units=len(lines), unit="lines", nbytes=nbytes)
+        lines = make_ps_lines(n, small_dirs, rng)
+        recs = list(core.parse_package_lines(lines, log=quiet))
+
+        def to_items():
+            for r in recs:
+                core.item_from_record(r)
+
+        rep.measure("enum", f"items n={n}", to_items, units=len(recs), unit="pkgs")
+    # 清单扫描后端：并发解析包根目录下的每个清单（冷：清空清单缓存）
+    root = small_dirs[0].parent
+    core.appx_manifest._memo.clear()
+    rep.measure("enum", f"scan-root x{len(small_dirs)}",
+                lambda: f"{len(core.scan_package_root(root))} pkgs", units=len(small_dirs), unit="pkgs")
+    if capture:
+        with open(capture, "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.readlines()
+        nbytes = sum(len(ln.encode("utf-8")) for ln in lines)
+        rep.measure("enum", f"parse {pathlib.Path(capture).name}"[:28],
+                    lambda: f"{sum(1 for _ in core.parse_package_lines(lines, log=quiet))} records",
+                    units=len(lines), unit="lines", nbytes=nbytes)
+
+
+def bench_resolve(rep: Report, core, dirs, pri_keys: int = 0):
+    resw_bytes = sum(_tree_bytes(d / "Strings") for d in dirs)
+
+    def run():
+        names = [core.resolve_ms_resource("ms-resource:AppDisplayName", str(d), d.name) for d in dirs]
+        return f"{names[0]!r}"
+
+    # 冷：清空内存与磁盘缓存，重新解析全部 .resw
+    core._res_index_memo.clear()
+    shutil.rmtree(core.RES_INDEX_DIR, ignore_errors=True)
+    rep.measure("resolve", f"cold x{len(dirs)}", run, units=len(dirs), unit="pkgs", nbytes=resw_bytes)
+    # 磁盘缓存命中（新进程的情形）
+    core._res_index_memo.clear()
+    rep.measure("resolve", f"disk-cache x{len(dirs)}", run, units=len(dirs), unit="pkgs")
+    # 内存命中
+    rep.measure("resolve", f"memo x{len(dirs)}", run, units=len(dirs), unit="pkgs")
+
+    # 并发阶段（冷）：与枚举分离，每个包一个预算
+    def parallel():
+        items = [core.UwpItem(name=d.name, pkg_fullname=d.name, version="", arch="", install_path=str(d),
+                              raw_name="ms-resource:AppDisplayName") for d in dirs]
+        return f"{core.resolve_names(items)} renamed"
+
+    core._res_index_memo.clear()
+    shutil.rmtree(core.RES_INDEX_DIR, ignore_errors=True)
+    rep.measure("resolve", f"parallel x{len(dirs)}", parallel, units=len(dirs), unit="pkgs",
+                nbytes=resw_bytes)
+
+    # resources.pri：同样的包只带 resources.pri（不带 .resw），每次查找只读取一个条目
+    pri_dirs = []
+    for i, d in enumerate(dirs):
+        pd = d.parent.parent / "pri" / d.name
+        pd.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(d / "AppxManifest.xml", pd / "AppxManifest.xml")
+        strings = {"AppDisplayName": {lang: f"Bench App {i} ({lang})" for lang in LANGS}}
+        strings.update((f"Key{k}", {"en-US": f"value {k}"}) for k in range(pri_keys))
+        make_pri(pd / "resources.pri", strings)
+        pri_dirs.append(pd)
+    pri_mb = sum((d / "resources.pri").stat().st_size for d in pri_dirs) / 1048576
+
+    def run_pri():
+        names = [core.resolve_ms_resource("ms-resource:AppDisplayName", str(d), d.name) for d in pri_dirs]
+        return f"{names[0]!r}, {pri_mb:.1f} MB of .pri"
+
+    rep.measure("resolve", f"pri x{len(pri_dirs)}", run_pri, units=len(pri_dirs), unit="pkgs")
+
+
+def bench_manifest(rep: Report, core, dirs, repeat: int):
+    targets = [d for d in dirs for _ in range(repeat)]
+    quiet = lambda *a: None
+    nbytes = sum((d / "AppxManifest.xml").stat().st_size for d in dirs)
+
+    def run():
+        ok = sum(core.extract_publisher_from_manifest(d, quiet) == PUBLISHER for d in targets)
+        return f"{ok}/{len(targets)} matched"
+
+    # 冷：每个清单真正解析一次；之后同一路径命中 (路径, mtime) 缓存
+    core.appx_manifest._memo.clear()
+    rep.measure("manifest", f"parse x{len(dirs)}",
+                lambda: f"{sum(core.load_manifest(d).publisher == PUBLISHER for d in dirs)}/{len(dirs)} matched",
+                units=len(dirs), unit="files", nbytes=nbytes)
+    rep.measure("manifest", f"publisher x{len(targets)}", run, units=len(targets), unit="calls")
+
+
+def bench_pack(rep: Report, appx_writer, big_dir: pathlib.Path, out_dir: pathlib.Path, workers: int):
+    nbytes = _tree_bytes(big_dir)
+    nfiles = sum(len(f) for _, _, f in os.walk(big_dir))
+    out = out_dir / "bench.appx"
+
+    def run():
+        st = appx_writer.pack_directory(big_dir, out, workers=workers)
+        return f"{st.files} files, {st.bytes_out / max(1, st.bytes_in):.2f} ratio"
+
+    rep.measure("pack", f"builtin w={workers or os.cpu_count()}", run,
+                units=nfiles, unit="files", nbytes=nbytes)
+
+    def verify():
+        res = appx_reader.verify_package(out, big_dir, workers=workers)
+        return f"{res.blocks} blocks, {'ok' if res.ok else res.errors[0]}"
+
+    rep.measure("pack", f"verify w={workers or os.cpu_count()}", verify,
+                units=nfiles, unit="files", nbytes=nbytes)
+
+    def inspect():
+        # 只读中央目录与清单，再随机取出一个文件
+        with appx_reader.PackageArchive(out) as pkg:
+            info = pkg.manifest
+            pkg.read(pkg.files[len(pkg.files) // 2])
+            return f"{len(pkg.entries)} entries, {info.name if info else 'no manifest'}"
+
+    rep.measure("pack", "inspect", inspect, units=nfiles, unit="files")
+    out.unlink(missing_ok=True)
+
+
+def bench_pipeline(rep: Report, core, toolrun, dirs, out_dir: pathlib.Path, cfg_kwargs):
+    toolrun.set_backend(toolrun.FakeBackend(real_output=False))
+    items = [core.UwpItem(d.name, d.name, "1.0", "X64", str(d)) for d in dirs]
+    nbytes = sum(_tree_bytes(d) for d in dirs)
+
+    def run():
+        cfg = core.BatchConfig(packer=core.PACKER_MAKEAPPX, cert_backend=core.CERT_BACKEND_MAKECERT,
+                               **cfg_kwargs)
+        res = core.BatchScheduler(items, out_dir, cfg, on_log=lambda m: None).run()
+        return f"{sum(r.status == core.JOB_DONE for r in res)}/{len(res)} done"
+
+    rep.measure("pipeline", f"fake tools x{len(items)}", run, units=len(items), unit="pkgs", nbytes=nbytes)
+
+
+# --------------------------------------------------
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="bench", description=__doc__.splitlines()[0])
+    p.add_argument("--stages", default=",".join(STAGES), help="comma separated: " + ",".join(STAGES))
+    p.add_argument("--sizes", default="50,500,5000", help="package counts for synthetic PowerShell output")
+    p.add_argument("--packages", type=int, default=20, help="synthetic install trees for resolve/manifest/pipeline")
+    p.add_argument("--tiny", type=int, default=2000, help="tiny asset files in the big tree")
+    p.add_argument("--resw", type=int, default=300, help=".resw files per tree")
+    p.add_argument("--resw-keys", type=int, default=40, help="entries per .resw")
+    p.add_argument("--blobs", type=int, default=2, help="large files in the big tree")
+    p.add_argument("--blob-mb", type=int, default=64, help="size of each large file (MiB)")
+    p.add_argument("--workers", type=int, default=None, help="compression threads for the pack stage")
+    p.add_argument("--ps-capture", metavar="FILE", help="also parse a captured Get-AppxPackage NDJSON output")
+    p.add_argument("--workdir", metavar="DIR", help="where to generate data (default: a temp dir)")
+    p.add_argument("--keep", action="store_true", help="keep generated data")
+    p.add_argument("--json", metavar="FILE", help="write results as JSON")
+    p.add_argument("--seed", type=int, default=1234)
+    args = p.parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        p.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    work = pathlib.Path(args.workdir or tempfile.mkdtemp(prefix="uwp-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    # 缓存写到工作目录，不影响用户自己的缓存
+    os.environ["UWP_CACHE_DIR"] = str(work / "cache")
+    import appx_writer, toolrun, uwp_core as core
+
+    rng = random.Random(args.seed)
+    rep = Report()
+    try:
+        t0 = time.perf_counter()
+        trees = work / "trees"
+        small_dirs = [make_package_tree(trees, i, rng, tiny=20, resw=args.resw, resw_keys=args.resw_keys,
+                                        blobs=0, blob_mb=0) for i in range(args.packages)]
+        big_dir = None
+        if "pack" in stages:
+            big_dir = make_package_tree(work / "big", 9999, rng, tiny=args.tiny, resw=args.resw,
+                                        resw_keys=args.resw_keys, blobs=args.blobs, blob_mb=args.blob_mb)
+        print(f"# data generated in {time.perf_counter() - t0:.1f}s under {work}")
+        print(f"# python {sys.version.split()[0]}, {os.cpu_count()} cpus")
+        print(Report.HEADER)
+
+        if "enum" in stages:
+            sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+            bench_enum(rep, core, sizes, small_dirs, rng, args.ps_capture)
+        if "resolve" in stages:
+            bench_resolve(rep, core, small_dirs, pri_keys=args.resw * args.resw_keys)
+        if "manifest" in stages:
+            bench_manifest(rep, core, small_dirs, repeat=10)
+        if "pack" in stages:
+            bench_pack(rep, appx_writer, big_dir, work / "out", args.workers)
+        if "pipeline" in stages:
+            bench_pipeline(rep, core, toolrun, small_dirs, work / "out",
+                           {"workers": args.workers or core.BatchConfig().workers})
+
+        try:
+            import resource
+            # Linux 上单位为 KiB
+            print(f"# process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+        except ImportError:
+            pass
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"python": sys.version.split()[0], "cpus": os.cpu_count(),
+                           "args": vars(args), "results": rep.rows}, f, indent=2)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
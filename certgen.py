@@ -0,0 +1,137 @@
+"""进程内生成自签名代码签名证书，替代 makecert.exe + pvk2pfx.exe。
+
+依赖可选包 cryptography（pip install cryptography）；未安装时 available() 返回 False，
+调用方应回退到 makecert 流程。生成的证书与原 makecert 参数一致：
+SHA-256 签名、EKU 1.3.6.1.5.5.7.3.3（代码签名）、终端实体（cA=false）、
+有效期自 2000-01-01 起。直接写出 DER 编码的 .cer 与无密码的 PKCS#12 .pfx。
+"""
+import datetime, pathlib
+
+KEY_RSA2048 = "rsa2048"
+KEY_RSA3072 = "rsa3072"
+KEY_RSA4096 = "rsa4096"
+# 只提供 RSA：makecert 流程生成的也是 RSA，ECDSA 发布者证书能否用于 AppX 签名与旁加载安装未经验证
+KEY_TYPES = (KEY_RSA2048, KEY_RSA3072, KEY_RSA4096)
+
+CODE_SIGNING_EKU = "1.3.6.1.5.5.7.3.3"
+NOT_BEFORE = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+NOT_AFTER = datetime.datetime(2039, 12, 31, 23, 59, 59, tzinfo=datetime.timezone.utc)
+
+
+def available() -> bool:
+    try:
+        import cryptography  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def split_dn(dn: str):
+    """把 Windows 风格的 X.500 字符串（"CN=A, O=\"B, Inc.\", C=US"）拆成 [(键, 值)]，保持原顺序。"""
+    parts, buf, quoted = [], [], False
+    i = 0
+    while i < len(dn):
+        ch = dn[i]
+        if ch == '"':
+            # 引号内的 "" 表示一个字面引号
+            if quoted and i + 1 < len(dn) and dn[i + 1] == '"':
+                buf.append('"')
+                i += 2
+                continue
+            quoted = not quoted
+        elif ch in ",;" and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+        i += 1
+    parts.append("".join(buf))
+    rdns = []
+    for part in parts:
+        if "=" not in part:
+            continue
+        key, val = part.split("=", 1)
+        rdns.append((key.strip(), val.strip()))
+    return rdns
+
+
+def _name_from_publisher(publisher: str):
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    oids = {
+        "CN": NameOID.COMMON_NAME,
+        "O": NameOID.ORGANIZATION_NAME,
+        "OU": NameOID.ORGANIZATIONAL_UNIT_NAME,
+        "L": NameOID.LOCALITY_NAME,
+        "S": NameOID.STATE_OR_PROVINCE_NAME,
+        "ST": NameOID.STATE_OR_PROVINCE_NAME,
+        "C": NameOID.COUNTRY_NAME,
+        "E": NameOID.EMAIL_ADDRESS,
+        "STREET": NameOID.STREET_ADDRESS,
+        "DC": NameOID.DOMAIN_COMPONENT,
+        "SERIALNUMBER": NameOID.SERIAL_NUMBER,
+        "T": NameOID.TITLE,
+        "TITLE": NameOID.TITLE,
+        "G": NameOID.GIVEN_NAME,
+        "GIVENNAME": NameOID.GIVEN_NAME,
+        "SN": NameOID.SURNAME,
+        "POSTALCODE": NameOID.POSTAL_CODE,
+    }
+    attrs = []
+    for key, val in split_dn(publisher):
+        ukey = key.upper()
+        if ukey.startswith("OID."):
+            oid = x509.ObjectIdentifier(key[4:])
+        elif ukey in oids:
+            oid = oids[ukey]
+        else:
+            raise ValueError(f"unsupported attribute {key!r} in {publisher!r}")
+        # 按原顺序编码为一个 RDN 一个属性，与 makecert/CertStrToName 的结果一致，
+        # 否则签名时证书主题与清单中的 Publisher 不匹配
+        attrs.append(x509.RelativeDistinguishedName([x509.NameAttribute(oid, val)]))
+    if not attrs:
+        raise ValueError(f"empty publisher subject: {publisher!r}")
+    return x509.Name(attrs)
+
+
+def _new_key(key_type: str):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    bits = {KEY_RSA2048: 2048, KEY_RSA3072: 3072, KEY_RSA4096: 4096}.get(key_type)
+    if bits is None:
+        raise ValueError(f"unknown key type {key_type!r}")
+    return rsa.generate_private_key(public_exponent=65537, key_size=bits)
+
+
+def generate(publisher: str, cer_path, pfx_path, key_type: str = KEY_RSA2048):
+    """生成自签名代码签名证书，写出 cer_path（DER）与 pfx_path（PKCS#12，无密码）。"""
+    from cryptography import x509
+    from cryptography.x509.oid import ObjectIdentifier
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.serialization import pkcs12
+
+    key = _new_key(key_type)
+    name = _name_from_publisher(publisher)
+    pub = key.public_key()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(pub)
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(NOT_BEFORE)
+        .not_valid_after(NOT_AFTER)
+        .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+        .add_extension(x509.KeyUsage(digital_signature=True, content_commitment=False,
+                                     key_encipherment=False, data_encipherment=False,
+                                     key_agreement=False, key_cert_sign=False, crl_sign=False,
+                                     encipher_only=False, decipher_only=False), critical=True)
+        .add_extension(x509.ExtendedKeyUsage([ObjectIdentifier(CODE_SIGNING_EKU)]), critical=False)
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(pub), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cer_path, pfx_path = pathlib.Path(cer_path), pathlib.Path(pfx_path)
+    cer_path.write_bytes(cert.public_bytes(serialization.Encoding.DER))
+    pfx_path.write_bytes(pkcs12.serialize_key_and_certificates(
+        name=None, key=key, cert=cert, cas=None,
+        encryption_algorithm=serialization.NoEncryption()))
+    return cert
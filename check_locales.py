@@ -4,8 +4,6 @@ import json
 BASE_DIR   = Path(__file__).with_suffix('').parent
 TRANS_DIR  = BASE_DIR / "locales"
 
-TRANS_DIR.mkdir(exist_ok=True)
-
 # 所有会被代码引用的 key，一次性写全
 DEFAULT_ZH = {
     "window_title": "UWP 安装包提取工具",
@@ -60,7 +58,71 @@ DEFAULT_ZH = {
     "complete_msg": "已提取/打包完成",
     "fail_title": "失败",
     "fail_msg": "查看日志了解详情",
-    "raw_json_preview": "Raw JSON candidate preview:"
+    "raw_json_preview": "Raw JSON candidate preview:",
+    "table_header_status": "状态",
+    "job_status_queued": "排队中",
+    "job_status_packing": "打包中",
+    "job_status_signing": "签名中",
+    "job_status_done": "完成",
+    "job_status_failed": "失败",
+    "job_status_cancelled": "已取消",
+    "cancel_button": "取消",
+    "workers_label": "并发任务数",
+    "pack_limit_label": "同时打包数（磁盘密集）",
+    "sign_limit_label": "同时签名数（CPU 密集）",
+    "batch_done_msg": "成功 {ok} 个，失败 {failed} 个",
+    "packer_label": "打包方式",
+    "packer_makeappx": "makeappx.exe（Windows SDK）",
+    "packer_builtin": "内置打包器（纯 Python，并行压缩）",
+    "pack_log_builtin_stats": ">>> 已打包 {files} 个文件，{mb:.1f} MB，用时 {sec:.1f} 秒（{rate:.1f} MB/s）",
+    "inventory_save_error": "无法保存包清单快照：{err}",
+    "cli_no_selection": "请指定 --all、--match 或 --pkg 选择要提取的应用",
+    "pack_log_cert_cached": ">>> 复用已有证书：{publisher}",
+    "pack_log_gen_cert_builtin": ">>> 正在生成自签证书（内置，{kind}）...",
+    "cert_key_label": "证书密钥类型",
+    "cert_key_rsa2048": "RSA 2048（与 makecert 相同）",
+    "cert_key_rsa3072": "RSA 3072",
+    "cert_key_rsa4096": "RSA 4096",
+    "pack_log_signing_batch": "正在用一次 signtool 调用签名 {count} 个包...",
+    "tool_timeout": "{tool} 超过 {sec} 秒未完成，已终止",
+    "job_status_packing_progress": "打包中 {pct:.0f}% · {rate:.1f} MB/s",
+    "trace_saved": "阶段耗时已导出：{path}",
+    "trace_save_error": "导出阶段耗时失败：{err}",
+    "prescan_summary": "预扫描完成：{count} 个包，共 {size}，预计输出 {out}，预计打包耗时 {eta}",
+    "space_insufficient": "{path} 所在磁盘空间不足：预计需要 {need}，可用 {free}，未开始任何任务",
+    "table_header_size": "大小",
+    "table_header_eta": "预计耗时",
+    "job_status_skipped": "已是最新",
+    "catalog_error": "备份清单更新失败：{err}",
+    "catalog_skip_summary": "增量备份：{skipped} 个包已是最新，{queued} 个包需要导出",
+    "changed_only_checkbox": "只备份新增或有变化的包",
+    "changed_only_tooltip": "依据输出目录中的 backup_catalog.json，跳过相同版本且内容未变化的包",
+    "deps_added": "已自动加入 {count} 个依赖框架：{names}",
+    "dep_missing": "{name} 依赖的 {dep}（≥ {version}）未在本机安装，无法一并导出",
+    "dep_failed": "依赖包 {name} 打包失败，已跳过",
+    "include_deps_checkbox": "自动导出依赖的框架包",
+    "include_deps_tooltip": "按 AppxManifest.xml 中的 PackageDependency 把 VCLibs、.NET Native、UI.Xaml 等已安装框架一并导出（每个框架只导出一次），否则导出的应用在其他电脑上可能无法安装",
+    "journal_resume": ">>> 从上次中断处继续（{stage}）",
+    "journal_stage_packed": "已打包",
+    "journal_stage_cert": "证书已就绪",
+    "journal_stage_signed": "已签名",
+    "journal_error": "无法写入任务日志（下次将无法续跑）：{err}",
+    "scan_root_error": "无法读取包目录 {path}：{err}",
+    "job_status_verifying": "校验中",
+    "verify_checkbox": "打包后校验生成的包",
+    "verify_tooltip": "替换为最终文件前把每个包顺序读一遍：核对 ZIP 中央目录、AppxBlockMap.xml 中每个 64 KiB 块的哈希，以及与已安装应用目录的文件清单",
+    "verify_log_ok": ">>> 校验通过：{files} 个文件 / {blocks} 个块（{mb:.1f} MB，{sec:.1f} 秒，{rate:.1f} MB/s）",
+    "verify_log_error": "校验：{err}",
+    "verify_failed": "包校验失败（{count} 处问题）：{err}",
+    "inspect_open_error": "无法读取 {path}：{err}",
+    "inspect_no_entry": "{path} 中没有 {name}",
+    "inspect_extracted": "{name} -> {dest}",
+    "inspect_summary": "{files} 个文件，解压后 {unpacked}，包大小 {size}，{signed}",
+    "inspect_signed": "已签名",
+    "inspect_unsigned": "未签名",
+    "inspect_no_archives": "{path} 中没有 .appx/.msix 包",
+    "inspect_extract_needs_file": "--extract 需要指定单个包文件，而不是目录",
+    "ps_enum_timeout": "Get-AppxPackage 在 {sec} 秒后超时，只读到 {count} 个包；本次结果不写入清单快照"
 }
 
 DEFAULT_EN = {
@@ -116,7 +178,71 @@ DEFAULT_EN = {
     "complete_msg": "Extraction/packing complete",
     "fail_title": "Failed",
     "fail_msg": "See logs for details",
-    "raw_json_preview": "Raw JSON candidate preview:"
+    "raw_json_preview": "Raw JSON candidate preview:",
+    "table_header_status": "Status",
+    "job_status_queued": "Queued",
+    "job_status_packing": "Packing",
+    "job_status_signing": "Signing",
+    "job_status_done": "Done",
+    "job_status_failed": "Failed",
+    "job_status_cancelled": "Cancelled",
+    "cancel_button": "Cancel",
+    "workers_label": "Parallel jobs",
+    "pack_limit_label": "Concurrent packs (disk-bound)",
+    "sign_limit_label": "Concurrent signing (CPU-bound)",
+    "batch_done_msg": "{ok} succeeded, {failed} failed",
+    "packer_label": "Packer",
+    "packer_makeappx": "makeappx.exe (Windows SDK)",
+    "packer_builtin": "Built-in packer (pure Python, parallel compression)",
+    "pack_log_builtin_stats": ">>> Packed {files} files, {mb:.1f} MB in {sec:.1f}s ({rate:.1f} MB/s)",
+    "inventory_save_error": "Unable to save package inventory snapshot: {err}",
+    "cli_no_selection": "Specify --all, --match or --pkg to choose the apps to extract",
+    "pack_log_cert_cached": ">>> Reusing cached certificate for {publisher}",
+    "pack_log_gen_cert_builtin": ">>> Generating self-signed certificate (built-in, {kind}) ...",
+    "cert_key_label": "Certificate key type",
+    "cert_key_rsa2048": "RSA 2048 (same as makecert)",
+    "cert_key_rsa3072": "RSA 3072",
+    "cert_key_rsa4096": "RSA 4096",
+    "pack_log_signing_batch": "Signing {count} packages with one signtool call...",
+    "tool_timeout": "{tool} did not finish within {sec} s and was terminated",
+    "job_status_packing_progress": "Packing {pct:.0f}% · {rate:.1f} MB/s",
+    "trace_saved": "Stage timings exported to {path}",
+    "trace_save_error": "Failed to export stage timings: {err}",
+    "prescan_summary": "Pre-scan: {count} packages, {size} in total, about {out} of output, estimated packing time {eta}",
+    "space_insufficient": "Not enough free space for {path}: about {need} needed, {free} available; no job was started",
+    "table_header_size": "Size",
+    "table_header_eta": "ETA",
+    "job_status_skipped": "Up to date",
+    "catalog_error": "Failed to update the backup catalog: {err}",
+    "catalog_skip_summary": "Incremental backup: {skipped} packages up to date, {queued} to extract",
+    "changed_only_checkbox": "Back up new or changed packages only",
+    "changed_only_tooltip": "Uses backup_catalog.json in the output folder to skip packages whose version and contents are unchanged",
+    "deps_added": "Added {count} framework dependencies: {names}",
+    "dep_missing": "{name} depends on {dep} (>= {version}), which is not installed; it cannot be exported with it",
+    "dep_failed": "Dependency {name} failed to pack; skipped",
+    "include_deps_checkbox": "Also export framework dependencies",
+    "include_deps_tooltip": "Export the installed frameworks listed as PackageDependency in AppxManifest.xml (VCLibs, .NET Native, UI.Xaml, ...) once each, so the apps can be installed on another PC",
+    "journal_resume": ">>> Resuming from the previous run ({stage})",
+    "journal_stage_packed": "packed",
+    "journal_stage_cert": "certificate ready",
+    "journal_stage_signed": "signed",
+    "journal_error": "Could not write the job journal (the next run cannot resume): {err}",
+    "scan_root_error": "Cannot read the package folder {path}: {err}",
+    "job_status_verifying": "Verifying",
+    "verify_checkbox": "Verify packages after packing",
+    "verify_tooltip": "Read each package once before it replaces the final file: check the ZIP central directory, every 64 KiB block hash in AppxBlockMap.xml and the file list against the installed app folder",
+    "verify_log_ok": ">>> Verified {files} files / {blocks} blocks ({mb:.1f} MB in {sec:.1f}s, {rate:.1f} MB/s)",
+    "verify_log_error": "Verification: {err}",
+    "verify_failed": "Package verification failed ({count} problem(s)): {err}",
+    "inspect_open_error": "Cannot read {path}: {err}",
+    "inspect_no_entry": "{name} is not in {path}",
+    "inspect_extracted": "{name} -> {dest}",
+    "inspect_summary": "{files} files, {unpacked} unpacked, {size} packed, {signed}",
+    "inspect_signed": "signed",
+    "inspect_unsigned": "unsigned",
+    "inspect_no_archives": "No .appx/.msix packages in {path}",
+    "inspect_extract_needs_file": "--extract needs a package file, not a folder",
+    "ps_enum_timeout": "Get-AppxPackage timed out after {sec}s with {count} packages read; this result is not saved to the inventory snapshot"
 }
 
 def _write_json(path: Path, data: dict):
@@ -127,8 +253,10 @@ def _write_json(path: Path, data: dict):
 
 # ---------- 统一入口 ----------
 def init_resources():
+    TRANS_DIR.mkdir(exist_ok=True)
     _write_json(TRANS_DIR / "zh_CN.json", DEFAULT_ZH)
     _write_json(TRANS_DIR / "en_US.json", DEFAULT_EN)
 
 
-init_resources()
\ No newline at end of file
+if __name__ == "__main__":
+    init_resources()
@@ -1,46 +1,30 @@
-import sys, os, shutil, subprocess, json, pathlib, secrets
+import sys, json, pathlib
+from dataclasses import replace
 from datetime import datetime
-from dataclasses import dataclass
 from typing import List
-import locale
 import check_locales
-
-# 本地化支持与管理
-LOCALES_DIR = pathlib.Path(__file__).parent / "locales"
-
-def load_texts(lang: str = None) -> dict:
-    if not lang:
-        env = os.environ.get("UWP_LANG", "").strip()
-        if env:
-            lang = env
-        else:
-            sys_lang = (locale.getdefaultlocale()[0] or "").lower()
-            lang = "zh_CN" if sys_lang.startswith("zh") else "en_US"
-    path = LOCALES_DIR / f"{lang}.json"
-    if not path.exists():
-        path = LOCALES_DIR / "en_US.json"
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-# 全局文本字典与翻译函数
-TEXTS = load_texts()
-
-def t(key: str, **kwargs):
-    s = TEXTS.get(key, key)
-    try:
-        return s.format(**kwargs)
-    except Exception:
-        return s
-
-from PyQt6.QtCore import Qt, QObject, pyqtSignal, QThread, QRunnable, QThreadPool
+import certgen
+import tracing
+import uwp_core
+
+# 确保 locales 目录与默认语言文件存在（GUI 启动时才需要）
+check_locales.init_resources()
+
+from uwp_core import (t, texts, LOCALES_DIR, UwpItem, BatchConfig, BatchScheduler,
+                      SearchIndex, load_inventory, refresh_inventory, default_packer,
+                      format_bytes, format_duration, version_key,
+                      PACKER_MAKEAPPX, PACKER_BUILTIN,
+                      JOB_QUEUED, JOB_PACKING, JOB_DONE, JOB_SKIPPED, JOB_FAILED, JOB_CANCELLED)
+
+from PyQt6.QtCore import (Qt, QObject, pyqtSignal, QThread, QRunnable, QThreadPool,
+                          QAbstractTableModel, QModelIndex, QEvent, QRect,
+                          QSortFilterProxyModel, QTimer)
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLabel, QFileDialog,
-                             QHeaderView, QComboBox)  # 新增 QComboBox
+                             QTableView, QAbstractItemView, QLabel, QFileDialog,
+                             QHeaderView, QComboBox, QStyledItemDelegate, QStyle,
+                             QStyleOptionButton, QStyleOptionViewItem)
 from qfluentwidgets import (setTheme, Theme, FluentWindow, NavigationItemPosition,
-                            PushButton, LineEdit, ProgressBar, CheckBox as FWCheckBox,
+                            PushButton, LineEdit, ProgressBar, CheckBox as FWCheckBox, SpinBox,
                             InfoBar, InfoBarPosition, StateToolTip,FluentIcon as FIcon)
 
 # Localization 管理对象，发出语言变更信号供界面更新
@@ -53,16 +37,10 @@ class Localization(QObject):
         self._load_default()
 
     def _load_default(self):
-        # init from existing TEXTS if possible
-        # if LOCALES_DIR contains files, pick env or system default
-        lang = os.environ.get("UWP_LANG", None)
-        if not lang:
-            sys_lang = (locale.getdefaultlocale()[0] or "").lower()
-            lang = "zh_CN" if sys_lang.startswith("zh") else "en_US"
-        self.set_lang(lang, emit=False)
+        # 环境变量 UWP_LANG 优先，否则按系统语言
+        self.set_lang(uwp_core.default_language(), emit=False)
 
     def set_lang(self, lang: str, emit: bool = True):
-        global TEXTS
         if not lang:
             return
         # normalize e.g. zh_CN.json name or zh_CN
@@ -74,7 +52,7 @@ class Localization(QObject):
             # fallback to en_US
             key = "en_US"
             path = LOCALES_DIR / "en_US.json"
-        TEXTS = load_texts(key)
+        uwp_core.set_language(key)
         self._lang = key
         if emit:
             self.languageChanged.emit()
@@ -116,463 +94,75 @@ class Localization(QObject):
 
 LOC = Localization()
 
-# --------------------------------------------------
-# 数据模型
-# --------------------------------------------------
-@dataclass
-class UwpItem:
-    name: str
-    pkg_fullname: str
-    version: str
-    arch: str
-    install_path: str
-    is_selected: bool = False
-
-# 解析 ms-resource 引用到友好名称（从 Strings/*.resw 等资源文件中查找）
-def resolve_ms_resource(raw_name: str, install_path: str) -> str:
-    try:
-        if not raw_name:
-            return raw_name
-        rn = str(raw_name).strip()
-        if "ms-resource" not in rn.lower():
-            return rn
-        # 提取资源键（取最后一个段）
-        try:
-            after = rn.split(":", 1)[1]
-        except Exception:
-            after = rn
-        key = after.split("/")[-1].strip()
-        if not key:
-            return rn
-        base = pathlib.Path(install_path) if install_path else None
-        # 首先在 Strings 目录查找 .resw
-        candidates = []
-        if base and base.exists():
-            strings_dir = base / "Strings"
-            if strings_dir.exists():
-                for p in strings_dir.rglob("*.resw"):
-                    candidates.append(p)
-            # 也尝试在 install_path 下任意 .resw 文件（部分应用结构不同）
-            for p in base.rglob("*.resw"):
-                if p not in candidates:
-                    candidates.append(p)
-        # 解析 .resw（XML）查找 key
-        import xml.etree.ElementTree as ET
-        for resw in candidates:
-            try:
-                tree = ET.parse(resw)
-                root = tree.getroot()
-                # <data name="Key"><value>Text</value></data>
-                for data in root.findall(".//data"):
-                    if data.get("name") == key:
-                        val = data.find("value")
-                        if val is not None and (val.text and val.text.strip()):
-                            return val.text.strip()
-            except Exception:
-                continue
-        # 备用：尝试在 AppxManifest.xml 中查找 Properties/DisplayName（有时包含 localized string）
-        if base:
-            mf = base / "AppxManifest.xml"
-            if mf.exists():
-                try:
-                    tree = ET.parse(mf)
-                    root = tree.getroot()
-                    # 查找 Identity / Properties / DisplayName
-                    dn = root.find(".//{http://schemas.microsoft.com/appx/2010/manifest}DisplayName")
-                    if dn is None:
-                        # 更宽松查找
-                        dn = root.find(".//DisplayName")
-                    if dn is not None and dn.text and dn.text.strip() and "ms-resource" not in dn.text.lower():
-                        return dn.text.strip()
-                except Exception:
-                    pass
-        # 回退到安装目录名或原始值
-        if base:
-            try:
-                return base.name or rn
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return raw_name
-
 # --------------------------------------------------
 # PowerShell 枚举线程
 # --------------------------------------------------
 class PsEnumThread(QThread):
+    batch = pyqtSignal(list)
+    nameResolved = pyqtSignal(str, str)   # PackageFullName, 解析后的显示名
     finished = pyqtSignal(list)
 
-    def run(self):
-        cmd = [
-            "powershell", "-NoLogo", "-NonInteractive", "-OutputFormat", "Text",
-            "-Command", r"""
-            [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
-            $items = @(
-                Get-AppxPackage | ForEach-Object {
-                    $pkg = $_
-                    if ([string]::IsNullOrEmpty($pkg.InstallLocation)) { return }
-                    try {
-                        $manifest = Get-AppxPackageManifest -Package $pkg.PackageFullName -ErrorAction SilentlyContinue
-                        $dispName = if ($manifest -and $manifest.Package.Properties.DisplayName) {
-                                          $manifest.Package.Properties.DisplayName
-                                    } else { $pkg.Name }
-                    } catch {
-                        $dispName = $pkg.Name
-                    }
-                    [PSCustomObject]@{
-                        Name        = $dispName
-                        PackageFullName = $pkg.PackageFullName
-                        PackageFamilyName = $pkg.PackageFamilyName
-                        Version     = $pkg.Version
-                        Architecture= $pkg.Architecture
-                        InstallLocation = $pkg.InstallLocation
-                    }
-                }
-            )
-            $items | ConvertTo-Json -Depth 4
-            """
-        ]
-        try:
-            # 延长超时至 60 秒以减少中途超时导致空输出的概率
-            completed = subprocess.run(cmd, capture_output=True, text=True,
-                                       encoding='utf-8', errors='ignore', timeout=60)
-        except subprocess.TimeoutExpired:
-            self.finished.emit([])
-            return
-        if completed.returncode != 0:
-            print(t("ps_stderr_prefix"), completed.stderr[:1000])
-        raw = completed.stdout or completed.stderr or ""
-        raw = raw.strip()
-        if not raw:
-            self.finished.emit([])
-            return
+    def __init__(self, snapshot: List[UwpItem] = None):
+        super().__init__()
+        # 后台线程会写回解析出的显示名，只操作副本；表格中的对象由界面线程经 nameResolved 更新
+        self.snapshot = [replace(it) for it in snapshot or []]
 
-        try:
-            import re
-            # 去掉常见的 ANSI / 控制字符，避免干扰
-            raw_clean = re.sub(r'\x1b\[[0-9;]*[A-Za-z]', '', raw)
-            raw_clean = re.sub(r'[\x00-\x1f\x7f-\x9f]', lambda m: ' ' if m.group(0) in '\r\n\t' else '', raw_clean)
-
-            def extract_balanced(s: str):
-                # 定位第一个 JSON 起始符
-                start_idx = None
-                for i, ch in enumerate(s):
-                    if ch in '[{':
-                        start_idx = i
-                        break
-                if start_idx is None:
-                    return None
-                stack = []
-                in_str = False
-                esc = False
-                for i in range(start_idx, len(s)):
-                    ch = s[i]
-                    if esc:
-                        esc = False
-                        continue
-                    if ch == '\\' and in_str:
-                        esc = True
-                        continue
-                    if ch == '"' :
-                        in_str = not in_str
-                        continue
-                    if in_str:
-                        continue
-                    if ch in '[{':
-                        stack.append(ch)
-                    elif ch in ']}':
-                        if not stack:
-                            # unmatched closing, skip
-                            continue
-                        top = stack[-1]
-                        if (top == '[' and ch == ']') or (top == '{' and ch == '}'):
-                            stack.pop()
-                            if not stack:
-                                return s[start_idx:i+1]
-                        else:
-                            # mismatch
-                            return None
-                # 未匹配完：返回截断的片段以便后续尝试
-                return s[start_idx:]
-
-            candidate = extract_balanced(raw_clean)
-            parsed = None
-            if candidate:
-                try:
-                    parsed = json.loads(candidate)
-                except Exception:
-                    parsed = None
-
-            # 若上面失败，尝试使用最后出现的闭合括号位置截取（经常能处理末尾被截断情况）
-            if parsed is None:
-                last_sq = raw_clean.rfind(']')
-                last_cu = raw_clean.rfind('}')
-                last_pos = max(last_sq, last_cu)
-                first_sq = raw_clean.find('[')
-                first_cu = raw_clean.find('{')
-                first_pos_candidates = [p for p in (first_sq, first_cu) if p != -1]
-                first_pos = min(first_pos_candidates) if first_pos_candidates else -1
-                if first_pos != -1 and last_pos != -1 and last_pos > first_pos:
-                    try_sub = raw_clean[first_pos:last_pos+1]
-                    try:
-                        parsed = json.loads(try_sub)
-                    except Exception:
-                        parsed = None
-
-            # 最后回退到简单的正则捕获（非贪婪地捕获首个 JSON 数组/对象）
-            if parsed is None:
-                m = re.search(r'(\[.*?\]|\{.*?\})', raw_clean, re.S)
-                if m:
-                    try:
-                        parsed = json.loads(m.group(1))
-                    except Exception:
-                        parsed = None
-
-            if parsed is None:
-                print(t("unable_extract_json_preview"), raw[:1000])
-                self.finished.emit([])
-                return
-
-            data = parsed
-            if not isinstance(data, list):
-                data = [data]
-        except Exception as e:
-            print(t("json_extraction_error"), e)
-            self.finished.emit([])
-            return
+    def _emit_batch(self, batch: List[UwpItem]):
+        self.batch.emit([replace(it) for it in batch])
 
-        # 在解析到 data 后，尝试获取 Start menu 应用映射（AppID -> Name）
-        def get_startapps_map():
-            try:
-                scmd = [
-                    "powershell", "-NoLogo", "-NonInteractive", "-OutputFormat", "Text",
-                    "-Command", r"""
-                    [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
-                    Get-StartApps | Select-Object AppID,Name | ConvertTo-Json -Depth 2
-                    """
-                ]
-                comp = subprocess.run(scmd, capture_output=True, text=True,
-                                      encoding='utf-8', errors='ignore', timeout=20)
-                out = comp.stdout.strip() or comp.stderr.strip()
-                if not out:
-                    return {}
-                arr = json.loads(out) if out else []
-                if isinstance(arr, dict):
-                    arr = [arr]
-                m = {}
-                for a in arr:
-                    aid = (a.get('AppID') or '').lower()
-                    name = a.get('Name') or ''
-                    if aid:
-                        m[aid] = name
-                return m
-            except Exception:
-                return {}
-
-        start_map = get_startapps_map()
-
-        arch_map = {0: 'X86', 5: 'ARM', 9: 'X64', 11: 'ARM64', 12: 'ARM64'}
-        items = []
-        for d in data:
-            raw_name = d.get('Name') or d.get('PackageFullName')
-            install_location = d.get('InstallLocation') or ''
-            pkg_full = d.get('PackageFullName') or ''
-            pkg_family = d.get('PackageFamilyName') or ''
-
-            # 若返回的 Name 是 ms-resource 引用，尝试解析本地资源以获取友好名称
-            display_name = raw_name
-            try:
-                if isinstance(raw_name, str) and 'ms-resource' in raw_name.lower():
-                    # 1) 先尝试本地 .resw 解析
-                    resolved = resolve_ms_resource(raw_name, install_location)
-                    if resolved and ('ms-resource' not in str(resolved).lower()):
-                        display_name = resolved
-                    else:
-                        # 2) 使用 StartApps 映射：查找 AppID 中包含 package family 的项
-                        if pkg_family and start_map:
-                            found = None
-                            low_family = pkg_family.lower()
-                            for aid, aname in start_map.items():
-                                if low_family in aid:
-                                    found = aname
-                                    break
-                            if found:
-                                display_name = found
-                            else:
-                                # 3) 最后回退：从 PackageFullName 截取更友好的前缀（去掉版本信息）
-                                if pkg_full:
-                                    display_name = pkg_full.split('_')[0]
-                else:
-                    display_name = raw_name
-            except Exception:
-                display_name = raw_name
-
-            items.append(UwpItem(
-                name=display_name,
-                pkg_fullname=pkg_full,
-                version=d.get('Version') or '',
-                arch=arch_map.get(d.get('Architecture'), 'Unknown'),
-                install_path=install_location
-            ))
+    def run(self):
+        tracer = tracing.Tracer("enumerate")
+        with tracer.activate():
+            items = refresh_inventory(self.snapshot, on_batch=self._emit_batch,
+                                      on_resolved=self.nameResolved.emit)
+        uwp_core.finish_trace(tracer)
         self.finished.emit(items)
 
 # --------------------------------------------------
-# 工具链路径
+# 批量打包线程（带跳过签名开关）
 # --------------------------------------------------
-BIN_DIR = pathlib.Path(__file__).parent / "bin"
-MAKEAPPX = BIN_DIR / "makeappx.exe"
-MAKECERT = BIN_DIR / "makecert.exe"
-PVK2PFX  = BIN_DIR / "pvk2pfx.exe"
-SIGNTOOL = BIN_DIR / "signtool.exe"
-
-def _run(tool: pathlib.Path, args: list, cwd=None) -> str:
-    if not tool.exists():
-        raise RuntimeError(t("tool_not_exist", tool=tool.name))
-    cmd = [str(tool), *args]
-    completed = subprocess.run(cmd, capture_output=True, text=True,
-                               encoding='utf-8', errors='ignore', cwd=cwd or BIN_DIR)
-    if completed.returncode != 0:
-        err = completed.stderr.strip() or completed.stdout.strip()
-        raise RuntimeError(t("tool_failed", tool=tool.name, err=err))
-    return completed.stdout
-
-# --------------------------------------------------
-# 打包线程（带跳过签名开关）
-# --------------------------------------------------
-class PackSignThread(QThread):
+class BatchPackThread(QThread):
+    planned = pyqtSignal(list)        # 批次内全部包的 PackageFullName（含自动加入的依赖），按下标排列
     log = pyqtSignal(str)
-    finished = pyqtSignal(bool)
+    jobStatus = pyqtSignal(int, str)
+    jobProgress = pyqtSignal(int, float, float)   # 下标, 比例 0~1, MB/s
+    jobScan = pyqtSignal(int, object)             # 下标, TreeScan（字节数可能超出 32 位 int）
+    finished = pyqtSignal(int, int)   # 成功数, 失败数
 
-    def __init__(self, item: UwpItem, out_dir: pathlib.Path, skip_sign: bool):
+    def __init__(self, items: List[UwpItem], out_dir: pathlib.Path, cfg: BatchConfig,
+                 installed: List[UwpItem] = None):
         super().__init__()
-        self.item = item
+        self.items = list(items)
         self.out_dir = out_dir
-        self.skip_sign = skip_sign
+        self.cfg = cfg
+        self.installed = list(installed) if installed is not None else None
+        # 依赖规划要逐个解析清单，放到 run() 中构造调度器，避免阻塞界面线程
+        self.scheduler = None
+        self._cancelled = False
+
+    def cancel(self):
+        # 调度器可能尚未构造：先记下，run() 构造后补上
+        self._cancelled = True
+        if self.scheduler is not None:
+            self.scheduler.cancel()
 
     def run(self):
         try:
-            import re
-            from pathlib import Path
-            
-            # 使用C#风格的命名
-            ws_app_path = Path(self.item.install_path)
-            ws_app_name = ws_app_path.name
-            
-            # 生成输出文件名（类似C#版本）
-            file_name = ws_app_name
-            appx_file = self.out_dir / f"{file_name}.appx"
-            
-            # 清理现有文件（类似C#版本）
-            self.out_dir.mkdir(parents=True, exist_ok=True)
-            for ext in ['.appx', '.pvk', '.cer', '.pfx']:
-                old_file = self.out_dir / f"{file_name}{ext}"
-                if old_file.exists():
-                    old_file.unlink(missing_ok=True)
-
-            # 1. 打包（与C#版本相同的参数）
-            self.log.emit(t("pack_log_pack"))
-            _run(MAKEAPPX, ['pack', '-d', str(ws_app_path), '-p', str(appx_file), '-l'])
-            
-            if self.skip_sign:
-                self.log.emit(t("pack_log_skipped"))
-                self.finished.emit(True)
-                return
-
-            # 2. 解析AppxManifest.xml获取Publisher（类似C#版本）
-            publisher = self.extract_publisher_from_manifest(ws_app_path)
-            if not publisher:
-                publisher = "CN=TempUWPExtractCert"
-            
-            # 3. 生成证书（使用C#版本的参数格式）
-            self.log.emit(t("pack_log_gen_cert"))
-            pvk_file = self.out_dir / f"{file_name}.pvk"
-            cer_file = self.out_dir / f"{file_name}.cer"
-            
-            # 使用与C#版本完全相同的MakeCert参数
-            makecert_args = [
-                '-n', publisher,
-                '-r', 
-                '-a', 'sha256', 
-                '-len', '2048', 
-                '-cy', 'end', 
-                '-h', '0', 
-                '-eku', '1.3.6.1.5.5.7.3.3',
-                '-b', '01/01/2000',
-                '-sv', str(pvk_file),
-                str(cer_file)
-            ]
-            
-            _run(MAKECERT, makecert_args)
-
-            # 4. 转换证书（C#版本没有密码）
-            self.log.emit(t("pack_log_convert_cert"))
-            pfx_file = self.out_dir / f"{file_name}.pfx"
-            
-            pvk2pfx_args = [
-                '-pvk', str(pvk_file),
-                '-spc', str(cer_file), 
-                '-pfx', str(pfx_file)
-            ]
-            _run(PVK2PFX, pvk2pfx_args)
-
-            # 5. 签名（使用C#版本的参数）
-            self.log.emit(t("pack_log_signing"))
-            
-            signtool_args = [
-                'sign', 
-                '-fd', 'SHA256', 
-                '-a', 
-                '-f', str(pfx_file),
-                str(appx_file)
-            ]
-            
-            out = _run(SIGNTOOL, signtool_args)
-            
-            if "successfully signed" in out.lower():
-                self.log.emit(t("pack_log_sign_success"))
-                self.log.emit(t("pack_log_install_cer"))
-                self.log.emit(t("pack_log_install_appx"))
-                self.finished.emit(True)
-            else:
-                raise RuntimeError(t("sign_no_success"))
-                
+            self.scheduler = BatchScheduler(self.items, self.out_dir, self.cfg,
+                                            on_status=self.jobStatus.emit, on_log=self.log.emit,
+                                            on_progress=self.jobProgress.emit,
+                                            on_scan=self.jobScan.emit, installed=self.installed)
         except Exception as e:
+            # 界面仍在等待 finished，不能让线程静默结束
             self.log.emit(t("pack_error", err=e))
-            self.finished.emit(False)
-
-    def extract_publisher_from_manifest(self, app_path):
-        """从AppxManifest.xml提取Publisher，类似C#版本"""
-        try:
-            manifest_path = app_path / "AppxManifest.xml"
-            if not manifest_path.exists():
-                return None
-                
-            import xml.etree.ElementTree as ET
-            tree = ET.parse(manifest_path)
-            root = tree.getroot()
-            
-            # 查找Identity元素的Publisher属性
-            namespaces = {
-                'default': 'http://schemas.microsoft.com/appx/manifest/foundation/windows10',
-                'mp': 'http://schemas.microsoft.com/appx/2014/phone/manifest',
-                'uap': 'http://schemas.microsoft.com/appx/manifest/uap/windows10'
-            }
-            
-            # 注册命名空间
-            for prefix, uri in namespaces.items():
-                ET.register_namespace(prefix, uri)
-            
-            # 尝试查找Identity元素
-            identity = root.find('.//{http://schemas.microsoft.com/appx/manifest/foundation/windows10}Identity')
-            if identity is not None:
-                publisher = identity.get('Publisher')
-                if publisher:
-                    return publisher
-                    
-        except Exception as e:
-            self.log.emit(t("manifest_parse_error", err=e))
-        
-        return None
+            self.finished.emit(0, len(self.items))
+            return
+        if self._cancelled:
+            self.scheduler.cancel()
+        self.planned.emit([it.pkg_fullname for it in self.scheduler.items])
+        results = self.scheduler.run()
+        ok = sum(1 for r in results if r.status in (JOB_DONE, JOB_SKIPPED))
+        self.finished.emit(ok, len(results) - ok)
 
 # --------------------------------------------------
 # 设置页
@@ -592,9 +182,22 @@ class SettingsInterface(QWidget):
         self.skipCheck.setToolTip(t("skip_tooltip"))
         lay.addWidget(self.skipCheck)
 
+        self.changedOnlyCheck = FWCheckBox(t("changed_only_checkbox"))
+        self.changedOnlyCheck.setToolTip(t("changed_only_tooltip"))
+        lay.addWidget(self.changedOnlyCheck)
+
+        self.includeDepsCheck = FWCheckBox(t("include_deps_checkbox"))
+        self.includeDepsCheck.setToolTip(t("include_deps_tooltip"))
+        self.includeDepsCheck.setChecked(BatchConfig().include_deps)
+        lay.addWidget(self.includeDepsCheck)
+        self.verifyCheck = FWCheckBox(t("verify_checkbox"))
+        self.verifyCheck.setToolTip(t("verify_tooltip"))
+        self.verifyCheck.setChecked(BatchConfig().verify)
+        lay.addWidget(self.verifyCheck)
+
         # 语言选择下拉（显示友好名称，itemData 存语言代码）
         h_lang = QHBoxLayout()
-        h_lang_lbl = QLabel(t("language_label") if TEXTS.get("language_label") else "Language")
+        h_lang_lbl = QLabel(t("language_label") if texts().get("language_label") else "Language")
         self.langCombo = QComboBox()
         # 使用 LOC.display_names() 获取 code->display
         self._populate_lang_combo()
@@ -604,6 +207,30 @@ class SettingsInterface(QWidget):
         h_lang.addWidget(self.langCombo)
         lay.addLayout(h_lang)
 
+        # 批量提取并发设置
+        defaults = BatchConfig()
+        self.workersLbl, self.workersSpin = self._add_spin(lay, t("workers_label"), 1, 64, defaults.workers)
+        self.packLbl, self.packSpin = self._add_spin(lay, t("pack_limit_label"), 1, 64, defaults.pack_limit)
+        self.signLbl, self.signSpin = self._add_spin(lay, t("sign_limit_label"), 1, 64, defaults.sign_limit)
+
+        # 打包后端选择
+        h_packer = QHBoxLayout()
+        self.packerLbl = QLabel(t("packer_label"))
+        self.packerCombo = QComboBox()
+        self._populate_packer_combo(default_packer())
+        h_packer.addWidget(self.packerLbl)
+        h_packer.addWidget(self.packerCombo)
+        lay.addLayout(h_packer)
+
+        # 证书密钥类型（进程内生成时可选更长的 RSA 密钥）
+        h_key = QHBoxLayout()
+        self.certKeyLbl = QLabel(t("cert_key_label"))
+        self.certKeyCombo = QComboBox()
+        self._populate_cert_key_combo(defaults.cert_key)
+        h_key.addWidget(self.certKeyLbl)
+        h_key.addWidget(self.certKeyCombo)
+        lay.addLayout(h_key)
+
         self.saveBtn = PushButton(t("save_button"))
         self.saveBtn.clicked.connect(self.save_cfg)
         lay.addWidget(self.saveBtn)
@@ -613,6 +240,31 @@ class SettingsInterface(QWidget):
         # 订阅全局语言变更，更新界面文本
         LOC.languageChanged.connect(self.retranslate_ui)
 
+    def _add_spin(self, lay, text: str, lo: int, hi: int, value: int):
+        h = QHBoxLayout()
+        lbl = QLabel(text)
+        spin = SpinBox()
+        spin.setRange(lo, hi)
+        spin.setValue(value)
+        h.addWidget(lbl)
+        h.addWidget(spin)
+        lay.addLayout(h)
+        return lbl, spin
+
+    def _populate_packer_combo(self, current: str):
+        self.packerCombo.clear()
+        for code in (PACKER_MAKEAPPX, PACKER_BUILTIN):
+            self.packerCombo.addItem(t(f"packer_{code}"), code)
+            if code == current:
+                self.packerCombo.setCurrentIndex(self.packerCombo.count() - 1)
+
+    def _populate_cert_key_combo(self, current: str):
+        self.certKeyCombo.clear()
+        for code in certgen.KEY_TYPES:
+            self.certKeyCombo.addItem(t("cert_key_" + code.replace("-", "_")), code)
+            if code == current:
+                self.certKeyCombo.setCurrentIndex(self.certKeyCombo.count() - 1)
+
     # 填充下拉并选中当前语言
     def _populate_lang_combo(self):
         self.langCombo.blockSignals(True)
@@ -646,6 +298,17 @@ class SettingsInterface(QWidget):
     def get_cfg(self) -> bool:
         return self._skip
 
+    def get_batch_cfg(self) -> BatchConfig:
+        return BatchConfig(workers=self.workersSpin.value(),
+                           pack_limit=self.packSpin.value(),
+                           sign_limit=self.signSpin.value(),
+                           skip_sign=self._skip,
+                           packer=self.packerCombo.currentData(),
+                           cert_key=self.certKeyCombo.currentData(),
+                           changed_only=self.changedOnlyCheck.isChecked(),
+                           include_deps=self.includeDepsCheck.isChecked(),
+                           verify=self.verifyCheck.isChecked())
+
     def on_lang_changed(self, lang_code: str):
         # 切换语言并通知其它组件
         LOC.set_lang(lang_code)
@@ -655,10 +318,255 @@ class SettingsInterface(QWidget):
         self.title.setText(t("settings_title"))
         self.skipCheck.setText(t("skip_checkbox"))
         self.skipCheck.setToolTip(t("skip_tooltip"))
+        self.changedOnlyCheck.setText(t("changed_only_checkbox"))
+        self.changedOnlyCheck.setToolTip(t("changed_only_tooltip"))
+        self.includeDepsCheck.setText(t("include_deps_checkbox"))
+        self.includeDepsCheck.setToolTip(t("include_deps_tooltip"))
+        self.verifyCheck.setText(t("verify_checkbox"))
+        self.verifyCheck.setToolTip(t("verify_tooltip"))
         self.saveBtn.setText(t("save_button"))
+        self.workersLbl.setText(t("workers_label"))
+        self.packLbl.setText(t("pack_limit_label"))
+        self.signLbl.setText(t("sign_limit_label"))
+        self.packerLbl.setText(t("packer_label"))
+        self._populate_packer_combo(self.packerCombo.currentData())
+        self.certKeyLbl.setText(t("cert_key_label"))
+        self._populate_cert_key_combo(self.certKeyCombo.currentData())
         # 重新填充下拉显示名并保持选中项
         self._populate_lang_combo()
 
+# --------------------------------------------------
+# 包列表模型 / 勾选框委托
+# --------------------------------------------------
+def _is_checked(value) -> bool:
+    # 经 QVariant 往返后可能是 Qt.CheckState 也可能是 int
+    return value == Qt.CheckState.Checked or value == Qt.CheckState.Checked.value
+
+class PackageTableModel(QAbstractTableModel):
+    """UwpItem 列表上的表格模型；勾选状态直接存放在 UwpItem.is_selected 中。"""
+    COL_SELECT, COL_NAME, COL_PKG, COL_VERSION, COL_ARCH, COL_SIZE, COL_ETA, COL_STATUS = range(8)
+    HEADER_KEYS = ("table_header_select", "table_header_name", "table_header_pkg",
+                   "table_header_version", "table_header_arch", "table_header_size",
+                   "table_header_eta", "table_header_status")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items: List[UwpItem] = []
+        self._status = {}   # pkg_fullname -> JOB_* 状态码
+        self._progress = {} # pkg_fullname -> (百分比, MB/s)，仅打包中有效
+        self._scan = {}     # pkg_fullname -> 预扫描结果 TreeScan
+        self._rows = {}     # pkg_fullname -> 行号
+
+    def _reindex(self, start: int = 0):
+        for row in range(start, len(self.items)):
+            self._rows[self.items[row].pkg_fullname] = row
+
+    def _sort_key(self, column: int):
+        if column == self.COL_SELECT:
+            return lambda it: it.is_selected
+        if column == self.COL_NAME:
+            return lambda it: (it.name or "").lower()
+        if column == self.COL_PKG:
+            return lambda it: it.pkg_fullname.lower()
+        if column == self.COL_VERSION:
+            return lambda it: version_key(it.version)
+        if column == self.COL_ARCH:
+            return lambda it: it.arch
+        if column == self.COL_SIZE:
+            return lambda it: getattr(self._scan.get(it.pkg_fullname), "bytes", -1)
+        if column == self.COL_ETA:
+            return lambda it: getattr(self._scan.get(it.pkg_fullname), "est_seconds", -1.0)
+        return lambda it: self._status.get(it.pkg_fullname, "")
+
+    # ---------- QAbstractTableModel ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADER_KEYS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        it = self.items[index.row()]
+        col = index.column()
+        if col == self.COL_SELECT:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if it.is_selected else Qt.CheckState.Unchecked
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            if col == self.COL_NAME:
+                return it.name
+            if col == self.COL_PKG:
+                return it.pkg_fullname
+            if col == self.COL_VERSION:
+                return it.version
+            if col == self.COL_ARCH:
+                return it.arch
+            if col in (self.COL_SIZE, self.COL_ETA):
+                sc = self._scan.get(it.pkg_fullname)
+                if sc is None:
+                    return ""
+                return format_bytes(sc.bytes) if col == self.COL_SIZE else format_duration(sc.est_seconds)
+            if col == self.COL_STATUS:
+                code = self._status.get(it.pkg_fullname)
+                if code == JOB_PACKING and it.pkg_fullname in self._progress:
+                    pct, rate = self._progress[it.pkg_fullname]
+                    return t("job_status_packing_progress", pct=pct, rate=rate)
+                return t("job_status_" + code) if code else ""
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or index.column() != self.COL_SELECT or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        if not isinstance(value, bool):
+            value = _is_checked(value)
+        self.items[index.row()].is_selected = value
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        f = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == self.COL_SELECT:
+            f |= Qt.ItemFlag.ItemIsUserCheckable
+        return f
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return t(self.HEADER_KEYS[section])
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        old_items = [self.items[i.row()] for i in old]
+        self.items.sort(key=self._sort_key(column), reverse=order == Qt.SortOrder.DescendingOrder)
+        self._reindex()
+        self.changePersistentIndexList(
+            old, [self.index(self._rows[it.pkg_fullname], i.column()) for it, i in zip(old_items, old)])
+        self.layoutChanged.emit()
+
+    # ---------- 批量操作 ----------
+    def set_items(self, items: List[UwpItem]):
+        """整体替换（一次 reset，而不是逐行插入）。"""
+        self.beginResetModel()
+        self.items = items
+        self._rows = {}
+        self._reindex()
+        self.endResetModel()
+
+    def append_items(self, items: List[UwpItem]):
+        """一次性追加一批行，跳过已存在的包。"""
+        new = [it for it in items if it.pkg_fullname not in self._rows]
+        if not new:
+            return
+        start = len(self.items)
+        self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+        self.items.extend(new)
+        self._reindex(start)
+        self.endInsertRows()
+
+    def set_all_checked(self, checked: bool):
+        if not self.items:
+            return
+        for it in self.items:
+            it.is_selected = checked
+        self.dataChanged.emit(self.index(0, self.COL_SELECT),
+                              self.index(len(self.items) - 1, self.COL_SELECT),
+                              [Qt.ItemDataRole.CheckStateRole])
+
+    def set_name(self, pkg_fullname: str, name: str):
+        row = self._rows.get(pkg_fullname)
+        if row is None:
+            return
+        self.items[row].name = name
+        idx = self.index(row, self.COL_NAME)
+        self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DisplayRole])
+
+    def set_status(self, pkg_fullname: str, status: str):
+        self._status[pkg_fullname] = status
+        self._progress.pop(pkg_fullname, None)
+        self._emit_status_changed(pkg_fullname)
+
+    def set_scan(self, pkg_fullname: str, scan):
+        self._scan[pkg_fullname] = scan
+        row = self._rows.get(pkg_fullname)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, self.COL_SIZE), self.index(row, self.COL_ETA),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+    def set_progress(self, pkg_fullname: str, pct: float, rate: float):
+        self._progress[pkg_fullname] = (pct, rate)
+        self._emit_status_changed(pkg_fullname)
+
+    def _emit_status_changed(self, pkg_fullname: str):
+        row = self._rows.get(pkg_fullname)
+        if row is not None:
+            idx = self.index(row, self.COL_STATUS)
+            self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DisplayRole])
+
+    def retranslate(self):
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.HEADER_KEYS) - 1)
+        if self.items:
+            self.dataChanged.emit(self.index(0, self.COL_STATUS),
+                                  self.index(len(self.items) - 1, self.COL_STATUS))
+
+class PackageFilterProxy(QSortFilterProxyModel):
+    """只负责按 SearchIndex 的结果过滤；排序交给源模型完成。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._visible = None
+
+    def set_visible(self, visible):
+        self._visible = visible
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._visible is None:
+            return True
+        return self.sourceModel().items[source_row].pkg_fullname in self._visible
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    """在单元格中央绘制勾选框，点击或空格切换；不为每行创建控件。"""
+
+    def _check_rect(self, option):
+        style = option.widget.style() if option.widget else QApplication.style()
+        size = style.pixelMetric(QStyle.PixelMetric.PM_IndicatorWidth)
+        r = option.rect
+        return QRect(r.x() + (r.width() - size) // 2, r.y() + (r.height() - size) // 2, size, size)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, opt, painter, opt.widget)
+        box = QStyleOptionButton()
+        box.rect = self._check_rect(option)
+        checked = _is_checked(index.data(Qt.ItemDataRole.CheckStateRole))
+        box.state = QStyle.StateFlag.State_Enabled | (
+            QStyle.StateFlag.State_On if checked else QStyle.StateFlag.State_Off)
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorCheckBox, box, painter, opt.widget)
+
+    def editorEvent(self, event, model, option, index):
+        et = event.type()
+        if et == QEvent.Type.MouseButtonDblClick:
+            return True
+        toggle = (et == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton
+                  and option.rect.contains(event.position().toPoint()))
+        toggle = toggle or (et == QEvent.Type.KeyPress and event.key() == Qt.Key.Key_Space)
+        if not toggle:
+            return False
+        checked = _is_checked(index.data(Qt.ItemDataRole.CheckStateRole))
+        return model.setData(index, not checked, Qt.ItemDataRole.CheckStateRole)
+
 # --------------------------------------------------
 # 主页
 # --------------------------------------------------
@@ -666,10 +574,18 @@ class MainInterface(QWidget):
     def __init__(self):
         super().__init__()
         self.setObjectName("mainInterface")
-        self.items: List[UwpItem] = []
         self.skip_sign = False
+        self.batch_cfg = BatchConfig()
+        self.pack_thread = None
         self.init_ui()
-        self.enum_thread = PsEnumThread()
+        # 先显示上次的快照，再在后台增量刷新
+        snapshot = load_inventory()
+        if snapshot:
+            self.model.set_items(snapshot)
+            self.do_filter()
+        self.enum_thread = PsEnumThread(snapshot)
+        self.enum_thread.batch.connect(self.on_enum_batch)
+        self.enum_thread.nameResolved.connect(self.model.set_name)
         self.enum_thread.finished.connect(self.on_enum_done)
         self.enum_thread.start()
         # 订阅语言变化
@@ -680,26 +596,40 @@ class MainInterface(QWidget):
         self.search = LineEdit()
         self.search.setClearButtonEnabled(True)
         self.search.setPlaceholderText(t("search_placeholder"))
-        self.search.textChanged.connect(self.do_filter)
-
-        # 中间表格
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels([
-            t("table_header_select"),
-            t("table_header_name"),
-            t("table_header_pkg"),
-            t("table_header_version"),
-            t("table_header_arch")
-        ])
-        self.table.horizontalHeader().setStretchLastSection(True)
+        # 输入防抖：停止输入 150ms 后再过滤
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self.do_filter)
+        self.search.textChanged.connect(self._filter_timer.start)
+
+        # 中间表格（模型/视图，只绘制可见行）
+        self.model = PackageTableModel(self)
+        self.proxy = PackageFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self._search_index = None
+        # 整体替换后索引失效，下次过滤时重建；追加的行只把新行加入索引
+        self.model.modelReset.connect(self._invalidate_search_index)
+        self.model.rowsInserted.connect(self._on_rows_inserted)
+        self.model.dataChanged.connect(self._on_model_data_changed)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setItemDelegateForColumn(PackageTableModel.COL_SELECT, CheckBoxDelegate(self.table))
         header = self.table.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        header.resizeSection(0, 24)         
+        header.resizeSection(0, 24)
         header.setMinimumSectionSize(24)
+        # 固定行高，滚动时无需逐行测量
+        vheader = self.table.verticalHeader()
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setVisible(False)
         self.table.setAlternatingRowColors(True)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        # 初始不排序，保持枚举顺序；点击表头后按该列排序
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
 
         # 底部控制区
         self.btn_sel_all = FWCheckBox(t("select_all"))
@@ -709,6 +639,9 @@ class MainInterface(QWidget):
         self.lab_out = QLabel(t("select_label_default"))
         self.btn_run = PushButton(t("extract_button"))
         self.btn_run.clicked.connect(self.start_extract)
+        self.btn_cancel = PushButton(t("cancel_button"))
+        self.btn_cancel.clicked.connect(self.cancel_extract)
+        self.btn_cancel.setEnabled(False)
         self.progress = ProgressBar()
         self.progress.setVisible(False)
 
@@ -717,6 +650,7 @@ class MainInterface(QWidget):
         lay_bottom.addWidget(self.btn_out)
         lay_bottom.addWidget(self.lab_out, 1)
         lay_bottom.addWidget(self.btn_run)
+        lay_bottom.addWidget(self.btn_cancel)
 
         lay = QVBoxLayout(self)
         lay.addWidget(self.search)
@@ -724,41 +658,54 @@ class MainInterface(QWidget):
         lay.addLayout(lay_bottom)
         lay.addWidget(self.progress)
 
+    @property
+    def items(self) -> List[UwpItem]:
+        return self.model.items
+
     # ---------- 枚举 ----------
     def on_enum_done(self, items: List[UwpItem]):
-        self.items = items
-        self.fill_table()
+        # 保留刷新前已勾选的项
+        selected = {it.pkg_fullname for it in self.items if it.is_selected}
+        for it in items:
+            it.is_selected = it.pkg_fullname in selected
+        self.model.set_items(items)
+        self.do_filter()
         InfoBar.success(t("enum_done_title"), t("enum_done_msg", count=len(items)), duration=2000,
                         parent=self, position=InfoBarPosition.TOP)
 
-    def fill_table(self):
-        self.table.setRowCount(0)
-        for idx, it in enumerate(self.items):
-            self.table.insertRow(idx)
-            chk = FWCheckBox()
-            chk.setChecked(it.is_selected)
-            chk.checkStateChanged.connect(lambda st, i=idx: self.on_item_check(st, i))
-            self.table.setCellWidget(idx, 0, chk)
-            self.table.setItem(idx, 1, QTableWidgetItem(it.name))
-            self.table.setItem(idx, 2, QTableWidgetItem(it.pkg_fullname))
-            self.table.setItem(idx, 3, QTableWidgetItem(it.version))
-            self.table.setItem(idx, 4, QTableWidgetItem(it.arch))
-        self.do_filter()
-
-    def on_item_check(self, state, idx):
-        self.items[idx].is_selected = bool(state)
+    def on_enum_batch(self, batch: List[UwpItem]):
+        # 枚举过程中逐批追加，已在表中的（来自快照）由模型跳过
+        self.model.append_items(batch)
+        self._schedule_filter()
 
     def on_sel_all(self, state):
-        for i, it in enumerate(self.items):
-            it.is_selected = bool(state)
-            if self.table.cellWidget(i, 0):
-                self.table.cellWidget(i, 0).setChecked(bool(state))
+        self.model.set_all_checked(bool(state))
+
+    def _invalidate_search_index(self, *args):
+        self._search_index = None
+
+    def _on_rows_inserted(self, parent, first, last):
+        if self._search_index is not None:
+            self._search_index.add(self.items[first:last + 1])
+
+    def _schedule_filter(self):
+        # 枚举、解析期间的批量更新合并到同一个防抖定时器，最多每 150ms 过滤一次；
+        # 定时器已在计时时不再重启，持续到来的批次也不会一直推迟过滤
+        if not self._filter_timer.isActive():
+            self._filter_timer.start()
+
+    def _on_model_data_changed(self, top_left, bottom_right, roles=()):
+        # 显示名在后台解析完成后更新：只更新这些行的索引，有搜索词时重新过滤
+        if top_left.column() <= PackageTableModel.COL_NAME <= bottom_right.column():
+            if self._search_index is not None:
+                self._search_index.add(self.items[top_left.row():bottom_right.row() + 1])
+            if self.search.text():
+                self._schedule_filter()
 
     def do_filter(self):
-        kw = self.search.text().strip().lower()
-        for i in range(self.table.rowCount()):
-            txt = self.table.item(i, 1).text().lower()
-            self.table.setRowHidden(i, kw not in txt)
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.items)
+        self.proxy.set_visible(self._search_index.match(self.search.text()))
 
     # ---------- 提取 ----------
     def pick_out_dir(self):
@@ -775,26 +722,74 @@ class MainInterface(QWidget):
         if not selected:
             InfoBar.warning(t("warning_title"), t("not_selected_msg"), parent=self, position=InfoBarPosition.TOP)
             return
-        if len(selected) > 1:
-            InfoBar.warning(t("warning_title"), t("multi_select_msg"), parent=self, position=InfoBarPosition.TOP)
-            return
-        item = selected[0]
+        cfg = BatchConfig(workers=self.batch_cfg.workers, pack_limit=self.batch_cfg.pack_limit,
+                          sign_limit=self.batch_cfg.sign_limit, skip_sign=self.skip_sign,
+                          packer=self.batch_cfg.packer, cert_key=self.batch_cfg.cert_key,
+                          changed_only=self.batch_cfg.changed_only,
+                          include_deps=self.batch_cfg.include_deps,
+                          verify=self.batch_cfg.verify)
+        self.pack_thread = BatchPackThread(selected, self.out_dir, cfg, installed=self.items)
+        self._batch_pkgs = [it.pkg_fullname for it in selected]
+        self._batch_done = 0
+        self._batch_partial = {}   # 批次内下标 -> 正在打包的完成比例
+        for pkg in self._batch_pkgs:
+            self.model.set_status(pkg, JOB_QUEUED)
         self.progress.setVisible(True)
-        self.progress.setValue(0)
+        # 依赖规划完成前显示忙碌状态
+        self.progress.setRange(0, 0)
         self.btn_run.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
 
-        self.pack_thread = PackSignThread(item, self.out_dir, self.skip_sign)
+        self.pack_thread.planned.connect(self.on_batch_planned)
         self.pack_thread.log.connect(self.log)
+        self.pack_thread.jobStatus.connect(self.on_job_status)
+        self.pack_thread.jobProgress.connect(self.on_job_progress)
+        self.pack_thread.jobScan.connect(self.on_job_scan)
         self.pack_thread.finished.connect(self.on_pack_done)
         self.pack_thread.start()
 
-    def on_pack_done(self, ok: bool):
+    def on_batch_planned(self, pkgs: list):
+        # 批次内下标 -> 包全名，用于回填状态列（与排序无关）；依赖的框架包排在选中的包之后
+        self._batch_pkgs = pkgs
+        for pkg in pkgs:
+            self.model.set_status(pkg, JOB_QUEUED)
+        # 每个包占 100 格，正在打包的包按字节进度计入，进度条不再停在 0
+        self.progress.setRange(0, len(pkgs) * 100)
+        self.progress.setValue(0)
+
+    def cancel_extract(self):
+        if self.pack_thread is not None:
+            self.pack_thread.cancel()
+            self.btn_cancel.setEnabled(False)
+
+    def on_job_status(self, idx: int, status: str):
+        self.model.set_status(self._batch_pkgs[idx], status)
+        if status in (JOB_DONE, JOB_SKIPPED, JOB_FAILED, JOB_CANCELLED):
+            self._batch_partial.pop(idx, None)
+            self._batch_done += 1
+        self._update_progress()
+
+    def on_job_scan(self, idx: int, scan):
+        self.model.set_scan(self._batch_pkgs[idx], scan)
+
+    def on_job_progress(self, idx: int, frac: float, rate: float):
+        self._batch_partial[idx] = frac
+        self.model.set_progress(self._batch_pkgs[idx], frac * 100, rate)
+        self._update_progress()
+
+    def _update_progress(self):
+        partial = sum(self._batch_partial.values())
+        self.progress.setValue(int((self._batch_done + partial) * 100))
+
+    def on_pack_done(self, ok: int, failed: int):
         self.btn_run.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
         self.progress.setVisible(False)
-        if ok:
-            InfoBar.success(t("complete_title"), t("complete_msg"), parent=self, position=InfoBarPosition.TOP)
+        if not failed:
+            InfoBar.success(t("complete_title"), t("batch_done_msg", ok=ok, failed=failed), parent=self, position=InfoBarPosition.TOP)
         else:
-            InfoBar.error(t("fail_title"), t("fail_msg"), parent=self, position=InfoBarPosition.TOP)
+            InfoBar.error(t("fail_title"), t("batch_done_msg", ok=ok, failed=failed) + " " + t("fail_msg"),
+                          parent=self, position=InfoBarPosition.TOP)
 
     def log(self, msg):
         print(f"[{datetime.now():%H:%M:%S}] {msg}")
@@ -802,19 +797,14 @@ class MainInterface(QWidget):
     def retranslate_ui(self):
         # 更新动态文本
         self.search.setPlaceholderText(t("search_placeholder"))
-        self.table.setHorizontalHeaderLabels([
-            t("table_header_select"),
-            t("table_header_name"),
-            t("table_header_pkg"),
-            t("table_header_version"),
-            t("table_header_arch")
-        ])
+        self.model.retranslate()
         self.btn_sel_all.setText(t("select_all"))
         self.btn_out.setText(t("select_out_btn"))
         # lab_out 若为默认文本才替换，否则保留路径
         if not hasattr(self, "out_dir"):
             self.lab_out.setText(t("select_label_default"))
         self.btn_run.setText(t("extract_button"))
+        self.btn_cancel.setText(t("cancel_button"))
 
 # --------------------------------------------------
 # AppWindow：左侧导航 + 设置页
@@ -828,12 +818,12 @@ class AppWindow(FluentWindow):
         # 1. 主页
         self.main = MainInterface()
         self.main.setObjectName("mainInterface")
-        self.addSubInterface(self.main, FIcon.HOME, t("nav_home") if TEXTS.get("nav_home") else "Home", NavigationItemPosition.TOP)
+        self.addSubInterface(self.main, FIcon.HOME, t("nav_home") if texts().get("nav_home") else "Home", NavigationItemPosition.TOP)
 
         # 2. 设置页
         self.settings = SettingsInterface()
         self.settings.setObjectName("settingsInterface")
-        self.addSubInterface(self.settings, FIcon.SETTING, t("nav_settings") if TEXTS.get("nav_settings") else "Settings", NavigationItemPosition.BOTTOM)
+        self.addSubInterface(self.settings, FIcon.SETTING, t("nav_settings") if texts().get("nav_settings") else "Settings", NavigationItemPosition.BOTTOM)
 
         # 3. 配置双向同步
         self.settings.load_cfg(self.main.skip_sign)
@@ -844,6 +834,7 @@ class AppWindow(FluentWindow):
 
     def apply_settings(self):
         self.main.skip_sign = self.settings.get_cfg()
+        self.main.batch_cfg = self.settings.get_batch_cfg()
         InfoBar.success(t("settings_saved_title"), t("settings_saved_msg"), duration=1500, parent=self, position=InfoBarPosition.TOP)
 
     def retranslate_ui(self):
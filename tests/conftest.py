@@ -0,0 +1,57 @@
+"""测试共用的夹具：把仓库根目录加入 sys.path，缓存目录指向临时目录，并提供伪造安装目录的工具函数。"""
+import os, pathlib, sys, tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# uwp_core 在导入时确定缓存目录，必须在任何测试导入它之前设置
+os.environ.setdefault("UWP_CACHE_DIR", tempfile.mkdtemp(prefix="uwp-test-cache-"))
+
+import pytest
+
+import appx_manifest
+import toolrun
+
+MANIFEST_NS = "http://schemas.microsoft.com/appx/manifest/foundation/windows10"
+PUBLISHER = "CN=Test"
+
+
+def write_app(root: pathlib.Path, name: str, version: str = "1.0.0.0", arch: str = "x64",
+              publisher: str = PUBLISHER, deps=(), framework: bool = False,
+              files: dict = None) -> pathlib.Path:
+    """在 root 下按 PackageFullName 建一个安装目录。deps 为 [(Name, MinVersion)]，
+    files 为 {相对路径: 内容}。返回安装目录。"""
+    dep_xml = "".join(f'<PackageDependency Name="{n}" MinVersion="{v}" Publisher="{publisher}"/>'
+                      for n, v in deps)
+    manifest = (f'<?xml version="1.0" encoding="utf-8"?>\n'
+                f'<Package xmlns="{MANIFEST_NS}">'
+                f'<Identity Name="{name}" Publisher="{publisher}" Version="{version}" '
+                f'ProcessorArchitecture="{arch}"/>'
+                f'<Properties><DisplayName>{name} App</DisplayName>'
+                f'<PublisherDisplayName>Test</PublisherDisplayName><Logo>Assets\\Logo.png</Logo>'
+                f'<Framework>{"true" if framework else "false"}</Framework></Properties>'
+                f'<Dependencies>{dep_xml}</Dependencies>'
+                f'</Package>')
+    pid = appx_manifest.publisher_id(publisher)
+    path = root / f"{name}_{version}_{arch}__{pid}"
+    path.mkdir(parents=True)
+    (path / appx_manifest.MANIFEST_NAME).write_text(manifest, encoding="utf-8")
+    for rel, data in (files or {}).items():
+        p = path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+    return path
+
+
+def item_for(path: pathlib.Path):
+    """由 write_app() 建立的目录构造 UwpItem。"""
+    import uwp_core
+    return uwp_core.item_from_record(uwp_core.record_from_manifest(str(path)))
+
+
+@pytest.fixture
+def fake_tools():
+    """用模拟后端代替 makeappx/makecert/pvk2pfx/signtool，测试结束后恢复。"""
+    prev = toolrun._backend
+    toolrun.set_backend(toolrun.FakeBackend())
+    yield toolrun.get_backend()
+    toolrun.set_backend(prev)
@@ -0,0 +1,70 @@
+import io
+
+import appx_manifest
+
+# 公开的已知值：Windows 自带应用的 PackageFamilyName 后缀
+MICROSOFT_CORP = "CN=Microsoft Corporation, O=Microsoft Corporation, L=Redmond, S=Washington, C=US"
+MICROSOFT_WINDOWS = "CN=Microsoft Windows, O=Microsoft Corporation, L=Redmond, S=Washington, C=US"
+
+MANIFEST = b"""<?xml version="1.0" encoding="utf-8"?>
+<Package xmlns="http://schemas.microsoft.com/appx/manifest/foundation/windows10"
+         xmlns:uap="http://schemas.microsoft.com/appx/manifest/uap/windows10"
+         xmlns:rescap="http://schemas.microsoft.com/appx/manifest/foundation/windows10/restrictedcapabilities">
+  <Identity Name="Contoso.App" Publisher="CN=Contoso" Version="1.2.3.4" ProcessorArchitecture="X64"/>
+  <Properties>
+    <DisplayName>ms-resource:AppName</DisplayName>
+    <PublisherDisplayName>Contoso</PublisherDisplayName>
+    <Logo>Assets\\StoreLogo.png</Logo>
+  </Properties>
+  <Dependencies>
+    <TargetDeviceFamily Name="Windows.Desktop" MinVersion="10.0.17763.0" MaxVersionTested="10.0.22621.0"/>
+    <PackageDependency Name="Microsoft.VCLibs.140.00" MinVersion="14.0.30704.0" Publisher="CN=Microsoft"/>
+    <PackageDependency Name="Optional.Thing" MinVersion="1.0.0.0" Optional="true"/>
+  </Dependencies>
+  <Applications>
+    <Application Id="App">
+      <uap:VisualElements DisplayName="Visual" Square150x150Logo="Assets\\Square150.png"
+                          Square44x44Logo="Assets\\Square44.png" Description="d" BackgroundColor="transparent"/>
+    </Application>
+  </Applications>
+  <Capabilities>
+    <Capability Name="internetClient"/>
+    <rescap:Capability Name="runFullTrust"/>
+  </Capabilities>
+  <Extensions><Broken
+"""
+
+
+def test_publisher_id_known_values():
+    assert appx_manifest.publisher_id(MICROSOFT_CORP) == "8wekyb3d8bbwe"
+    assert appx_manifest.publisher_id(MICROSOFT_WINDOWS) == "cw5n1h2txyewy"
+
+
+def test_parse_identity_and_names():
+    info = appx_manifest.parse(io.BytesIO(MANIFEST))
+    assert (info.name, info.publisher, info.version, info.arch) == ("Contoso.App", "CN=Contoso", "1.2.3.4", "x64")
+    assert info.display_name == "ms-resource:AppName"
+    assert info.logo == "Assets\\StoreLogo.png"
+    assert info.family_name == f"Contoso.App_{appx_manifest.publisher_id('CN=Contoso')}"
+    assert info.full_name == f"Contoso.App_1.2.3.4_x64__{appx_manifest.publisher_id('CN=Contoso')}"
+
+
+def test_parse_dependencies_apps_and_capabilities():
+    # 解析在 <Capabilities> 结束后停止，后面损坏的 <Extensions> 不会报错
+    info = appx_manifest.parse(io.BytesIO(MANIFEST))
+    assert [(d.name, d.min_version, d.optional) for d in info.dependencies] == [
+        ("Microsoft.VCLibs.140.00", "14.0.30704.0", False), ("Optional.Thing", "1.0.0.0", True)]
+    assert info.target_families == [("Windows.Desktop", "10.0.17763.0")]
+    assert info.app_ids == ["App"]
+    assert info.logos["Square44x44Logo"] == "Assets\\Square44.png"
+    assert info.capabilities == ["internetClient", "runFullTrust"]
+
+
+def test_load_is_memoized_until_the_file_changes(tmp_path):
+    path = tmp_path / appx_manifest.MANIFEST_NAME
+    path.write_bytes(MANIFEST)
+    first = appx_manifest.load(tmp_path)
+    assert appx_manifest.load(tmp_path) is first
+    path.write_bytes(MANIFEST.replace(b"1.2.3.4", b"1.2.3.50"))
+    assert appx_manifest.load(tmp_path).version == "1.2.3.50"
+    assert appx_manifest.load(tmp_path / "missing") is None
@@ -0,0 +1,100 @@
+import pathlib, time
+
+import pytest
+
+import appx_pri
+import bench
+
+FIXTURE = pathlib.Path(__file__).parent / "data" / "pri"
+
+STRINGS = {
+    "AppName": {"en-US": "Notes", "zh-CN": "便笺", "fr": "Bloc-notes"},
+    "Untranslated": {"": "Only one"},
+}
+FILES = {"Assets/Logo.png": {100: "Assets\\Logo.scale-100.png", 200: "Assets\\Logo.scale-200.png"}}
+
+
+@pytest.fixture
+def app(tmp_path):
+    bench.make_pri(tmp_path / appx_pri.PRI_NAME, STRINGS, FILES)
+    return tmp_path
+
+
+@pytest.mark.parametrize("languages, expected", [
+    (["en-US"], "Notes"), (["zh-Hans-CN"], "便笺"), (["zh-CN", "en-US"], "便笺"),
+    (["fr-CA"], "Bloc-notes"), (["de-DE", "en-GB"], "Notes")])
+def test_display_name_follows_language_preference(app, languages, expected):
+    assert appx_pri.lookup_string(app, "ms-resource:AppName", languages) == expected
+
+
+def test_reference_forms(app):
+    for ref in ("ms-resource:AppName", "ms-resource:///Resources/AppName",
+                "ms-resource://Bench.App/Resources/AppName", "ms-resource:Resources/AppName"):
+        assert appx_pri.lookup_string(app, ref, ["en-US"]) == "Notes", ref
+    assert appx_pri.lookup_string(app, "ms-resource:Untranslated", ["zh-CN"]) == "Only one"
+    assert appx_pri.lookup_string(app, "ms-resource:Missing") is None
+    assert appx_pri.lookup_string(app.parent / "no-such-app", "ms-resource:AppName") is None
+
+
+@pytest.mark.parametrize("scale, expected", [(100, "Logo.scale-100.png"), (200, "Logo.scale-200.png"),
+                                             (150, "Logo.scale-200.png"), (400, "Logo.scale-200.png")])
+def test_logo_follows_scale(app, scale, expected):
+    assert appx_pri.lookup_file(app, "Assets\\Logo.png", scale) == f"Assets\\{expected}"
+    assert appx_pri.lookup_file(app, "Assets\\Missing.png", scale) is None
+
+
+def test_deadline(app):
+    with pytest.raises(appx_pri.PriTimeout):
+        appx_pri.lookup_string(app, "ms-resource:AppName", deadline=time.monotonic() - 1)
+
+
+def test_unknown_section_version_is_not_an_error(app):
+    path = app / appx_pri.PRI_NAME
+    path.write_bytes(path.read_bytes().replace(b"[mrm_res_map2_]\0", b"[mrm_res_map3_]\0"))
+    assert appx_pri.lookup_string(app, "ms-resource:AppName") is None
+    assert appx_pri.lookup_file(app, "Assets\\Logo.png") is None
+
+
+def test_unknown_file_version_is_not_an_error(app):
+    path = app / appx_pri.PRI_NAME
+    path.write_bytes(b"mrm_pri9" + path.read_bytes()[8:])
+    assert appx_pri.lookup_string(app, "ms-resource:AppName") is None
+
+
+def test_corrupt_file_raises(app):
+    path = app / appx_pri.PRI_NAME
+    path.write_bytes(b"not a pri file" * 10)
+    with pytest.raises(appx_pri.PriError):
+        appx_pri.lookup_string(app, "ms-resource:AppName")
+
+
+# --------------------------------------------------
+# makepri.exe 生成的参考文件（生成方法见 tests/data/pri/README.md）
+# --------------------------------------------------
+@pytest.fixture(scope="module")
+def makepri_app():
+    # 参考文件是这组测试的前提，缺少时直接失败而不是跳过
+    if not (FIXTURE / appx_pri.PRI_NAME).is_file():
+        pytest.fail("tests/data/pri/resources.pri is missing; generate it with makepri.exe "
+                    "as described in tests/data/pri/README.md", pytrace=False)
+    return FIXTURE
+
+
+@pytest.mark.parametrize("languages, expected", [
+    (["en-US"], "Fixture Notes"), (["zh-CN"], "示例便笺"), (["zh-Hans"], "示例便笺"),
+    (["en-GB"], "Fixture Notes")])
+def test_makepri_display_name(makepri_app, languages, expected):
+    assert appx_pri.lookup_string(makepri_app, "ms-resource:AppName", languages) == expected
+    assert appx_pri.lookup_string(makepri_app, "ms-resource:///Resources/AppName", languages) == expected
+
+
+def test_makepri_description(makepri_app):
+    assert appx_pri.lookup_string(makepri_app, "ms-resource:AppDescription", ["zh-CN"]) == "PRI 测试用的便笺"
+    assert appx_pri.lookup_string(makepri_app, "ms-resource:Missing", ["en-US"]) is None
+
+
+@pytest.mark.parametrize("scale, expected", [(100, "Logo.scale-100.png"), (200, "Logo.scale-200.png")])
+def test_makepri_logo(makepri_app, scale, expected):
+    found = appx_pri.lookup_file(makepri_app, "Assets\\Logo.png", scale)
+    assert found is not None and found.replace("/", "\\").lower() == f"assets\\{expected}".lower()
+    assert (makepri_app / "project" / found.replace("\\", "/")).is_file()
@@ -0,0 +1,54 @@
+import pytest
+
+import appx_reader
+import appx_writer
+import uwp_core
+from conftest import write_app
+
+
+@pytest.fixture
+def package(tmp_path):
+    src = write_app(tmp_path / "src", "Inspect.Me", files={"Assets/Logo.png": b"png" * 100,
+                                                           "a/b/c.txt": "hello"})
+    out = tmp_path / "out" / f"{src.name}.appx"
+    out.parent.mkdir()
+    appx_writer.pack_directory(src, out)
+    return out
+
+
+def test_archive_lists_identity_and_files(package):
+    with appx_reader.PackageArchive(package) as pkg:
+        assert pkg.manifest.name == "Inspect.Me"
+        assert not pkg.is_signed
+        assert sorted(e.path for e in pkg.files) == ["AppxManifest.xml", "Assets/Logo.png", "a/b/c.txt"]
+        assert pkg.entry("A\\B\\C.TXT").path == "a/b/c.txt"
+        assert pkg.entry("missing") is None
+
+
+def test_extract_single_file(package, tmp_path):
+    with appx_reader.PackageArchive(package) as pkg:
+        dest = pkg.extract("a/b/c.txt", tmp_path / "x")
+    assert dest == (tmp_path / "x" / "a" / "b" / "c.txt").resolve()
+    assert dest.read_text() == "hello"
+
+
+@pytest.mark.parametrize("name", ["../evil.txt", "a/../../evil.txt", "C:/Windows/evil.dll", "C:evil",
+                                  "a/file.txt:stream", "..", "."])
+def test_extract_rejects_paths_outside_the_destination(package, tmp_path, name):
+    with appx_reader.PackageArchive(package) as pkg:
+        entry = appx_reader.ZipEntry(name, 0, 0, 0, 0, 0, pkg.entries[0].offset)
+        with pytest.raises(appx_reader.PackageError):
+            pkg.extract(entry, tmp_path / "x")
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_list_archives_skips_work_files(package):
+    out_dir = package.parent
+    (out_dir / f"Other{uwp_core.PARTIAL_SUFFIX}").write_bytes(package.read_bytes())
+    (out_dir / uwp_core.JOURNAL_NAME).write_text("{}\n")
+    (out_dir / "broken.msix").write_bytes(b"not a zip")
+    archives = uwp_core.list_archives(out_dir)
+    by_name = {a.path.name: a for a in archives}
+    assert sorted(by_name) == sorted(["broken.msix", package.name])
+    assert by_name["broken.msix"].error and by_name["broken.msix"].manifest is None
+    assert by_name[package.name].manifest.name == "Inspect.Me" and by_name[package.name].files == 3
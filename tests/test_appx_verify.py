@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import appx_reader
+import appx_writer
+from conftest import write_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return write_app(tmp_path / "src", "Round.Trip", files={
+        "Assets/Logo.png": os.urandom(3000),                      # 按扩展名直接存储
+        "data/big.bin": b"0123456789abcdef" * 20000,              # 跨越多个 64 KiB 块
+        "data/empty.txt": b"",
+        "名字 with space/100%#[x].txt": "unicode + reserved characters",
+        "AppxBlockMap.xml": "<stale/>",                           # 足迹文件不应进入负载
+    })
+
+
+def test_round_trip_verifies_against_source(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out, workers=2)
+    res = appx_reader.verify_package(out, app, workers=2)
+    assert res.ok, res.errors
+    assert res.files == 5 and res.blocks == 1 + 5 + 1 + 1
+
+
+def test_zip64_package_verifies(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(appx_writer, "_ZIP64_FILE_LIMIT", 100000)
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    res = appx_reader.verify_package(out, app)
+    assert res.ok, res.errors
+
+
+def test_corruption_is_reported(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    with appx_reader.PackageArchive(out) as pkg:
+        offset = pkg.entry("data/big.bin").offset
+    data = bytearray(out.read_bytes())
+    data[offset + 200] ^= 0xFF
+    out.write_bytes(bytes(data))
+    res = appx_reader.verify_package(out)
+    assert not res.ok
+    assert any("big.bin" in e for e in res.errors)
+
+
+def test_truncated_package_is_reported(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    out.write_bytes(out.read_bytes()[:-30])
+    res = appx_reader.verify_package(out)
+    assert not res.ok and "central directory" in res.errors[0]
+
+
+def test_source_changes_are_reported(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    (app / "data/new.txt").write_text("added")
+    (app / "data/big.bin").write_bytes(b"shorter")
+    res = appx_reader.verify_package(out, app)
+    assert not res.ok
+    text = " ".join(res.errors)
+    assert "new.txt" in text and "big.bin" in text
@@ -0,0 +1,82 @@
+import os, zipfile
+
+import pytest
+
+import appx_reader
+import appx_writer
+from conftest import write_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return write_app(tmp_path / "src", "Round.Trip", files={
+        "Assets/Logo.png": os.urandom(3000),                      # 按扩展名直接存储
+        "data/big.bin": b"0123456789abcdef" * 20000,              # 跨越多个 64 KiB 块
+        "data/empty.txt": b"",
+        "名字 with space/100%#[x].txt": "unicode + reserved characters",
+        "AppxBlockMap.xml": "<stale/>",                           # 足迹文件不应进入负载
+    })
+
+
+def test_round_trip_through_zipfile(app, tmp_path):
+    out = tmp_path / "out.appx"
+    stats = appx_writer.pack_directory(app, out, workers=2)
+    assert stats.files == 5 + 2          # 加上 AppxBlockMap.xml 与 [Content_Types].xml
+    # 标准 zipfile 能读出相同内容
+    with zipfile.ZipFile(out) as z:
+        assert z.testzip() is None
+        assert z.read("data/big.bin") == (app / "data/big.bin").read_bytes()
+        assert z.read("data/empty.txt") == b""
+
+
+def test_opc_part_names_round_trip(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    with appx_reader.PackageArchive(out) as pkg:
+        names = {e.name for e in pkg.entries}
+        paths = {e.path for e in pkg.entries}
+        assert appx_writer.part_name("名字 with space/100%#[x].txt") in names
+        assert "名字 with space/100%#[x].txt" in paths
+        assert "%" in appx_writer.part_name("100%.txt") and " " not in appx_writer.part_name("a b")
+        # 足迹文件只有打包器生成的一份
+        assert sum(1 for e in pkg.entries if e.path.lower() == "appxblockmap.xml") == 1
+        assert pkg.read("名字 with space/100%#[x].txt") == b"unicode + reserved characters"
+
+
+def test_block_map_lists_every_payload_block(app, tmp_path):
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    with appx_reader.PackageArchive(out) as pkg:
+        block_map = {f.name: f for f in appx_reader.parse_block_map(pkg.read(appx_reader.BLOCKMAP_NAME))}
+    big = block_map["data\\big.bin"]
+    assert big.size == 320000 and len(big.blocks) == 5
+    assert block_map["data\\empty.txt"].blocks == []
+    # 存储的文件没有压缩后大小
+    assert all(size is None for _, size in block_map["Assets\\Logo.png"].blocks)
+
+
+def test_zip64_entries_have_matching_local_and_central_records(app, tmp_path, monkeypatch):
+    # 把 Zip64 门限调低，用小文件走 Zip64 路径
+    monkeypatch.setattr(appx_writer, "_ZIP64_FILE_LIMIT", 100000)
+    out = tmp_path / "out.appx"
+    appx_writer.pack_directory(app, out)
+    with zipfile.ZipFile(out) as z:
+        info = z.getinfo("data/big.bin")
+        assert info.file_size == 320000
+        # 中央目录带 Zip64 扩展（0x0001，两个 64 位大小）
+        assert info.extra[:4] == b"\x01\x00\x10\x00"
+        assert z.read("data/big.bin") == (app / "data/big.bin").read_bytes()
+
+
+def test_failed_close_removes_the_partial_package(app, tmp_path, monkeypatch):
+    def disk_full(self):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(appx_writer.AppxWriter, "_write_central_directory", disk_full)
+    out = tmp_path / "out.appx"
+    writer = appx_writer.AppxWriter(out)
+    with pytest.raises(OSError):
+        with writer:
+            writer.add_file(app / "data/big.bin", "data/big.bin")
+    assert not out.exists()
+    assert writer._pool is None and writer._fp is None
@@ -0,0 +1,49 @@
+import uwp_core
+from conftest import item_for, write_app
+
+
+def test_catalog_tracks_fingerprint_size_and_signature(tmp_path):
+    src = write_app(tmp_path / "src", "Catalog.Me", files={"a.txt": "a"})
+    item = item_for(src)
+    scan = uwp_core.scan_tree(src)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    appx = out_dir / f"{src.name}.appx"
+    appx.write_bytes(b"package")
+
+    catalog = uwp_core.BackupCatalog(out_dir)
+    assert not catalog.is_current(item, scan, signed=False)
+    catalog.record(item, scan, appx)
+    catalog.save()
+
+    catalog = uwp_core.BackupCatalog(out_dir)
+    entry = catalog.entries[item.pkg_fullname]
+    assert entry["sha256"] == uwp_core.file_sha256(appx) and entry["cert"] is None
+    assert catalog.is_current(item, scan, signed=False)
+    # 要求签名但上次没有签名
+    assert not catalog.is_current(item, scan, signed=True)
+
+    cer = out_dir / f"{src.name}.cer"
+    cer.write_bytes(b"cert")
+    catalog.record(item, scan, appx, cer, "CN=Test")
+    assert catalog.is_current(item, scan, signed=True)
+    assert catalog.entries[item.pkg_fullname]["cert"]["publisher"] == "CN=Test"
+
+    appx.write_bytes(b"changed package")
+    assert not catalog.is_current(item, scan, signed=True)
+
+
+def test_changed_source_is_not_current(tmp_path):
+    src = write_app(tmp_path / "src", "Catalog.Me", files={"a.txt": "a"})
+    item = item_for(src)
+    appx = tmp_path / f"{src.name}.appx"
+    appx.write_bytes(b"package")
+    catalog = uwp_core.BackupCatalog(tmp_path)
+    catalog.record(item, uwp_core.scan_tree(src), appx)
+    (src / "b.txt").write_text("new file")
+    assert not catalog.is_current(item, uwp_core.scan_tree(src), signed=False)
+
+
+def test_unknown_catalog_version_is_ignored(tmp_path):
+    (tmp_path / uwp_core.CATALOG_NAME).write_text('{"version": 999, "packages": {"x": {}}}')
+    assert uwp_core.BackupCatalog(tmp_path).entries == {}
@@ -0,0 +1,39 @@
+import uwp_core
+from conftest import item_for, write_app
+
+
+def test_dependencies_are_added_once_and_matched_by_version_and_arch(tmp_path):
+    old = item_for(write_app(tmp_path, "Framework.VCLibs", "14.0.1.0", framework=True))
+    new = item_for(write_app(tmp_path, "Framework.VCLibs", "14.0.9.0", framework=True))
+    x86 = item_for(write_app(tmp_path, "Framework.VCLibs", "14.0.9.0", arch="x86", framework=True))
+    a = item_for(write_app(tmp_path, "App.A", deps=[("Framework.VCLibs", "14.0.5.0")]))
+    b = item_for(write_app(tmp_path, "App.B", deps=[("Framework.VCLibs", "14.0.0.0"), ("Not.Installed", "1.0")]))
+    plan = uwp_core.plan_dependencies([a, b], [old, new, x86, a, b])
+    assert plan.items == [a, b, new]
+    assert plan.added == [new]
+    assert plan.deps == {0: [2], 1: [2]}
+    assert [(it.pkg_fullname, dep.name) for it, dep in plan.missing] == [(b.pkg_fullname, "Not.Installed")]
+
+
+def test_transitive_dependencies(tmp_path):
+    base = item_for(write_app(tmp_path, "Base", framework=True))
+    mid = item_for(write_app(tmp_path, "Mid", deps=[("Base", "1.0.0.0")], framework=True))
+    app = item_for(write_app(tmp_path, "App", deps=[("Mid", "1.0.0.0")]))
+    plan = uwp_core.plan_dependencies([app], [base, mid, app])
+    assert plan.items == [app, mid, base]
+    assert plan.deps == {0: [1], 1: [2]}
+
+
+def test_cycles_are_broken(tmp_path):
+    a = item_for(write_app(tmp_path, "Cycle.A", deps=[("Cycle.B", "1.0.0.0")]))
+    b = item_for(write_app(tmp_path, "Cycle.B", deps=[("Cycle.A", "1.0.0.0")]))
+    c = item_for(write_app(tmp_path, "Plain", deps=[]))
+    plan = uwp_core.plan_dependencies([a, c], [a, b, c])
+    assert plan.items == [a, c, b]
+    # 环上的边被去掉，剩下的依赖图可以拓扑排序
+    assert plan.deps == {}
+
+
+def test_version_key_orders_numerically():
+    assert uwp_core.version_key("1.10.0.0") > uwp_core.version_key("1.9.0.0")
+    assert uwp_core.version_key("1.0.0.0") < uwp_core.version_key("1.0.0.1")
@@ -0,0 +1,92 @@
+import os, pathlib
+
+import pytest
+
+import appx_writer
+import uwp_core
+from conftest import item_for, write_app
+
+
+@pytest.fixture
+def job(tmp_path):
+    """一个已安装的包、它的源目录扫描结果和打包好的临时包。"""
+    src = write_app(tmp_path / "src", "Resume.Me", files={"data.bin": b"x" * 5000})
+    item = item_for(src)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    work = out_dir / f"{src.name}{uwp_core.PARTIAL_SUFFIX}"
+    appx_writer.pack_directory(src, work)
+    return item, uwp_core.scan_tree(src), work
+
+
+def test_resume_after_restart(job):
+    item, scan, work = job
+    uwp_core.JobJournal(work.parent).mark(item, uwp_core.STAGE_PACKED, scan, work)
+    # 新实例（相当于重新启动）从日志文件恢复状态
+    journal = uwp_core.JobJournal(work.parent)
+    assert journal.resume_stage(item, scan) == uwp_core.STAGE_PACKED
+    assert journal.record(item.pkg_fullname)["size"] == work.stat().st_size
+
+
+def test_changed_source_restarts_from_scratch(job):
+    item, scan, work = job
+    uwp_core.JobJournal(work.parent).mark(item, uwp_core.STAGE_PACKED, scan, work)
+    (pathlib.Path(item.install_path) / "data.bin").write_bytes(b"changed")
+    journal = uwp_core.JobJournal(work.parent)
+    assert journal.resume_stage(item, uwp_core.scan_tree(pathlib.Path(item.install_path))) is None
+
+
+def test_missing_or_truncated_output_restarts_from_scratch(job):
+    item, scan, work = job
+    uwp_core.JobJournal(work.parent).mark(item, uwp_core.STAGE_PACKED, scan, work)
+    work.write_bytes(work.read_bytes()[:-1])
+    assert uwp_core.JobJournal(work.parent).resume_stage(item, scan) is None
+    work.unlink()
+    assert uwp_core.JobJournal(work.parent).resume_stage(item, scan) is None
+
+
+def test_deleted_certificate_resumes_from_packed(job):
+    item, scan, work = job
+    cer = work.parent / "Resume.cer"
+    cer.write_bytes(b"cert")
+    journal = uwp_core.JobJournal(work.parent)
+    journal.mark(item, uwp_core.STAGE_PACKED, scan, work)
+    journal.mark(item, uwp_core.STAGE_CERT, scan, work, publisher="CN=Test", cer=cer.name)
+    assert uwp_core.JobJournal(work.parent).resume_stage(item, scan) == uwp_core.STAGE_CERT
+    cer.unlink()
+    assert uwp_core.JobJournal(work.parent).resume_stage(item, scan) == uwp_core.STAGE_PACKED
+
+
+def test_torn_last_line_is_ignored(job):
+    item, scan, work = job
+    uwp_core.JobJournal(work.parent).mark(item, uwp_core.STAGE_PACKED, scan, work)
+    with open(work.parent / uwp_core.JOURNAL_NAME, "a", encoding="utf-8") as f:
+        f.write('{"pkg": "Other", "stage": "sig')
+    journal = uwp_core.JobJournal(work.parent)
+    assert list(journal.state) == [item.pkg_fullname]
+    assert journal.resume_stage(item, scan) == uwp_core.STAGE_PACKED
+
+
+def test_compact_drops_finished_packages(job):
+    item, scan, work = job
+    journal = uwp_core.JobJournal(work.parent)
+    journal.mark(item, uwp_core.STAGE_PACKED, scan, work)
+    journal.compact([])
+    assert list(uwp_core.JobJournal(work.parent).state) == [item.pkg_fullname]
+    journal.compact([item.pkg_fullname])
+    assert not (work.parent / uwp_core.JOURNAL_NAME).exists()
+
+
+def test_scheduler_resumes_without_repacking(job, fake_tools):
+    item, scan, work = job
+    uwp_core.JobJournal(work.parent).mark(item, uwp_core.STAGE_PACKED, scan, work)
+    inode = os.stat(work).st_ino
+    cfg = uwp_core.BatchConfig(skip_sign=True, packer=uwp_core.PACKER_BUILTIN, trace=False,
+                               check_space=False)
+    logs = []
+    results = uwp_core.BatchScheduler([item], work.parent, cfg, on_log=logs.append).run()
+    assert [r.status for r in results] == [uwp_core.JOB_DONE], logs
+    final = work.parent / f"{pathlib.Path(item.install_path).name}.appx"
+    assert not work.exists() and os.stat(final).st_ino == inode
+    assert not (work.parent / uwp_core.JOURNAL_NAME).exists()
+    assert uwp_core.BackupCatalog(work.parent).is_current(item, scan, signed=False)
@@ -0,0 +1,25 @@
+import uwp_core
+from conftest import item_for, write_app
+
+
+def test_parse_search_query_fields():
+    assert uwp_core.parse_search_query("pub:Contoso  Café arch:X64 foo:bar") == [
+        ("pub", "contoso"), (None, "cafe"), ("arch", "x64"), (None, "foo:bar")]
+    assert uwp_core.parse_search_query("   ") == []
+
+
+def test_index_updates_incrementally(tmp_path):
+    a = item_for(write_app(tmp_path, "Contoso.Notes", publisher="CN=Contoso"))
+    b = item_for(write_app(tmp_path, "Fabrikam.Paint", arch="x86", publisher="CN=Fabrikam"))
+    index = uwp_core.SearchIndex([a])
+    assert index.match("") is None
+    assert index.match("paint") == set()
+    index.add([b])
+    assert index.match("paint") == {b.pkg_fullname}
+    assert index.match("arch:x86") == {b.pkg_fullname}
+    assert index.match("pub:contoso notes") == {a.pkg_fullname}
+    # 显示名解析后再次加入同一个包，只更新它自己的条目
+    a.name = "Ｎｏｔｅｓ Ｐｒｏ"
+    index.add([a])
+    assert len(index.entries) == 2
+    assert index.match("notes pro") == {a.pkg_fullname}
@@ -0,0 +1,55 @@
+import pathlib
+
+import uwp_core
+from conftest import item_for, write_app
+
+SIGNTOOL_OUTPUT = r"""Done Adding Additional Store
+Successfully signed: C:\out\A.partial.appx
+SignTool Error: This file format cannot be signed because it is not recognized.
+SignTool Error: An error occurred while attempting to sign: C:\out\B.partial.appx
+Successfully signed: c:\OUT\c.partial.appx
+
+Number of files successfully Signed: 2
+Number of warnings: 0
+Number of errors: 1
+"""
+
+
+def test_parse_sign_output_per_file():
+    files = [r"C:\out\A.partial.appx", r"C:\out\B.partial.appx", r"C:\out\C.partial.appx",
+             r"C:\out\D.partial.appx"]
+    res = uwp_core.parse_sign_output(SIGNTOOL_OUTPUT, files)
+    assert res[files[0]] == ""
+    assert "cannot be signed" in res[files[1]]
+    assert res[files[3]], "files not mentioned in the output count as failed"
+    if uwp_core.os.name == "nt":
+        # 路径比较不区分大小写（与 Windows 一致）
+        assert res[files[2]] == ""
+
+
+def test_parse_sign_output_without_details():
+    res = uwp_core.parse_sign_output(
+        "SignTool Error: An error occurred while attempting to sign: /out/x.appx\n", ["/out/x.appx"])
+    assert "attempting to sign" in res["/out/x.appx"]
+
+
+def test_chunk_sign_files_respects_count_and_length():
+    files = [f"/out/{i:02d}.appx" for i in range(10)]
+    assert [len(c) for c in uwp_core.chunk_sign_files(files, chunk=4)] == [4, 4, 2]
+    chunks = list(uwp_core.chunk_sign_files(files, chunk=100, max_chars=50))
+    assert sum(chunks, []) == files
+    assert all(sum(len(f) + 3 for f in c) <= 50 for c in chunks)
+
+
+def test_scheduler_signs_in_one_batch(tmp_path, fake_tools, monkeypatch):
+    calls = []
+    signtool = fake_tools._signtool
+    monkeypatch.setattr(fake_tools, "_signtool", lambda args, sess: calls.append(args) or signtool(args, sess))
+    items = [item_for(write_app(tmp_path / "src", f"Sign.Me{i}", files={"a.txt": str(i)})) for i in range(3)]
+    cfg = uwp_core.BatchConfig(packer=uwp_core.PACKER_BUILTIN, trace=False, check_space=False)
+    logs = []
+    results = uwp_core.BatchScheduler(items, tmp_path / "out", cfg, on_log=logs.append).run()
+    assert [r.status for r in results] == [uwp_core.JOB_DONE] * 3, logs
+    # 同一 Publisher 的包合并为一次 signtool 调用，成品已替换为最终名
+    assert len(calls) == 1
+    assert all((tmp_path / "out" / f"{pathlib.Path(it.install_path).name}.appx").exists() for it in items)
@@ -0,0 +1,25 @@
+import subprocess, sys
+
+import uwp_core
+from conftest import ROOT, item_for, write_app
+
+
+def test_core_imports_without_qt():
+    # 核心库与命令行不应拉入 Qt；在独立进程中检查，避免受其它测试已导入模块的影响
+    code = ("import sys, uwp_core, uwp_cli; "
+            "sys.exit(1 if any(m.startswith('PyQt') for m in sys.modules) else 0)")
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_batch_runs_more_packages_than_workers(tmp_path, fake_tools):
+    items = [item_for(write_app(tmp_path / "src", f"Batch.App{i}", files={"a.txt": str(i)})) for i in range(6)]
+    statuses = []
+    cfg = uwp_core.BatchConfig(workers=2, pack_limit=1, skip_sign=True, packer=uwp_core.PACKER_BUILTIN,
+                               trace=False, check_space=False)
+    results = uwp_core.BatchScheduler(items, tmp_path / "out", cfg,
+                                      on_status=lambda idx, status: statuses.append((idx, status)),
+                                      on_log=lambda msg: None).run()
+    assert [r.status for r in results] == [uwp_core.JOB_DONE] * len(items)
+    assert {idx for idx, status in statuses if status == uwp_core.JOB_PACKING} == set(range(len(items)))
+    assert sorted(p.name for p in (tmp_path / "out").glob("*.appx")) == \
+        sorted(f"{p.name}.appx" for p in (tmp_path / "src").iterdir())
@@ -0,0 +1,67 @@
+import threading, time
+
+import pytest
+
+import toolrun
+import uwp_core
+from conftest import item_for, write_app
+
+
+@pytest.fixture
+def slow_tools():
+    """模拟的 makeappx 每个包要跑约一分半，只有取消才能让它提前结束。"""
+    prev = toolrun._backend
+    toolrun.set_backend(toolrun.FakeBackend(rate_mb_s=0.001))
+    yield toolrun.get_backend()
+    toolrun.set_backend(prev)
+
+
+def _scheduler(tmp_path, packing: threading.Event, count: int = 4):
+    items = [item_for(write_app(tmp_path / "src", f"Slow.App{i}", files={"big.bin": b"x" * 100000}))
+             for i in range(count)]
+    cfg = uwp_core.BatchConfig(workers=2, pack_limit=2, skip_sign=True, packer=uwp_core.PACKER_MAKEAPPX,
+                               trace=False, check_space=False)
+
+    def on_status(idx, status):
+        if status == uwp_core.JOB_PACKING:
+            packing.set()
+
+    return uwp_core.BatchScheduler(items, tmp_path / "out", cfg, on_status=on_status, on_log=lambda msg: None)
+
+
+def test_fake_tool_stops_on_cancel(tmp_path, slow_tools):
+    src = write_app(tmp_path, "Slow.One", files={"big.bin": b"x" * 100000})
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(toolrun.ToolCancelled):
+        toolrun.run(["makeappx.exe", "pack", "-d", str(src), "-p", str(tmp_path / "x.appx")], cancel=cancel)
+    assert time.monotonic() - start < 5
+
+
+def test_cancel_stops_running_jobs(tmp_path, slow_tools):
+    packing = threading.Event()
+    scheduler = _scheduler(tmp_path, packing)
+    threading.Thread(target=lambda: packing.wait(10) and scheduler.cancel(), daemon=True).start()
+    start = time.monotonic()
+    results = scheduler.run()
+    assert time.monotonic() - start < 10
+    assert [r.status for r in results] == [uwp_core.JOB_CANCELLED] * len(results)
+
+
+def test_keyboard_interrupt_cancels_running_and_queued_jobs(tmp_path, slow_tools, monkeypatch):
+    packing = threading.Event()
+    scheduler = _scheduler(tmp_path, packing)
+
+    def interrupted():
+        # 相当于主线程在等待打包结束时收到 Ctrl+C
+        packing.wait(10)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scheduler, "_wait_packs", interrupted)
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run()
+    assert time.monotonic() - start < 10
+    assert [r.status for r in scheduler.results] == [uwp_core.JOB_CANCELLED] * len(scheduler.results)
+    assert not list((tmp_path / "out").glob("*.appx"))
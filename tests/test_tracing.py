@@ -0,0 +1,78 @@
+import json, threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+import uwp_core
+from conftest import item_for, write_app
+
+
+def test_tracers_on_two_threads_stay_separate():
+    tracers = {name: tracing.Tracer(name) for name in ("a", "b")}
+    barrier = threading.Barrier(2)
+    after = {}
+
+    def worker(name):
+        with tracers[name].activate():
+            for i in range(3):
+                # 两个线程交替进入，任何一方的激活都不能影响另一方
+                barrier.wait()
+                with tracing.span(f"{name}.step", i=i):
+                    barrier.wait()
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for f in [pool.submit(tracing.bind(_record), f"{name}.pool") for _ in range(4)]:
+                    f.result()
+            barrier.wait()
+        after[name] = tracing.current()
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in tracers]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    for name, tracer in tracers.items():
+        names = [ev["name"] for ev in tracer.events]
+        assert names == [f"{name}.step"] * 3 + [f"{name}.pool"] * 4
+    assert after == {"a": None, "b": None}
+    assert tracing.current() is None
+
+
+def _record(name):
+    with tracing.span(name):
+        pass
+
+
+def test_unbound_pool_tasks_are_not_traced():
+    tracer = tracing.Tracer()
+    with tracer.activate():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(_record, "lost").result()
+    assert tracer.events == []
+
+
+def test_batch_gets_its_own_trace_while_another_is_active(tmp_path, fake_tools):
+    items = [item_for(write_app(tmp_path / "src", f"Trace.App{i}")) for i in range(2)]
+    path = tmp_path / "batch.json"
+    cfg = uwp_core.BatchConfig(skip_sign=True, packer=uwp_core.PACKER_BUILTIN, check_space=False,
+                               trace_path=str(path))
+    enumerate_tracer = tracing.Tracer("enumerate")
+    started, release = threading.Event(), threading.Event()
+
+    def enumeration():
+        # 模拟界面启动时仍在运行的枚举线程
+        with enumerate_tracer.activate():
+            with tracing.span("enumerate"):
+                started.set()
+                release.wait(10)
+
+    th = threading.Thread(target=enumeration)
+    th.start()
+    started.wait(10)
+    try:
+        results = uwp_core.BatchScheduler(items, tmp_path / "out", cfg, on_log=lambda msg: None).run()
+    finally:
+        release.set()
+        th.join()
+    assert [r.status for r in results] == [uwp_core.JOB_DONE] * 2
+    assert [ev["name"] for ev in enumerate_tracer.events] == ["enumerate"]
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    assert sum(1 for ev in events if ev["name"] == "pack") == 2
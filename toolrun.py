@@ -0,0 +1,300 @@
+"""外部工具执行层：逐行流式读取输出、按工具设置超时、可随时取消并结束整个进程树。
+
+执行后端可替换：默认 ProcessBackend 真正启动 makeappx/signtool 等 exe；
+设置环境变量 UWP_TOOL_BACKEND=fake（或调用 set_backend(FakeBackend())）后改用
+FakeBackend，按真实工具的输出格式模拟执行，在 Linux 上也能跑通并测量整条流水线。
+"""
+import os, pathlib, re, signal, subprocess, threading, time
+from collections import deque
+
+import appx_writer
+
+# 各工具的默认超时（秒），按 exe 名（不含扩展名、小写）查找
+TOOL_TIMEOUTS = {
+    "makeappx": 3600,
+    "signtool": 900,
+    "makecert": 120,
+    "pvk2pfx": 120,
+}
+DEFAULT_TIMEOUT = 600
+# 只保留最后若干行输出用于报错与结果解析，避免大量输出占满内存
+KEEP_LINES = 2000
+# 等待进程时检查取消/超时的间隔
+POLL_INTERVAL = 0.1
+
+
+class ToolError(RuntimeError):
+    pass
+
+
+class ToolTimeout(ToolError):
+    pass
+
+
+class ToolCancelled(ToolError):
+    pass
+
+
+class ToolResult:
+    def __init__(self, returncode: int, lines):
+        self.returncode = returncode
+        self.lines = list(lines)
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.lines)
+
+    def tail(self, n: int = 20) -> str:
+        return "\n".join(line for line in self.lines[-n:] if line.strip())
+
+
+def tool_name(cmd) -> str:
+    return pathlib.Path(str(cmd[0])).stem.lower()
+
+
+def timeout_for(cmd) -> float:
+    return TOOL_TIMEOUTS.get(tool_name(cmd), DEFAULT_TIMEOUT)
+
+
+def kill_tree(proc: subprocess.Popen):
+    """结束 proc 及其全部子进程。"""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           capture_output=True, timeout=30)
+        else:
+            # 子进程以新会话启动，进程组号即其 pid
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+# --------------------------------------------------
+# 真实进程后端
+# --------------------------------------------------
+class ProcessBackend:
+    needs_binary = True
+
+    def run(self, cmd, cwd=None, timeout=None, cancel: threading.Event = None,
+            on_line=None, keep_lines: int = KEEP_LINES) -> ToolResult:
+        kwargs = {}
+        if os.name != "nt":
+            kwargs["start_new_session"] = True
+        proc = subprocess.Popen([str(c) for c in cmd], stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                text=True, encoding="utf-8", errors="ignore",
+                                cwd=cwd, bufsize=1, **kwargs)
+        lines = deque(maxlen=keep_lines)
+
+        def pump():
+            for line in proc.stdout:
+                line = line.rstrip("\r\n")
+                lines.append(line)
+                if on_line:
+                    on_line(line)
+
+        reader = threading.Thread(target=pump, name=f"{tool_name(cmd)}-out", daemon=True)
+        reader.start()
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                try:
+                    rc = proc.wait(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if cancel is not None and cancel.is_set():
+                    kill_tree(proc)
+                    raise ToolCancelled(f"{tool_name(cmd)} cancelled")
+                if deadline is not None and time.monotonic() > deadline:
+                    kill_tree(proc)
+                    raise ToolTimeout(f"{tool_name(cmd)} timed out after {timeout}s")
+        finally:
+            reader.join(timeout=5)
+            if not reader.is_alive():
+                proc.stdout.close()
+        return ToolResult(rc, lines)
+
+
+# --------------------------------------------------
+# 模拟后端：不启动任何进程，按真实工具的输出格式回放
+# --------------------------------------------------
+class _FakeSession:
+    """一次模拟调用的输出与取消/超时状态。"""
+
+    def __init__(self, name: str, timeout, cancel, on_line, keep_lines: int):
+        self.name = name
+        self.timeout = timeout
+        self.cancel = cancel
+        self.on_line = on_line
+        self.lines = deque(maxlen=keep_lines)
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise ToolCancelled(f"{self.name} cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ToolTimeout(f"{self.name} timed out after {self.timeout}s")
+
+    def emit(self, line: str):
+        self.check()
+        self.lines.append(line)
+        if self.on_line:
+            self.on_line(line)
+
+    def pause(self, seconds: float):
+        # 模拟耗时，但仍能被取消/超时及时打断
+        end = time.monotonic() + seconds
+        if self.deadline is not None:
+            end = min(end, self.deadline)
+        while True:
+            left = end - time.monotonic()
+            if left <= 0:
+                break
+            if self.cancel is not None:
+                if self.cancel.wait(min(left, POLL_INTERVAL)):
+                    break
+            else:
+                time.sleep(min(left, POLL_INTERVAL))
+        self.check()
+
+
+class FakeBackend:
+    """rate_mb_s 为模拟的打包速度（None 表示不限速）；real_output=True 时
+    makeappx 用内置打包器写出真实可读的包，否则只写占位文件。"""
+
+    needs_binary = False
+
+    def __init__(self, rate_mb_s: float = None, real_output: bool = True):
+        self.rate_mb_s = rate_mb_s
+        self.real_output = real_output
+
+    def run(self, cmd, cwd=None, timeout=None, cancel: threading.Event = None,
+            on_line=None, keep_lines: int = KEEP_LINES) -> ToolResult:
+        sess = _FakeSession(tool_name(cmd), timeout, cancel, on_line, keep_lines)
+        handler = getattr(self, "_" + sess.name, None)
+        if handler is None:
+            sess.emit(f"fake backend: unknown tool {cmd[0]}")
+            return ToolResult(1, sess.lines)
+        rc = handler([str(a) for a in cmd[1:]], sess)
+        return ToolResult(rc, sess.lines)
+
+    @staticmethod
+    def _opt(args, *names):
+        for i, a in enumerate(args[:-1]):
+            if a.lower() in names:
+                return args[i + 1]
+        return None
+
+    def _makeappx(self, args, sess: _FakeSession):
+        src, out = self._opt(args, "-d", "/d"), self._opt(args, "-p", "/p")
+        if not src or not out or not os.path.isdir(src):
+            sess.emit(f"MakeAppx : error: Invalid input directory: {src}")
+            return 1
+        for full, rel in appx_writer.iter_payload(pathlib.Path(src)):
+            sess.emit(f'Processing "{full}" as a payload file.  Its path in the package will be "{rel}".')
+            if self.rate_mb_s:
+                sess.pause(full.stat().st_size / (self.rate_mb_s * 1048576))
+        if self.real_output:
+            appx_writer.pack_directory(src, out)
+        else:
+            pathlib.Path(out).write_bytes(b"PK\x05\x06" + b"\0" * 18)
+        sess.emit("Package creation succeeded.")
+        return 0
+
+    def _signtool(self, args, sess: _FakeSession):
+        files = [a for a in args if a.lower().endswith((".appx", ".msix", ".appxbundle", ".msixbundle"))]
+        ok = 0
+        for f in files:
+            if os.path.isfile(f):
+                sess.emit(f"Successfully signed: {f}")
+                ok += 1
+            else:
+                sess.emit("SignTool Error: File not found.")
+                sess.emit(f"SignTool Error: An error occurred while attempting to sign: {f}")
+        sess.emit("")
+        sess.emit(f"Number of files successfully Signed: {ok}")
+        sess.emit("Number of warnings: 0")
+        sess.emit(f"Number of errors: {len(files) - ok}")
+        return 0 if ok == len(files) else 1
+
+    def _makecert(self, args, sess: _FakeSession):
+        pvk = self._opt(args, "-sv", "/sv")
+        if pvk:
+            pathlib.Path(pvk).write_bytes(b"fake pvk")
+        pathlib.Path(args[-1]).write_bytes(b"fake cer")
+        sess.emit("Succeeded")
+        return 0
+
+    def _pvk2pfx(self, args, sess: _FakeSession):
+        pathlib.Path(self._opt(args, "-pfx", "/pfx")).write_bytes(b"fake pfx")
+        return 0
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if os.environ.get("UWP_TOOL_BACKEND", "").lower() == "fake":
+            rate = os.environ.get("UWP_FAKE_TOOL_MBPS")
+            _backend = FakeBackend(rate_mb_s=float(rate) if rate else None)
+        else:
+            _backend = ProcessBackend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def run(cmd, cwd=None, timeout=None, cancel: threading.Event = None, on_line=None,
+        keep_lines: int = KEEP_LINES) -> ToolResult:
+    """执行 cmd，逐行回调 on_line（在读取线程中调用）。
+    timeout 为 None 时按 TOOL_TIMEOUTS 取默认值；超时抛 ToolTimeout，cancel 被置位时抛 ToolCancelled。"""
+    if timeout is None:
+        timeout = timeout_for(cmd)
+    return get_backend().run(cmd, cwd=cwd, timeout=timeout, cancel=cancel,
+                             on_line=on_line, keep_lines=keep_lines)
+
+
+# --------------------------------------------------
+# makeappx 进度解析
+# --------------------------------------------------
+_MAKEAPPX_FILE_RE = re.compile(r'^\s*Processing "(.+?)" as a payload file', re.I)
+
+
+class MakeappxProgress:
+    """解析 makeappx pack /v 的逐文件输出，按已处理字节数换算进度。
+
+    on_progress(done_bytes, total_bytes) 在每处理完一个文件时回调。"""
+
+    def __init__(self, src_dir, on_progress):
+        self.on_progress = on_progress
+        self.sizes = {}
+        for full, _ in appx_writer.iter_payload(pathlib.Path(src_dir)):
+            try:
+                self.sizes[os.path.normcase(str(full))] = full.stat().st_size
+            except OSError:
+                pass
+        self.total = sum(self.sizes.values())
+        self.done = 0
+
+    def feed(self, line: str):
+        m = _MAKEAPPX_FILE_RE.match(line)
+        if not m:
+            return
+        self.done += self.sizes.pop(os.path.normcase(m.group(1)), 0)
+        self.on_progress(self.done, self.total)
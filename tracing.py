@@ -0,0 +1,165 @@
+"""按阶段计时：记录带参数的时间段（span），导出为 Chrome trace JSON，并汇总成表格。
+
+    tracer = Tracer()
+    with tracer.activate():
+        with span("pack", pkg=name) as args:
+            ...
+            args["bytes_out"] = size
+    tracer.export("trace.json")        # chrome://tracing 或 https://ui.perfetto.dev 打开
+    print(tracer.format_summary())
+
+没有激活的 Tracer 时 span() 不做任何记录，开销只有一次 ContextVar 读取。
+激活只对当前线程（上下文）有效，不同线程可以同时激活各自的 Tracer；
+提交到线程池的任务用 bind() 包装后，在工作线程中记录到提交时激活的 Tracer。
+"""
+import contextvars, functools, json, os, pathlib, threading, time
+from contextlib import contextmanager
+
+_active = contextvars.ContextVar("tracing_active", default=None)
+
+
+class Tracer:
+    def __init__(self, name: str = "run"):
+        self.name = name
+        self.events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._threads = {}
+        self.wall_start = time.time()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    @contextmanager
+    def activate(self):
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """记录一个时间段；产出的 args 字典可在段内补充字节数、退出码等。出现异常时记入 error。"""
+        start = self._now_us()
+        try:
+            yield args
+        except GeneratorExit:
+            # 在生成器中使用时，调用方提前停止迭代不算失败
+            raise
+        except BaseException as e:
+            args.setdefault("error", f"{type(e).__name__}: {e}"[:300])
+            raise
+        finally:
+            end = self._now_us()
+            tid = threading.get_ident()
+            with self._lock:
+                if tid not in self._threads:
+                    self._threads[tid] = threading.current_thread().name
+                self.events.append({"name": name, "ts": start, "dur": end - start, "tid": tid,
+                                    "args": args})
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    # ---------- 导出 ----------
+    def to_chrome(self) -> dict:
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        out = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name}}]
+        out += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                for tid, tname in threads.items()]
+        for ev in events:
+            out.append({"name": ev["name"], "cat": ev["name"].split(".")[0], "ph": "X",
+                        "ts": round(ev["ts"], 1), "dur": round(ev["dur"], 1),
+                        "pid": pid, "tid": ev["tid"],
+                        "args": {k: _jsonable(v) for k, v in ev["args"].items()}})
+        return {"traceEvents": out, "displayTimeUnit": "ms",
+                "otherData": {"name": self.name, "started": self.wall_start}}
+
+    def export(self, path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+    # ---------- 汇总 ----------
+    def summary(self) -> list:
+        """按 span 名称汇总：[(名称, 次数, 总秒数, 平均毫秒, 最大毫秒, 字节数, 失败数)]，按总时间降序。"""
+        agg = {}
+        with self._lock:
+            events = list(self.events)
+        for ev in events:
+            a = agg.setdefault(ev["name"], [0, 0.0, 0.0, 0, 0])
+            a[0] += 1
+            a[1] += ev["dur"]
+            a[2] = max(a[2], ev["dur"])
+            args = ev["args"]
+            a[3] += int(args.get("bytes_in") or args.get("bytes") or 0)
+            if args.get("error") or args.get("exit_code") not in (None, 0):
+                a[4] += 1
+        rows = [(name, n, total / 1e6, total / n / 1e3, mx / 1e3, nbytes, failed)
+                for name, (n, total, mx, nbytes, failed) in agg.items()]
+        rows.sort(key=lambda r: r[2], reverse=True)
+        return rows
+
+    def format_summary(self) -> str:
+        wall = self.elapsed()
+        lines = [f"{'stage':<16} {'count':>6} {'total s':>9} {'% wall':>7} {'mean ms':>9} "
+                 f"{'max ms':>9} {'MB':>9} {'failed':>6}"]
+        for name, n, total, mean, mx, nbytes, failed in self.summary():
+            pct = total / wall * 100 if wall > 0 else 0.0
+            mb = f"{nbytes / 1048576:.1f}" if nbytes else ""
+            lines.append(f"{name:<16} {n:>6} {total:>9.2f} {pct:>6.0f}% {mean:>9.1f} "
+                         f"{mx:>9.1f} {mb:>9} {failed or '':>6}")
+        lines.append(f"{'wall':<16} {'':>6} {wall:>9.2f}")
+        return "\n".join(lines)
+
+
+def _jsonable(v):
+    if isinstance(v, (str, int, float, bool)) or v is None:
+        return v
+    return str(v)
+
+
+def current():
+    return _active.get()
+
+
+def bind(fn):
+    """返回在调用时激活当前 Tracer 的 fn，用于提交到线程池；没有激活的 Tracer 时原样返回。"""
+    tracer = _active.get()
+    if tracer is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with tracer.activate():
+            return fn(*args, **kwargs)
+    return run
+
+
+@contextmanager
+def span(name: str, **args):
+    """在当前激活的 Tracer 上记录一个时间段；没有激活时只产出 args。"""
+    tracer = _active.get()
+    if tracer is None:
+        yield args
+        return
+    with tracer.span(name, **args) as a:
+        yield a
+
+
+def prune(directory, keep: int = 20, pattern: str = "trace-*.json"):
+    """只保留 directory 下最新的 keep 个 trace 文件。"""
+    try:
+        files = sorted(pathlib.Path(directory).glob(pattern), key=lambda p: p.stat().st_mtime)
+    except OSError:
+        return
+    for old in files[:-keep] if keep else files:
+        old.unlink(missing_ok=True)
@@ -0,0 +1,286 @@
+"""无界面命令行入口，不导入任何 Qt 模块，适合计划任务与脚本调用。
+
+    python -m uwp_cli list [--cached] [--json] [--match QUERY]
+    python -m uwp_cli extract --all --out DIR [--jobs N] [--skip-sign]
+    python -m uwp_cli extract --match "pub:Microsoft arch:x64" --out DIR
+    python -m uwp_cli extract --pkg <PackageFullName> [--pkg ...] --out DIR
+    python -m uwp_cli extract --all --changed-only --out DIR     # 每晚增量备份
+    python -m uwp_cli extract --pkg <PackageFullName> --no-deps --out DIR   # 不带依赖的框架包
+    python -m uwp_cli extract --all --out DIR --verify             # 打包后逐块校验再保留
+    python -m uwp_cli list --scan-root "D:\\WindowsApps"            # 直接读取清单，不经 PowerShell
+    python -m uwp_cli inspect OUT.appx [--json]                     # 只读中央目录与清单
+    python -m uwp_cli inspect OUT.appx --extract Assets/Logo.png --to DIR
+    python -m uwp_cli inspect DIR                                   # 浏览输出目录中的所有包
+"""
+import argparse, json, pathlib, sys, zlib
+from datetime import datetime
+from typing import List
+import xml.etree.ElementTree as ET
+
+import appx_reader
+import certgen
+import tracing
+import uwp_core
+from uwp_core import (t, UwpItem, BatchConfig, BatchScheduler, SearchIndex,
+                      load_inventory, refresh_inventory, PACKER_MAKEAPPX, PACKER_BUILTIN,
+                      ENUM_POWERSHELL, ENUM_SCAN,
+                      CERT_BACKEND_BUILTIN, CERT_BACKEND_MAKECERT,
+                      JOB_DONE, JOB_SKIPPED, JOB_FAILED, JOB_CANCELLED, format_bytes)
+
+
+def _log(msg):
+    print(f"[{datetime.now():%H:%M:%S}] {msg}", flush=True)
+
+
+def load_items(cached: bool = False, backend: str = None, root: str = None) -> List[UwpItem]:
+    """读取包清单：默认在快照基础上增量刷新，--cached 时直接使用快照；
+    指定 --scan-root 时只扫描该目录（不使用也不更新快照）。"""
+    if root:
+        return refresh_inventory([], backend=ENUM_SCAN, root=root)
+    snapshot = load_inventory()
+    if cached and snapshot:
+        return snapshot
+    return refresh_inventory(snapshot, backend=backend)
+
+
+def select_items(items: List[UwpItem], args) -> List[UwpItem]:
+    if getattr(args, "all", False):
+        return list(items)
+    selected = list(items)
+    if args.match:
+        visible = SearchIndex(selected).match(args.match)
+        if visible is not None:
+            selected = [it for it in selected if it.pkg_fullname in visible]
+    if getattr(args, "pkg", None):
+        wanted = set(args.pkg)
+        selected = [it for it in selected if it.pkg_fullname in wanted]
+    return selected
+
+
+def cmd_list(args) -> int:
+    items = select_items(load_items(args.cached, args.enum, args.scan_root), args)
+    if args.json:
+        json.dump([{"name": it.name, "pkg_fullname": it.pkg_fullname, "version": it.version,
+                    "arch": it.arch, "publisher": it.publisher, "install_path": it.install_path,
+                    "logo": uwp_core.package_logo(it.install_path)}
+                   for it in items], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for it in items:
+            print(f"{it.pkg_fullname}\t{it.version}\t{it.arch}\t{it.name}")
+    return 0
+
+
+def cmd_extract(args) -> int:
+    if not (args.all or args.match or args.pkg):
+        print(t("cli_no_selection"), file=sys.stderr)
+        return 2
+    if args.no_trace:
+        return _extract(args)
+    # 枚举与提取记到同一个 trace 中
+    tracer = tracing.Tracer("extract")
+    try:
+        with tracer.activate():
+            return _extract(args)
+    finally:
+        uwp_core.finish_trace(tracer, args.trace, _log)
+
+
+def _extract(args) -> int:
+    installed = load_items(args.cached, args.enum, args.scan_root)
+    items = select_items(installed, args)
+    if not items:
+        print(t("not_selected_msg"), file=sys.stderr)
+        return 2
+    defaults = BatchConfig()
+    cfg = BatchConfig(workers=args.jobs or defaults.workers,
+                      pack_limit=args.pack_jobs or defaults.pack_limit,
+                      sign_limit=args.sign_jobs or defaults.sign_limit,
+                      skip_sign=args.skip_sign,
+                      packer=args.packer,
+                      cert_backend=args.cert_backend,
+                      cert_key=args.cert_key,
+                      sign_chunk=args.sign_chunk or defaults.sign_chunk,
+                      trace=not args.no_trace,
+                      check_space=not args.force,
+                      changed_only=args.changed_only,
+                      include_deps=not args.no_deps,
+                      verify=args.verify)
+    finished = [0]
+
+    def on_status(idx, status):
+        if status in (JOB_DONE, JOB_SKIPPED, JOB_FAILED, JOB_CANCELLED):
+            finished[0] += 1
+            _log(f"[{finished[0]}/{total}] {items[idx].pkg_fullname}: {t('job_status_' + status)}")
+
+    scheduler = BatchScheduler(items, pathlib.Path(args.out), cfg, on_status=on_status, on_log=_log,
+                               installed=installed)
+    # 批次中可能加入了依赖的框架包
+    items = scheduler.items
+    total = len(items)
+    try:
+        results = scheduler.run()
+    except KeyboardInterrupt:
+        # 打包/签名阶段的中断由 run() 自己取消并结束正在运行的工具；这里兜住预扫描阶段
+        scheduler.cancel()
+        return 130
+    ok = sum(1 for r in results if r.status in (JOB_DONE, JOB_SKIPPED))
+    _log(t("batch_done_msg", ok=ok, failed=total - ok))
+    return 0 if ok == total else 1
+
+
+# 查看包时可能遇到的格式错误
+_PACKAGE_ERRORS = (OSError, appx_reader.PackageError, zlib.error, ET.ParseError, ValueError)
+
+
+def _identity(info) -> dict:
+    if info is None:
+        return {}
+    return {"name": info.name, "publisher": info.publisher, "version": info.version, "arch": info.arch,
+            "pkg_fullname": info.full_name, "family_name": info.family_name,
+            "display_name": info.display_name, "framework": info.is_framework,
+            "dependencies": [d.name for d in info.dependencies]}
+
+
+def cmd_inspect(args) -> int:
+    path = pathlib.Path(args.path)
+    if path.is_dir():
+        return _inspect_dir(path, args)
+    try:
+        pkg = appx_reader.PackageArchive(path)
+    except _PACKAGE_ERRORS as e:
+        print(t("inspect_open_error", path=path, err=e), file=sys.stderr)
+        return 1
+    with pkg:
+        if args.extract:
+            return _extract_entries(pkg, args.extract, pathlib.Path(args.to or "."))
+        try:
+            info = pkg.manifest
+        except _PACKAGE_ERRORS as e:
+            print(t("inspect_open_error", path=path, err=e), file=sys.stderr)
+            return 1
+        if args.json:
+            json.dump({"file": str(path), "size": pkg.size, "unpacked_size": pkg.unpacked_size,
+                       "signed": pkg.is_signed, "identity": _identity(info),
+                       "files": [{"path": e.path, "size": e.size, "compressed": e.csize}
+                                 for e in pkg.entries]},
+                      sys.stdout, ensure_ascii=False, indent=2)
+            print()
+            return 0
+        if info is not None:
+            print(f"{info.full_name}\t{info.display_name}")
+        print(t("inspect_summary", files=len(pkg.files), unpacked=format_bytes(pkg.unpacked_size),
+                size=format_bytes(pkg.size), signed=t("inspect_signed" if pkg.is_signed else "inspect_unsigned")))
+        for e in pkg.entries:
+            print(f"{e.size}\t{e.csize}\t{e.path}")
+    return 0
+
+
+def _extract_entries(pkg: appx_reader.PackageArchive, names: List[str], to: pathlib.Path) -> int:
+    failed = 0
+    for name in names:
+        entry = pkg.entry(name)
+        if entry is None:
+            print(t("inspect_no_entry", name=name, path=pkg.path), file=sys.stderr)
+            failed += 1
+            continue
+        try:
+            dest = pkg.extract(entry, to)
+        except _PACKAGE_ERRORS as e:
+            print(t("inspect_open_error", path=entry.path, err=e), file=sys.stderr)
+            failed += 1
+            continue
+        print(t("inspect_extracted", name=entry.path, dest=dest))
+    return 1 if failed else 0
+
+
+def _inspect_dir(path: pathlib.Path, args) -> int:
+    if args.extract:
+        print(t("inspect_extract_needs_file"), file=sys.stderr)
+        return 2
+    try:
+        archives = uwp_core.list_archives(path)
+    except OSError as e:
+        print(t("inspect_open_error", path=path, err=e), file=sys.stderr)
+        return 1
+    if args.json:
+        json.dump([{"file": a.path.name, "size": a.size, "files": a.files, "unpacked_size": a.unpacked_size,
+                    "signed": a.signed, "identity": _identity(a.manifest), "error": a.error}
+                   for a in archives], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    if not archives:
+        print(t("inspect_no_archives", path=path), file=sys.stderr)
+        return 0
+    for a in archives:
+        if a.error:
+            print(f"{a.path.name}\t{t('inspect_open_error', path=a.path.name, err=a.error)}")
+            continue
+        m = a.manifest
+        signed = t("inspect_signed" if a.signed else "inspect_unsigned")
+        print(f"{m.full_name if m else '?'}\t{m.display_name if m else ''}\t{a.files}\t"
+              f"{format_bytes(a.size)}\t{signed}\t{a.path.name}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="uwp_cli", description=t("window_title"))
+    p.add_argument("--lang", help="zh_CN / en_US")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    def add_selection(sp):
+        sp.add_argument("--match", metavar="QUERY", help="name/pkg:/pub:/ver:/arch: search query")
+        sp.add_argument("--pkg", action="append", metavar="FULLNAME", help="PackageFullName (repeatable)")
+        sp.add_argument("--cached", action="store_true", help="use the cached inventory without refreshing")
+        sp.add_argument("--enum", choices=(ENUM_POWERSHELL, ENUM_SCAN),
+                        help="enumerate with Get-AppxPackage or by reading the manifests under the package root")
+        sp.add_argument("--scan-root", metavar="DIR",
+                        help="read the package folders under DIR (implies --enum scan)")
+
+    sp = sub.add_parser("list", help="list installed packages")
+    add_selection(sp)
+    sp.add_argument("--json", action="store_true")
+    sp.set_defaults(func=cmd_list)
+
+    sp = sub.add_parser("extract", help="pack (and sign) packages into --out")
+    add_selection(sp)
+    sp.add_argument("--all", action="store_true", help="extract every installed package")
+    sp.add_argument("--out", required=True, metavar="DIR")
+    sp.add_argument("--jobs", type=int, metavar="N", help="parallel jobs")
+    sp.add_argument("--pack-jobs", type=int, metavar="N", help="concurrent pack steps")
+    sp.add_argument("--sign-jobs", type=int, metavar="N", help="concurrent sign steps")
+    sp.add_argument("--sign-chunk", type=int, metavar="N", help="packages signed per signtool call")
+    sp.add_argument("--skip-sign", action="store_true")
+    sp.add_argument("--packer", choices=(PACKER_MAKEAPPX, PACKER_BUILTIN))
+    sp.add_argument("--cert-backend", choices=(CERT_BACKEND_BUILTIN, CERT_BACKEND_MAKECERT))
+    sp.add_argument("--cert-key", choices=certgen.KEY_TYPES, default=certgen.KEY_RSA2048)
+    sp.add_argument("--no-deps", action="store_true",
+                    help="do not add the framework packages the selected apps depend on")
+    sp.add_argument("--changed-only", action="store_true",
+                    help="skip packages already in the output folder's backup catalog at the same version")
+    sp.add_argument("--verify", action="store_true",
+                    help="re-read every package and check its block hashes and file list before keeping it")
+    sp.add_argument("--force", action="store_true", help="skip the free-space check")
+    sp.add_argument("--trace", metavar="FILE", help="write the Chrome trace JSON here (default: cache dir)")
+    sp.add_argument("--no-trace", action="store_true", help="do not record stage timings")
+    sp.set_defaults(func=cmd_extract)
+
+    sp = sub.add_parser("inspect", help="show the identity and files of an .appx/.msix, or every package in a folder")
+    sp.add_argument("path", metavar="PATH", help="package file, or an output folder to list")
+    sp.add_argument("--json", action="store_true")
+    sp.add_argument("--extract", action="append", metavar="NAME",
+                    help="extract this file from the package (repeatable)")
+    sp.add_argument("--to", metavar="DIR", help="where --extract writes files (default: current folder)")
+    sp.set_defaults(func=cmd_inspect)
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.lang:
+        uwp_core.set_language(args.lang)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
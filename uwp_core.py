@@ -0,0 +1,2113 @@
+"""UWP Package Extractor 的核心库：枚举、名称解析、清单解析与打包/签名流水线。
+
+本模块不导入任何 Qt 模块，可被 GUI（main.py）、命令行（uwp_cli.py）或其它脚本直接使用。
+"""
+import os, re, shutil, subprocess, json, pathlib, threading, time, unicodedata, hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Dict, List
+import locale
+import appx_manifest
+import appx_pri
+import appx_reader
+import appx_writer
+import toolrun
+import tracing
+import certgen
+
+# --------------------------------------------------
+# 本地化文本
+# --------------------------------------------------
+LOCALES_DIR = pathlib.Path(__file__).parent / "locales"
+
+def default_language() -> str:
+    env = os.environ.get("UWP_LANG", "").strip()
+    if env:
+        return env
+    sys_lang = (locale.getdefaultlocale()[0] or "").lower()
+    return "zh_CN" if sys_lang.startswith("zh") else "en_US"
+
+def load_texts(lang: str = None) -> dict:
+    if not lang:
+        lang = default_language()
+    path = LOCALES_DIR / f"{lang}.json"
+    if not path.exists():
+        path = LOCALES_DIR / "en_US.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+# 全局文本字典与翻译函数；首次使用时才读取语言文件
+TEXTS = None
+LANGUAGE = None
+
+def set_language(lang: str = None):
+    global TEXTS, LANGUAGE
+    LANGUAGE = lang or default_language()
+    TEXTS = load_texts(LANGUAGE)
+
+def resource_languages() -> List[str]:
+    """查找包资源（resources.pri）时的首选语言：界面语言，其次 en-US。"""
+    lang = (LANGUAGE or default_language()).replace("_", "-")
+    return [lang] if lang.lower() == "en-us" else [lang, "en-US"]
+
+def texts() -> dict:
+    if TEXTS is None:
+        set_language()
+    return TEXTS
+
+def t(key: str, **kwargs):
+    s = texts().get(key, key)
+    try:
+        return s.format(**kwargs)
+    except Exception:
+        return s
+
+# --------------------------------------------------
+# 数据模型
+# --------------------------------------------------
+@dataclass
+class UwpItem:
+    name: str
+    pkg_fullname: str
+    version: str
+    arch: str
+    install_path: str
+    is_selected: bool = False
+    publisher: str = ""
+    # 清单中尚未解析的 ms-resource 显示名；此时 name 为临时名称（PackageFullName 前缀）
+    raw_name: str = ""
+
+# --------------------------------------------------
+# 本地缓存目录（可用环境变量 UWP_CACHE_DIR 覆盖）
+# --------------------------------------------------
+def _default_cache_dir() -> pathlib.Path:
+    env = os.environ.get("UWP_CACHE_DIR", "").strip()
+    if env:
+        return pathlib.Path(env)
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    base = pathlib.Path(base) if base else pathlib.Path.home() / ".cache"
+    return base / "UWPPackageExtractor"
+
+CACHE_DIR = _default_cache_dir()
+RES_INDEX_DIR = CACHE_DIR / "resindex"
+
+def _write_json_atomic(path: pathlib.Path, data):
+    # 先写临时文件再替换，避免中途崩溃留下半个 JSON
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+# --------------------------------------------------
+# 每个包一份的资源索引：资源键 -> 字符串
+# --------------------------------------------------
+_res_index_memo = {}
+_res_index_lock = threading.Lock()
+
+class NameBudgetExceeded(TimeoutError):
+    """解析显示名超出时间预算；partial 为已解析部分的资源索引。"""
+
+    def __init__(self, partial: dict):
+        super().__init__("display name budget exceeded")
+        self.partial = partial
+
+def _check_name_deadline(deadline: float = None):
+    if deadline is not None and time.monotonic() > deadline:
+        raise NameBudgetExceeded({})
+
+def _walk_resw(top: pathlib.Path, deadline: float = None, skip: str = None):
+    for root, dirs, files in os.walk(top):
+        _check_name_deadline(deadline)
+        dirs.sort()
+        if skip and root == str(top):
+            dirs[:] = [d for d in dirs if d != skip]
+        for fn in sorted(files):
+            if fn.lower().endswith(".resw"):
+                yield os.path.join(root, fn)
+
+def build_resource_index(install_path, deadline: float = None) -> dict:
+    """遍历安装目录，解析所有 .resw，返回 {资源键: 字符串}。
+
+    Strings/ 目录下的 .resw 优先（先遍历、先解析），同名键保留先遇到的值。
+    给定 deadline（time.monotonic() 时刻）时，超时抛出 NameBudgetExceeded，其中带有已解析的部分。"""
+    import xml.etree.ElementTree as ET
+    base = pathlib.Path(install_path)
+    index = {}
+    sources = (_walk_resw(base / "Strings", deadline), _walk_resw(base, deadline, skip="Strings"))
+    try:
+        for source in sources:
+            for resw in source:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise NameBudgetExceeded(index)
+                try:
+                    # <data name="Key"><value>Text</value></data>
+                    for _, elem in ET.iterparse(resw, events=("end",)):
+                        if elem.tag != "data":
+                            continue
+                        name = elem.get("name")
+                        val = elem.findtext("value")
+                        if name and val and val.strip() and name not in index:
+                            index[name] = val.strip()
+                        elem.clear()
+                except Exception:
+                    continue
+    except NameBudgetExceeded:
+        raise NameBudgetExceeded(index) from None
+    return index
+
+def load_resource_index(pkg_fullname: str, install_path: str, deadline: float = None) -> dict:
+    """取得包的资源索引：内存 -> 磁盘缓存 -> 重新构建。
+
+    缓存以 PackageFullName + 安装目录 mtime 为键，目录变化后自动失效。
+    重新构建超出 deadline 时抛出 NameBudgetExceeded，不完整的索引不写入缓存。"""
+    base = pathlib.Path(install_path)
+    try:
+        mtime = base.stat().st_mtime_ns
+    except OSError:
+        return {}
+    key = pkg_fullname or base.name
+    with _res_index_lock:
+        hit = _res_index_memo.get(key)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    cache_file = RES_INDEX_DIR / f"{key}.json"
+    index = None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("mtime") == mtime and cached.get("path") == str(base):
+            index = cached.get("strings") or {}
+    except Exception:
+        pass
+    if index is None:
+        with tracing.span("resource_index", pkg=key) as sp:
+            index = build_resource_index(base, deadline)
+            sp["strings"] = len(index)
+        try:
+            _write_json_atomic(cache_file, {"path": str(base), "mtime": mtime, "strings": index})
+        except Exception:
+            pass
+    with _res_index_lock:
+        _res_index_memo[key] = (mtime, index)
+    return index
+
+def load_manifest(install_path, log=None):
+    """读取包的 ManifestInfo（按路径+mtime 缓存，整个流水线共用一次解析）；
+    清单不存在或损坏时返回 None，损坏时通过 log 报告。"""
+    if not install_path:
+        return None
+    try:
+        return appx_manifest.load(install_path)
+    except Exception as e:
+        if log:
+            log(t("manifest_parse_error", err=e))
+        return None
+
+def is_ms_resource(name) -> bool:
+    return isinstance(name, str) and "ms-resource" in name.lower()
+
+def provisional_name(pkg_fullname: str) -> str:
+    # 显示名解析完成前先用 PackageFullName 的前缀（即包标识名）
+    return pkg_fullname.split("_", 1)[0]
+
+def lookup_ms_resource(raw_name: str, install_path: str, pkg_fullname: str = None,
+                       deadline: float = None) -> str:
+    """查找 ms-resource 引用，找不到返回 None。
+
+    顺序：resources.pri（只读取该条目，按界面语言选择）-> .resw 资源索引 -> 清单的 DisplayName。
+    超出 deadline 时（resources.pri 查找中或索引构建中）：已解析部分中有该键则照常返回，
+    否则抛出 NameBudgetExceeded。"""
+    rn = str(raw_name).strip()
+    # 提取资源键（取最后一个段）
+    after = rn.split(":", 1)[1] if ":" in rn else rn
+    key = after.split("/")[-1].strip()
+    if not key or not install_path:
+        return None
+    base = pathlib.Path(install_path)
+    _check_name_deadline(deadline)
+    try:
+        with tracing.span("pri_lookup", pkg=pkg_fullname or base.name) as sp:
+            val = appx_pri.lookup_string(base, rn, resource_languages(), deadline)
+            sp["found"] = bool(val)
+        if val:
+            return val
+    except appx_pri.PriTimeout:
+        raise NameBudgetExceeded({}) from None
+    except Exception:
+        pass
+    # 打开 resources.pri 等文件操作本身也可能很慢，进入 .resw 遍历前再检查一次
+    _check_name_deadline(deadline)
+    if base.exists():
+        try:
+            val = load_resource_index(pkg_fullname, install_path, deadline).get(key)
+        except NameBudgetExceeded as e:
+            val = e.partial.get(key)
+            if not val:
+                raise
+        if val:
+            return val
+    # 备用：清单中的 Properties/DisplayName（有时直接是本地化后的文字）
+    mi = load_manifest(base)
+    dn = mi.display_name if mi else ""
+    if dn and not is_ms_resource(dn):
+        return dn
+    return None
+
+# 解析 ms-resource 引用到友好名称（查询 resources.pri，其次是由 Strings/*.resw 等资源文件建立的索引）
+def resolve_ms_resource(raw_name: str, install_path: str, pkg_fullname: str = None) -> str:
+    try:
+        if not raw_name or not is_ms_resource(raw_name):
+            return str(raw_name).strip() if raw_name else raw_name
+        val = lookup_ms_resource(raw_name, install_path, pkg_fullname)
+        if val:
+            return val
+        # 回退到安装目录名或原始值
+        if install_path:
+            return pathlib.Path(install_path).name or raw_name
+    except Exception:
+        pass
+    return raw_name
+
+def package_logo(install_path, scale: int = 100) -> str:
+    """清单中 Logo 对应的实际文件（按 resources.pri 选择最接近 scale 的变体），找不到返回空串。"""
+    mi = load_manifest(install_path)
+    if not mi or not mi.logo:
+        return ""
+    base = pathlib.Path(install_path)
+    try:
+        variant = appx_pri.lookup_file(base, mi.logo, scale, resource_languages())
+    except Exception:
+        variant = None
+    for rel in (variant, mi.logo):
+        if rel and (base / rel.replace("\\", "/")).is_file():
+            return str(base / rel.replace("\\", "/"))
+    return ""
+
+# --------------------------------------------------
+# PowerShell 枚举
+# --------------------------------------------------
+def get_startapps_map() -> dict:
+    """Start menu 应用映射（AppID 小写 -> Name）。"""
+    try:
+        scmd = [
+            "powershell", "-NoLogo", "-NonInteractive", "-OutputFormat", "Text",
+            "-Command", r"""
+            [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+            Get-StartApps | Select-Object AppID,Name | ConvertTo-Json -Depth 2
+            """
+        ]
+        comp = subprocess.run(scmd, capture_output=True, text=True,
+                              encoding='utf-8', errors='ignore', timeout=20)
+        out = comp.stdout.strip() or comp.stderr.strip()
+        if not out:
+            return {}
+        arr = json.loads(out) if out else []
+        if isinstance(arr, dict):
+            arr = [arr]
+        m = {}
+        for a in arr:
+            aid = (a.get('AppID') or '').lower()
+            name = a.get('Name') or ''
+            if aid:
+                m[aid] = name
+        return m
+    except Exception:
+        return {}
+
+def startapps_family_index(start_map: dict) -> dict:
+    """按 AppID 中 “!” 之前的 PackageFamilyName 建索引（小写 family -> Name），同一 family 取第一个。"""
+    index = {}
+    for aid, name in start_map.items():
+        family = aid.split('!', 1)[0]
+        if family and name:
+            index.setdefault(family, name)
+    return index
+
+# Windows.System.ProcessorArchitecture：11 为 Neutral（框架与资源包常见）
+ARCH_NEUTRAL = 'Neutral'
+ARCH_MAP = {0: 'X86', 5: 'ARM', 9: 'X64', 11: ARCH_NEUTRAL, 12: 'ARM64'}
+
+def item_from_record(d: dict) -> UwpItem:
+    """把一条 PowerShell（或清单扫描）记录转换为 UwpItem。
+
+    显示名是 ms-resource 引用时先用临时名称，原始引用留在 raw_name 中，
+    由 resolve_names() 在单独的阶段并发解析。"""
+    install_location = d.get('InstallLocation') or ''
+    pkg_full = d.get('PackageFullName') or ''
+    # 清单只在这里解析一次，后续的名称解析、签名等阶段命中缓存
+    with tracing.span("manifest", pkg=pkg_full):
+        mi = load_manifest(install_location)
+    raw_name = (mi.display_name if mi else '') or d.get('Name') or pkg_full
+    pending = is_ms_resource(raw_name)
+    return UwpItem(
+        name=(provisional_name(pkg_full) or raw_name) if pending else raw_name,
+        pkg_fullname=pkg_full,
+        version=d.get('Version') or '',
+        arch=ARCH_MAP.get(d.get('Architecture'), 'Unknown'),
+        install_path=install_location,
+        publisher=d.get('Publisher') or (mi.publisher if mi else ''),
+        raw_name=raw_name if pending else ''
+    )
+
+def _ps_quote(s: str) -> str:
+    # PowerShell 单引号字符串：内部单引号写两次
+    return "'" + str(s).replace("'", "''") + "'"
+
+# 每个包输出一行紧凑 JSON（NDJSON），边读边解析
+PS_ENUM_SCRIPT = r"""
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+Get-AppxPackage | ForEach-Object {
+    $pkg = $_
+    if ([string]::IsNullOrEmpty($pkg.InstallLocation)) { return }
+    if ($want -and -not $want.Contains($pkg.PackageFullName)) { return }
+    [PSCustomObject]@{
+        Name        = [string]$pkg.Name
+        PackageFullName = $pkg.PackageFullName
+        PackageFamilyName = $pkg.PackageFamilyName
+        Publisher   = $pkg.Publisher
+        Version     = [string]$pkg.Version
+        Architecture= [int]$pkg.Architecture
+        InstallLocation = $pkg.InstallLocation
+    } | ConvertTo-Json -Compress -Depth 4
+}
+"""
+ENUM_TIMEOUT = 60
+ENUM_BATCH = 25
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+def parse_package_lines(lines, log=print):
+    """把 PowerShell 的 NDJSON 输出逐行解析为 dict；跳过警告、ANSI 控制符、BOM 等噪声，
+    截断或损坏的行只丢弃该行。lines 可以是管道、文件或抓取下来的字符串列表。"""
+    for line in lines:
+        line = _ANSI_RE.sub('', line).strip().lstrip('\ufeff')
+        if not line.startswith('{'):
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            log(t("json_extraction_error"), e, line[:200])
+            continue
+        if isinstance(rec, dict):
+            yield rec
+
+# stderr 只保留最后若干行用于报错；后台线程持续读取，避免管道写满使 PowerShell 阻塞
+ENUM_STDERR_LINES = 200
+
+class EnumerationTimeout(TimeoutError):
+    """Get-AppxPackage 超时被结束；items 为超时前已经读到的包（由 enumerate_packages 填入）。"""
+
+    def __init__(self, timeout: float, count: int):
+        super().__init__(f"Get-AppxPackage timed out after {timeout}s ({count} packages read)")
+        self.timeout = timeout
+        self.items = []
+
+def iter_package_records(only=None, timeout: float = ENUM_TIMEOUT):
+    """逐行读取 PowerShell 的 NDJSON 输出并逐条产出 dict。
+
+    坏记录只丢弃该行；超时会结束进程，产出已读到的记录后抛出 EnumerationTimeout。"""
+    want = "$null"
+    if only:
+        want = ("[System.Collections.Generic.HashSet[string]]::new([string[]]@("
+                + ",".join(_ps_quote(n) for n in only) + "))")
+    cmd = [
+        "powershell", "-NoLogo", "-NonInteractive", "-OutputFormat", "Text",
+        "-Command", f"$want = {want}\n" + PS_ENUM_SCRIPT
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                stdin=subprocess.DEVNULL, text=True, encoding='utf-8', errors='ignore')
+    except OSError as e:
+        print(t("ps_stderr_prefix"), e)
+        return
+    err_lines = deque(maxlen=ENUM_STDERR_LINES)
+
+    def pump_stderr():
+        for line in proc.stderr:
+            err_lines.append(line)
+
+    reader = threading.Thread(target=pump_stderr, name="ps-enum-err", daemon=True)
+    reader.start()
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, kill)
+    watchdog.daemon = True
+    watchdog.start()
+    with tracing.span("enumerate", only=len(only) if only else None) as sp:
+        sp["packages"] = 0
+        try:
+            for rec in parse_package_lines(proc.stdout):
+                sp["packages"] += 1
+                yield rec
+        finally:
+            watchdog.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            reader.join(timeout=5)
+            sp["exit_code"] = proc.returncode
+        err = "".join(err_lines)
+        if timed_out.is_set():
+            sp["timed_out"] = True
+            raise EnumerationTimeout(timeout, sp["packages"])
+        if proc.returncode not in (0, None) and err:
+            print(t("ps_stderr_prefix"), err[:1000])
+
+class StartAppsIndex:
+    """按需取得 startapps_family_index()：prefetch() 在后台提前启动 Get-StartApps，
+    调用对象本身时等待并返回结果（未预取时同步查询），结果只取一次。"""
+
+    def __init__(self):
+        self._future = None
+        self._lock = threading.Lock()
+
+    def prefetch(self):
+        with self._lock:
+            if self._future is None:
+                pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startapps")
+                self._future = pool.submit(tracing.bind(self._load))
+                pool.shutdown(wait=False)
+
+    @staticmethod
+    def _load() -> dict:
+        with tracing.span("startapps") as sp:
+            index = startapps_family_index(get_startapps_map())
+            sp["apps"] = len(index)
+        return index
+
+    def __call__(self) -> dict:
+        self.prefetch()
+        try:
+            return self._future.result()
+        except Exception:
+            return {}
+
+def enumerate_packages(only=None, on_batch=None, batch_size: int = ENUM_BATCH,
+                       start_map: StartAppsIndex = None) -> List[UwpItem]:
+    """完整枚举（Get-AppxPackage + 清单），only 为 PackageFullName 集合时只枚举这些包。
+
+    on_batch(list) 在每凑满 batch_size 个 UwpItem 时回调一次，用于逐步填充界面。
+    显示名为临时名称的包由 resolve_names() 另行解析。
+    Get-AppxPackage 超时时抛出 EnumerationTimeout，其 items 为已枚举到的包。"""
+    # Get-StartApps 与包查询同时启动，两个 PowerShell 的冷启动时间重叠
+    if start_map is not None:
+        start_map.prefetch()
+
+    items, batch = [], []
+    try:
+        for rec in iter_package_records(only):
+            it = item_from_record(rec)
+            items.append(it)
+            batch.append(it)
+            if on_batch and len(batch) >= batch_size:
+                on_batch(batch)
+                batch = []
+    except EnumerationTimeout as e:
+        e.items = items
+        raise
+    finally:
+        if on_batch and batch:
+            on_batch(batch)
+    return items
+
+def list_package_fullnames():
+    """轻量查询：只取当前已安装包的 PackageFullName 集合；失败返回 None。"""
+    cmd = [
+        "powershell", "-NoLogo", "-NonInteractive", "-OutputFormat", "Text",
+        "-Command", r"""
+        [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+        Get-AppxPackage | Where-Object { $_.InstallLocation } | ForEach-Object { $_.PackageFullName }
+        """
+    ]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True,
+                                   encoding='utf-8', errors='ignore', timeout=30)
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    if completed.returncode != 0:
+        print(t("ps_stderr_prefix"), completed.stderr[:1000])
+        return None
+    return {ln.strip() for ln in completed.stdout.splitlines() if ln.strip()}
+
+# --------------------------------------------------
+# 清单扫描枚举：不启动 PowerShell，直接读取包根目录（默认 WindowsApps）下各包的清单
+# --------------------------------------------------
+ENUM_POWERSHELL = "powershell"
+ENUM_SCAN = "scan"
+SCAN_WORKERS = min(32, (os.cpu_count() or 2) * 4)
+_ARCH_CODES = {'x86': 0, 'arm': 5, 'x64': 9, 'neutral': 11, 'arm64': 12}
+
+def default_package_root() -> pathlib.Path:
+    env = os.environ.get("UWP_PACKAGE_ROOT", "").strip()
+    if env:
+        return pathlib.Path(env)
+    return pathlib.Path(os.environ.get("ProgramFiles", r"C:\Program Files")) / "WindowsApps"
+
+def default_enum_backend() -> str:
+    """UWP_ENUM_BACKEND=scan 或设置了 UWP_PACKAGE_ROOT 时使用清单扫描，否则用 PowerShell。"""
+    env = os.environ.get("UWP_ENUM_BACKEND", "").strip().lower()
+    if env in (ENUM_POWERSHELL, ENUM_SCAN):
+        return env
+    return ENUM_SCAN if os.environ.get("UWP_PACKAGE_ROOT", "").strip() else ENUM_POWERSHELL
+
+def list_package_dirs(root) -> set:
+    """包根目录下含 AppxManifest.xml 的子目录（绝对路径字符串）；根目录不可读时返回 None。"""
+    dirs = set()
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir() and os.path.isfile(os.path.join(entry.path, appx_manifest.MANIFEST_NAME)):
+                        dirs.add(os.path.abspath(entry.path))
+                except OSError:
+                    continue
+    except OSError as e:
+        print(t("scan_root_error", path=root, err=e))
+        return None
+    return dirs
+
+def record_from_manifest(install_path: str) -> dict:
+    """读取安装目录的清单，构造与 PowerShell 枚举相同字段的记录；清单缺失或损坏时返回 None。"""
+    mi = load_manifest(install_path)
+    if mi is None or not mi.name:
+        return None
+    return {
+        'Name': mi.name,
+        'PackageFullName': mi.full_name,
+        'PackageFamilyName': mi.family_name,
+        'Publisher': mi.publisher,
+        'Version': mi.version,
+        'Architecture': _ARCH_CODES.get(mi.arch),
+        'InstallLocation': install_path,
+    }
+
+def scan_package_root(root=None, dirs=None, on_batch=None, batch_size: int = ENUM_BATCH,
+                      workers: int = SCAN_WORKERS) -> List[UwpItem]:
+    """在线程池中并发解析 root 下（或给定 dirs 中）每个包的清单，返回 UwpItem 列表。
+
+    on_batch 的用法与 enumerate_packages 相同；ms-resource 显示名同样留给 resolve_names()。"""
+    root = pathlib.Path(root) if root else default_package_root()
+    if dirs is None:
+        dirs = list_package_dirs(root)
+    if not dirs:
+        return []
+
+    def one(path: str):
+        rec = record_from_manifest(path)
+        return item_from_record(rec) if rec else None
+
+    items, batch = [], []
+    with tracing.span("scan_root", root=str(root)) as sp:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan") as pool:
+            for it in pool.map(tracing.bind(one), sorted(dirs)):
+                if it is None:
+                    continue
+                items.append(it)
+                batch.append(it)
+                if on_batch and len(batch) >= batch_size:
+                    on_batch(batch)
+                    batch = []
+        sp["packages"] = len(items)
+    if on_batch and batch:
+        on_batch(batch)
+    return items
+
+# --------------------------------------------------
+# 显示名解析：单独的阶段，线程池并发，每个包有时间预算
+# --------------------------------------------------
+# 单个包解析显示名的时间预算（秒）；超出时保留临时名称，下次刷新再试
+NAME_BUDGET = 3.0
+NAME_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+def resolve_display_name(item: UwpItem, start_map=None, budget: float = NAME_BUDGET):
+    """解析 item.raw_name，返回 (显示名或 None, 是否已有结论)；只读 item，不修改它。
+
+    顺序：resources.pri / 资源索引 / 清单 -> StartApps（按 PackageFamilyName）-> 保留临时名称。
+    超出预算且没有结果时第二项为 False（保留 raw_name 以便下次重试）；
+    确认找不到时为 True，调用方清空 raw_name，不再重试。"""
+    deadline = time.monotonic() + budget if budget else None
+    name, timed_out = None, False
+    with tracing.span("resolve_name", pkg=item.pkg_fullname) as sp:
+        try:
+            name = lookup_ms_resource(item.raw_name, item.install_path, item.pkg_fullname, deadline)
+        except NameBudgetExceeded:
+            sp["timed_out"] = timed_out = True
+        except Exception:
+            name = None
+        if not name and start_map is not None:
+            # PackageFamilyName = Name_PublisherId，由全名的首尾两段组成
+            parts = item.pkg_fullname.split("_")
+            if len(parts) >= 5:
+                name = start_map().get(f"{parts[0]}_{parts[-1]}".lower())
+    return name, bool(name) or not timed_out
+
+def resolve_names(items: List[UwpItem], start_map=None, on_resolved=None,
+                  budget: float = NAME_BUDGET, workers: int = NAME_WORKERS) -> int:
+    """并发解析 items 中 raw_name 待定的包，返回更新了名称的包数。
+
+    工作线程只计算结果；名称与 raw_name 在调用线程中写回 items，写回后回调
+    on_resolved(下标, 新名称)。items 同时被界面读取时，应传入副本，由回调把新名称交给界面线程。
+    单个包再慢也只占用一个工作线程最多 budget 秒。"""
+    pending = [i for i, it in enumerate(items) if it.raw_name]
+    if not pending:
+        return 0
+    changed = timed_out = 0
+    with tracing.span("resolve_names", packages=len(pending)) as sp:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending))),
+                                thread_name_prefix="names") as pool:
+            resolve = tracing.bind(resolve_display_name)
+            futures = {pool.submit(resolve, items[i], start_map, budget): i for i in pending}
+            for fut in as_completed(futures):
+                idx = futures[fut]
+                it = items[idx]
+                name, settled = fut.result()
+                if settled:
+                    it.raw_name = ""
+                else:
+                    timed_out += 1
+                if name and name != it.name:
+                    it.name = name
+                    changed += 1
+                    if on_resolved:
+                        on_resolved(idx, name)
+        sp["changed"] = changed
+        sp["timed_out"] = timed_out
+    return changed
+
+# --------------------------------------------------
+# 包清单快照：启动时立即显示，随后增量刷新
+# --------------------------------------------------
+INVENTORY_FILE = CACHE_DIR / "inventory.json"
+INVENTORY_VERSION = 1
+# 新增包过多时命令行会过长，直接做一次完整枚举
+INCREMENTAL_MAX = 200
+
+def load_inventory() -> List[UwpItem]:
+    try:
+        with open(INVENTORY_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INVENTORY_VERSION:
+            return []
+        return [UwpItem(name=d["name"], pkg_fullname=d["pkg_fullname"], version=d["version"],
+                        arch=d["arch"], install_path=d["install_path"], publisher=d.get("publisher", ""),
+                        raw_name=d.get("raw_name", ""))
+                for d in data.get("items", [])]
+    except Exception:
+        return []
+
+def save_inventory(items: List[UwpItem]):
+    data = {"version": INVENTORY_VERSION,
+            "items": [{"name": it.name, "pkg_fullname": it.pkg_fullname, "version": it.version,
+                       "arch": it.arch, "install_path": it.install_path, "publisher": it.publisher,
+                       "raw_name": it.raw_name}
+                      for it in items]}
+    try:
+        _write_json_atomic(INVENTORY_FILE, data)
+    except Exception as e:
+        print(t("inventory_save_error", err=e))
+
+def refresh_inventory(snapshot: List[UwpItem], on_batch=None, backend: str = None,
+                      root=None, resolve: bool = True, on_resolved=None) -> List[UwpItem]:
+    """以快照为基础增量刷新：只重新枚举新增（含版本变化）的包，删除已卸载的包。
+
+    新枚举到的包会通过 on_batch 分批回调（显示名可能还是临时名称），最终返回完整列表。
+    backend 为 ENUM_SCAN 时改为扫描 root（默认 default_package_root()）下的清单。
+    resolve 为 True 时随后并发解析临时名称，每更新一个包回调一次 on_resolved(包全名, 新名称)。"""
+    backend = backend or (ENUM_SCAN if root else default_enum_backend())
+    # 清单扫描后端不启动任何 PowerShell，也就不查询 StartApps
+    start_map = StartAppsIndex() if backend == ENUM_POWERSHELL else None
+    complete = True
+
+    def enumerate_(only=None):
+        nonlocal complete
+        try:
+            return enumerate_packages(only=only, on_batch=on_batch, start_map=start_map)
+        except EnumerationTimeout as e:
+            # 结果不完整：照常显示已读到的包，但不写入快照，以免未读到的包被当作已卸载
+            print(t("ps_enum_timeout", sec=e.timeout, count=len(e.items)))
+            complete = False
+            return e.items
+
+    if backend == ENUM_SCAN:
+        items = _refresh_from_root(snapshot, root or default_package_root(), on_batch)
+    elif not snapshot:
+        items = enumerate_()
+    else:
+        with tracing.span("list_packages") as sp:
+            current = list_package_fullnames()
+            sp["packages"] = len(current) if current is not None else None
+        if current is None:
+            return snapshot
+        known = {it.pkg_fullname for it in snapshot}
+        added = current - known
+        items = [it for it in snapshot if it.pkg_fullname in current]
+        if len(added) > INCREMENTAL_MAX:
+            items = enumerate_()
+            if not complete:
+                # 沿用快照中未读到的包，下次刷新再补全
+                got = {it.pkg_fullname for it in items}
+                items = [it for it in snapshot if it.pkg_fullname in current and it.pkg_fullname not in got] + items
+        elif added:
+            items.extend(enumerate_(only=added))
+    if resolve:
+        # 快照里上次超出预算的包也在这里重试
+        resolve_names(items, start_map,
+                      on_resolved and (lambda idx, name: on_resolved(items[idx].pkg_fullname, name)))
+    # 显式指定的目录（测试数据、其他磁盘）不写入本机的清单快照
+    if items and not root and complete:
+        save_inventory(items)
+    return items
+
+def _refresh_from_root(snapshot: List[UwpItem], root, on_batch=None) -> List[UwpItem]:
+    # 以安装目录为键：目录名包含版本，版本变化即为新目录
+    with tracing.span("list_packages", root=str(root)) as sp:
+        current = list_package_dirs(root)
+        sp["packages"] = len(current) if current is not None else None
+    if current is None:
+        return snapshot
+    known = {os.path.abspath(it.install_path) for it in snapshot if it.install_path}
+    items = [it for it in snapshot if it.install_path and os.path.abspath(it.install_path) in current]
+    added = current - known
+    if added:
+        items.extend(scan_package_root(root, dirs=added, on_batch=on_batch))
+    return items
+
+# --------------------------------------------------
+# 搜索索引：多字段、预先规范化，支持 arch:x64 / pub:Microsoft 等前缀
+# --------------------------------------------------
+SEARCH_FIELDS = {
+    "name": "name",
+    "pkg": "pkg", "id": "pkg", "full": "pkg",
+    "pub": "pub", "publisher": "pub",
+    "ver": "ver", "version": "ver",
+    "arch": "arch",
+}
+
+def normalize_search(s: str) -> str:
+    # 全角/兼容字符折叠、去掉重音符号、大小写折叠
+    s = unicodedata.normalize("NFKD", s or "")
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).casefold()
+
+def parse_search_query(text: str):
+    """把查询拆成 [(字段或 None, 规范化后的词)]，所有词之间为“与”关系。"""
+    terms = []
+    for tok in (text or "").split():
+        field = None
+        if ":" in tok:
+            head, rest = tok.split(":", 1)
+            if head.lower() in SEARCH_FIELDS and rest:
+                field, tok = SEARCH_FIELDS[head.lower()], rest
+        tok = normalize_search(tok)
+        if tok:
+            terms.append((field, tok))
+    return terms
+
+class SearchIndex:
+    """为每个包预先计算规范化后的字段字符串，查询时只做子串判断。"""
+
+    def __init__(self, items: List[UwpItem] = ()):
+        self.entries = {}
+        self.add(items)
+
+    def add(self, items: List[UwpItem]):
+        """加入（或更新已有的）包；枚举中逐批追加、显示名解析后更新时只处理这些包。"""
+        for it in items:
+            fields = {
+                "name": normalize_search(it.name),
+                "pkg": normalize_search(it.pkg_fullname),
+                "pub": normalize_search(it.publisher),
+                "ver": normalize_search(it.version),
+                "arch": normalize_search(it.arch),
+            }
+            fields[None] = "\n".join(fields.values())
+            self.entries[it.pkg_fullname] = fields
+
+    def match(self, text: str):
+        """返回匹配的 PackageFullName 集合；空查询返回 None（表示全部显示）。"""
+        terms = parse_search_query(text)
+        if not terms:
+            return None
+        return {pkg for pkg, fields in self.entries.items()
+                if all(tok in fields[field] for field, tok in terms)}
+
+# --------------------------------------------------
+# 工具链路径
+# --------------------------------------------------
+BIN_DIR = pathlib.Path(__file__).parent / "bin"
+MAKEAPPX = BIN_DIR / "makeappx.exe"
+MAKECERT = BIN_DIR / "makecert.exe"
+PVK2PFX  = BIN_DIR / "pvk2pfx.exe"
+SIGNTOOL = BIN_DIR / "signtool.exe"
+
+def _tool_call(tool: pathlib.Path, args: list, cwd=None, timeout=None, cancel=None, on_line=None):
+    backend = toolrun.get_backend()
+    if backend.needs_binary and not tool.exists():
+        raise RuntimeError(t("tool_not_exist", tool=tool.name))
+    cmd = [tool, *args]
+    if timeout is None:
+        timeout = toolrun.timeout_for(cmd)
+    try:
+        with tracing.span(toolrun.tool_name(cmd)) as sp:
+            res = toolrun.run(cmd, cwd=cwd or BIN_DIR, timeout=timeout, cancel=cancel, on_line=on_line)
+            sp["exit_code"], sp["lines"] = res.returncode, len(res.lines)
+        return res
+    except toolrun.ToolTimeout:
+        raise toolrun.ToolTimeout(t("tool_timeout", tool=tool.name, sec=timeout)) from None
+
+def _run(tool: pathlib.Path, args: list, cwd=None, timeout=None, cancel=None, on_line=None) -> str:
+    """执行外部工具并返回输出；非零退出码抛 RuntimeError。
+    输出逐行交给 on_line，超时抛 toolrun.ToolTimeout，cancel 置位后抛 toolrun.ToolCancelled。"""
+    res = _tool_call(tool, args, cwd, timeout, cancel, on_line)
+    if res.returncode != 0:
+        raise RuntimeError(t("tool_failed", tool=tool.name, err=res.tail()))
+    return res.output
+
+def _run_unchecked(tool: pathlib.Path, args: list, cwd=None, timeout=None, cancel=None, on_line=None):
+    """同 _run，但非零退出码不抛异常，返回 (returncode, 输出)。
+    signtool 批量签名时只要有一个文件失败就返回非零，需要逐行解析结果。"""
+    res = _tool_call(tool, args, cwd, timeout, cancel, on_line)
+    return res.returncode, res.output
+
+# --------------------------------------------------
+# 单个包的打包/签名任务（与 Qt 无关，可在任意线程中运行）
+# --------------------------------------------------
+def extract_publisher_from_manifest(app_path, log=print):
+    """从AppxManifest.xml提取Publisher，类似C#版本"""
+    mi = load_manifest(app_path, log)
+    return (mi.publisher or None) if mi else None
+
+# --------------------------------------------------
+# 签名证书缓存：按 Publisher 主题保存，跨包、跨运行复用
+# --------------------------------------------------
+CERT_DIR = CACHE_DIR / "certs"
+
+# 证书生成方式：进程内（certgen，需要 cryptography）或 makecert.exe + pvk2pfx.exe
+CERT_BACKEND_BUILTIN = "builtin"
+CERT_BACKEND_MAKECERT = "makecert"
+
+def default_cert_backend() -> str:
+    return CERT_BACKEND_BUILTIN if certgen.available() else CERT_BACKEND_MAKECERT
+
+class CertStore:
+    """每个 Publisher 一个目录（publisher.txt / cert.cer / cert.pfx，makecert 方式另有 cert.pvk）。
+
+    同一 Publisher 的并发请求只会生成一次证书，其余线程等待后直接复用。"""
+
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root: pathlib.Path = None, backend: str = None,
+                 key_type: str = certgen.KEY_RSA2048):
+        self.root = pathlib.Path(root) if root else CERT_DIR
+        self.backend = backend or default_cert_backend()
+        # makecert 只按原参数生成 RSA 2048
+        self.key_type = key_type if self.backend == CERT_BACKEND_BUILTIN else certgen.KEY_RSA2048
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def dir_for(self, publisher: str) -> pathlib.Path:
+        ident = publisher if self.key_type == certgen.KEY_RSA2048 else f"{publisher}\n{self.key_type}"
+        key = hashlib.sha256(ident.encode("utf-8")).hexdigest()[:24]
+        return self.root / key
+
+    def get(self, publisher: str, log=print):
+        """返回 (cer, pfx) 路径，缺失时调用 makecert + pvk2pfx 生成。"""
+        d = self.dir_for(publisher)
+        cer_file, pfx_file = d / "cert.cer", d / "cert.pfx"
+        with tracing.span("cert", publisher=publisher, backend=self.backend) as sp, self._lock_for(d.name):
+            if cer_file.exists() and pfx_file.exists():
+                sp["cached"] = True
+                log(t("pack_log_cert_cached", publisher=publisher))
+                return cer_file, pfx_file
+            sp["cached"] = False
+            d.mkdir(parents=True, exist_ok=True)
+            self._generate(publisher, d, log)
+            (d / "publisher.txt").write_text(publisher, encoding="utf-8")
+        return cer_file, pfx_file
+
+    def _generate(self, publisher: str, d: pathlib.Path, log):
+        # 先生成到临时名，成功后再改名，避免中断留下不完整的证书对
+        pvk_tmp, cer_tmp, pfx_tmp = d / "cert.pvk.tmp", d / "cert.cer.tmp", d / "cert.pfx.tmp"
+        for f in (pvk_tmp, cer_tmp, pfx_tmp):
+            f.unlink(missing_ok=True)
+
+        if self.backend == CERT_BACKEND_BUILTIN:
+            # 进程内生成，直接写出 .cer 与 .pfx，无需中间 .pvk
+            log(t("pack_log_gen_cert_builtin", kind=self.key_type))
+            with tracing.span("certgen", key=self.key_type):
+                certgen.generate(publisher, cer_tmp, pfx_tmp, self.key_type)
+            os.replace(cer_tmp, d / "cert.cer")
+            os.replace(pfx_tmp, d / "cert.pfx")
+            return
+
+        # 3. 生成证书（使用C#版本的参数格式）
+        log(t("pack_log_gen_cert"))
+        # 使用与C#版本完全相同的MakeCert参数
+        makecert_args = [
+            '-n', publisher,
+            '-r',
+            '-a', 'sha256',
+            '-len', '2048',
+            '-cy', 'end',
+            '-h', '0',
+            '-eku', '1.3.6.1.5.5.7.3.3',
+            '-b', '01/01/2000',
+            '-sv', str(pvk_tmp),
+            str(cer_tmp)
+        ]
+        _run(MAKECERT, makecert_args)
+
+        # 4. 转换证书（C#版本没有密码）
+        log(t("pack_log_convert_cert"))
+        pvk2pfx_args = [
+            '-pvk', str(pvk_tmp),
+            '-spc', str(cer_tmp),
+            '-pfx', str(pfx_tmp)
+        ]
+        _run(PVK2PFX, pvk2pfx_args)
+
+        os.replace(pvk_tmp, d / "cert.pvk")
+        os.replace(cer_tmp, d / "cert.cer")
+        os.replace(pfx_tmp, d / "cert.pfx")
+
+# 打包后端：外部 makeappx.exe，或内置的纯 Python 打包器（appx_writer）
+PACKER_MAKEAPPX = "makeappx"
+PACKER_BUILTIN = "builtin"
+
+def default_packer() -> str:
+    return PACKER_MAKEAPPX if os.name == "nt" and MAKEAPPX.exists() else PACKER_BUILTIN
+
+class PackSignJob:
+    """一个 UwpItem 的打包 + 签名流程，拆成 pack()/sign() 两个阶段供调度器分别限流。"""
+
+    def __init__(self, item: UwpItem, out_dir: pathlib.Path, log=print, packer: str = None,
+                 cert_store: "CertStore" = None, cancel: threading.Event = None, on_progress=None):
+        self.item = item
+        self.out_dir = out_dir
+        self.log = log
+        # cancel 置位后正在运行的工具会被连同子进程一起结束
+        self.cancel = cancel
+        # on_progress(已处理字节, 总字节)，打包过程中多次回调
+        self.on_progress = on_progress
+        self.packer = packer or default_packer()
+        self.cert_store = cert_store or CertStore()
+        # 使用C#风格的命名
+        self.ws_app_path = pathlib.Path(item.install_path)
+        self.file_name = self.ws_app_path.name
+        self.appx_file = out_dir / f"{self.file_name}.appx"
+        # 打包与签名都在临时文件上进行，全部完成后才原子替换为 appx_file，
+        # 中途崩溃不会破坏上一次的成品。signtool 按扩展名识别格式，临时名仍以 .appx 结尾
+        self.work_file = out_dir / f"{self.file_name}{PARTIAL_SUFFIX}"
+        # prepare_sign() 之后可用
+        self.publisher = ""
+        self.cer_file = None
+
+    def pack(self):
+        with tracing.span("pack", pkg=self.item.pkg_fullname, packer=self.packer) as sp:
+            start = time.perf_counter()
+            self._pack(sp)
+            sp["bytes_out"] = self.work_file.stat().st_size
+        # 为下次预扫描的耗时/大小估算积累数据
+        record_throughput(self.packer, sp.get("bytes_in"), sp["bytes_out"], time.perf_counter() - start)
+
+    def _pack(self, sp: dict):
+        # 清理上次残留的临时包及旧版本遗留的 .pvk/.pfx；已有的成品 .appx/.cer 保留到替换为止
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        for old_file in (self.work_file, self.out_dir / f"{self.file_name}.pvk",
+                         self.out_dir / f"{self.file_name}.pfx"):
+            old_file.unlink(missing_ok=True)
+
+        # 1. 打包（与C#版本相同的参数）
+        self.log(t("pack_log_pack"))
+        if self.packer == PACKER_BUILTIN:
+            st = appx_writer.pack_directory(self.ws_app_path, self.work_file,
+                                            progress=self._builtin_progress)
+            sp["files"], sp["bytes_in"] = st.files, st.bytes_in
+            self.log(t("pack_log_builtin_stats", files=st.files, mb=st.bytes_in / 1048576,
+                       sec=st.elapsed, rate=st.mb_per_s))
+            return
+        # -v 让 makeappx 逐文件输出 "Processing ..."，据此换算进度
+        progress = toolrun.MakeappxProgress(self.ws_app_path, self.on_progress or (lambda done, total: None))
+        sp["files"], sp["bytes_in"] = len(progress.sizes), progress.total
+        _run(MAKEAPPX, ['pack', '-d', str(self.ws_app_path), '-p', str(self.work_file), '-l', '-v'],
+             cancel=self.cancel, on_line=progress.feed)
+
+    def _builtin_progress(self, done: int, total: int):
+        # 内置打包器在进程内运行，取消时从进度回调抛出，AppxWriter 会删除半成品
+        if self.cancel is not None and self.cancel.is_set():
+            raise toolrun.ToolCancelled("pack cancelled")
+        if self.on_progress:
+            self.on_progress(done, total)
+
+    def _check_cancel(self, done: int = 0, total: int = 0):
+        if self.cancel is not None and self.cancel.is_set():
+            raise toolrun.ToolCancelled("verify cancelled")
+
+    def prepare_sign(self) -> pathlib.Path:
+        """签名前的准备：取 Publisher、取（或生成）证书，返回签名用的 pfx 路径。"""
+        # 2. 解析AppxManifest.xml获取Publisher（类似C#版本）
+        with tracing.span("manifest", pkg=self.item.pkg_fullname):
+            publisher = extract_publisher_from_manifest(self.ws_app_path, self.log)
+        if not publisher:
+            publisher = "CN=TempUWPExtractCert"
+
+        # 3/4. 证书：同一 Publisher 只生成一次，跨包、跨运行复用
+        cer_src, pfx_file = self.cert_store.get(publisher, self.log)
+        # .cer 放到输出目录，方便用户安装到受信任根证书
+        self.publisher = publisher
+        self.cer_file = self.out_dir / f"{self.file_name}.cer"
+        tmp = self.cer_file.with_name(self.cer_file.name + ".tmp")
+        shutil.copyfile(cer_src, tmp)
+        os.replace(tmp, self.cer_file)
+        return pfx_file
+
+    def sign(self):
+        # 5. 签名（单个包；批量调度时由 sign_files 一次签一组）
+        pfx_file = self.prepare_sign()
+        self.log(t("pack_log_signing"))
+        err = sign_files(pfx_file, [self.work_file], cancel=self.cancel)[self.work_file]
+        if err:
+            raise RuntimeError(err)
+        self.log(t("pack_log_sign_success"))
+        self.finalize()
+
+    def verify(self):
+        """校验生成的包（尚未替换时校验临时包）；有问题时删除临时包并抛出 RuntimeError。"""
+        target = self.work_file if self.work_file.exists() else self.appx_file
+        with tracing.span("verify", pkg=self.item.pkg_fullname) as sp:
+            res = appx_reader.verify_package(target, self.ws_app_path, progress=self._check_cancel)
+            sp["files"], sp["bytes_in"] = res.files, res.bytes_in
+        if res.ok:
+            self.log(t("verify_log_ok", files=res.files, blocks=res.blocks, mb=res.bytes_in / 1048576,
+                       sec=res.elapsed, rate=res.mb_per_s))
+            return
+        for err in res.errors:
+            self.log(t("verify_log_error", err=err))
+        # 损坏的临时包不能留给续跑，下次从头打包
+        self.work_file.unlink(missing_ok=True)
+        raise RuntimeError(t("verify_failed", count=res.error_count, err=res.errors[0]))
+
+    def finalize(self):
+        """把完成的临时包原子替换为最终的 .appx（已替换过时什么也不做）。"""
+        if self.work_file.exists():
+            os.replace(self.work_file, self.appx_file)
+
+    def restore(self, rec: dict):
+        """续跑时从日志记录恢复 prepare_sign() 得到的信息。"""
+        self.publisher = rec.get("publisher") or ""
+        if rec.get("cer") and (self.out_dir / rec["cer"]).exists():
+            self.cer_file = self.out_dir / rec["cer"]
+
+# --------------------------------------------------
+# 批量签名：同一证书的多个包合并为一次 signtool 调用
+# --------------------------------------------------
+# 每次调用最多签名的文件数；同时限制命令行总长度（Windows 上限 32767 字符）
+SIGN_CHUNK = 16
+SIGN_CMDLINE_MAX = 30000
+
+_SIGN_OK_RE = re.compile(r"^\s*Successfully signed:\s*(.+?)\s*$", re.I)
+_SIGN_FAIL_RE = re.compile(r"^\s*SignTool Error:.*?attempting to sign:\s*(.+?)\s*$", re.I)
+_SIGN_ERR_RE = re.compile(r"^\s*(SignTool Error:|Error information:)", re.I)
+
+def _path_key(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+def chunk_sign_files(files: list, chunk: int = SIGN_CHUNK, max_chars: int = SIGN_CMDLINE_MAX):
+    """按文件数和命令行长度把待签名文件切成若干组。"""
+    batch, size = [], 0
+    for f in files:
+        n = len(str(f)) + 3
+        if batch and (len(batch) >= chunk or size + n > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(f)
+        size += n
+    if batch:
+        yield batch
+
+def parse_sign_output(output: str, files: list) -> dict:
+    """解析 signtool 的逐文件结果，返回 {文件: 错误信息或空串}。
+
+    成功行形如 "Successfully signed: <path>"；失败时先输出若干
+    "SignTool Error: ..." / "Error information: ..." 行，最后一行为
+    "SignTool Error: An error occurred while attempting to sign: <path>"。
+    输出中没有提到的文件视为失败。"""
+    keys = {_path_key(f): f for f in files}
+    results = {}
+    pending_err = []
+    for line in output.splitlines():
+        m = _SIGN_OK_RE.match(line)
+        if m:
+            f = keys.get(_path_key(m.group(1)))
+            if f is not None:
+                results[f] = ""
+            pending_err = []
+            continue
+        m = _SIGN_FAIL_RE.match(line)
+        if m:
+            f = keys.get(_path_key(m.group(1)))
+            if f is not None:
+                results[f] = " ".join(pending_err) or line.strip()
+            pending_err = []
+            continue
+        if _SIGN_ERR_RE.match(line):
+            pending_err.append(line.strip())
+    for f in files:
+        results.setdefault(f, " ".join(pending_err) or t("sign_no_success"))
+    return results
+
+def sign_files(pfx_file: pathlib.Path, files: list, cancel: threading.Event = None) -> dict:
+    """用一次 signtool 调用签名 files（同一证书），返回 {文件: 错误信息或空串}。"""
+    signtool_args = [
+        'sign',
+        '-fd', 'SHA256',
+        '-a',
+        '-f', str(pfx_file),
+        *[str(f) for f in files]
+    ]
+    with tracing.span("sign", files=len(files),
+                      bytes=sum(f.stat().st_size for f in map(pathlib.Path, files) if f.exists())) as sp:
+        _, out = _run_unchecked(SIGNTOOL, signtool_args, cancel=cancel)
+        results = parse_sign_output(out, files)
+        sp["failed"] = sum(1 for err in results.values() if err)
+    return results
+
+# --------------------------------------------------
+# 阶段计时：每次运行导出一个 Chrome trace（chrome://tracing / ui.perfetto.dev 可打开）
+# --------------------------------------------------
+TRACE_DIR = CACHE_DIR / "traces"
+# 默认目录下只保留最近若干次运行的 trace
+TRACE_KEEP = 20
+
+def trace_path(kind: str) -> pathlib.Path:
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"{int(time.time() * 1000) % 1000:03d}"
+    return TRACE_DIR / f"trace-{stamp}-{kind}.json"
+
+def finish_trace(tracer: tracing.Tracer, path=None, log=print):
+    """导出 tracer 并逐行输出汇总表；path 为空时写入 TRACE_DIR。返回文件路径，失败返回 None。"""
+    out = None
+    try:
+        out = tracer.export(path or trace_path(tracer.name))
+        if path is None:
+            tracing.prune(TRACE_DIR, TRACE_KEEP)
+    except OSError as e:
+        log(t("trace_save_error", err=e))
+    for line in tracer.format_summary().splitlines():
+        log(line)
+    if out:
+        log(t("trace_saved", path=out))
+    return out
+
+# --------------------------------------------------
+# 预扫描：并发统计每个安装目录的大小，按历史吞吐估算输出大小与耗时，并检查剩余空间
+# --------------------------------------------------
+@dataclass
+class TreeScan:
+    files: int = 0
+    bytes: int = 0
+    est_out_bytes: int = 0
+    est_seconds: float = 0.0
+    # 目录内容指纹：全部文件的相对路径、大小、修改时间的 SHA-256
+    fingerprint: str = ""
+    error: str = ""
+
+def scan_tree(path) -> TreeScan:
+    """用 os.scandir 迭代遍历目录（不跟随符号链接），统计文件数、总字节数并计算指纹。
+    Windows 上 DirEntry 自带大小与时间信息，无需逐个文件再调用 stat。"""
+    res = TreeScan()
+    root = str(path)
+    cut = len(os.path.join(root, ""))
+    stack = [root]
+    listing = []
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            res.files += 1
+                            res.bytes += st.st_size
+                            listing.append(f"{entry.path[cut:]}\t{st.st_size}\t{st.st_mtime_ns}")
+                    except OSError:
+                        continue
+        except OSError as e:
+            if d == root:
+                res.error = str(e)
+    if not res.error:
+        listing.sort()
+        res.fingerprint = hashlib.sha256("\n".join(listing).encode("utf-8", "surrogatepass")).hexdigest()
+    return res
+
+THROUGHPUT_FILE = CACHE_DIR / "throughput.json"
+# 没有历史数据时的假设；压缩率取 1.0，空间检查宁可保守
+DEFAULT_THROUGHPUT = {"mb_per_s": 40.0, "ratio": 1.0, "samples": 0}
+# 指数滑动平均的权重；太小的包启动开销占比大，不计入
+THROUGHPUT_ALPHA = 0.3
+THROUGHPUT_MIN_BYTES = 4 * 1048576
+_throughput_lock = threading.Lock()
+
+def load_throughput(packer: str) -> dict:
+    try:
+        with open(THROUGHPUT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f).get(packer)
+        if data and data.get("mb_per_s", 0) > 0:
+            return data
+    except Exception:
+        pass
+    return dict(DEFAULT_THROUGHPUT)
+
+def record_throughput(packer: str, bytes_in: int, bytes_out: int, seconds: float):
+    """用一次成功打包的结果更新该打包方式的历史吞吐与压缩率。"""
+    if not bytes_in or bytes_in < THROUGHPUT_MIN_BYTES or seconds <= 0:
+        return
+    rate = bytes_in / 1048576 / seconds
+    ratio = bytes_out / bytes_in
+    with _throughput_lock:
+        try:
+            with open(THROUGHPUT_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        cur = data.get(packer)
+        if not cur or not cur.get("samples"):
+            cur = {"mb_per_s": rate, "ratio": ratio, "samples": 1}
+        else:
+            a = THROUGHPUT_ALPHA
+            cur = {"mb_per_s": cur["mb_per_s"] * (1 - a) + rate * a,
+                   "ratio": cur["ratio"] * (1 - a) + ratio * a,
+                   "samples": cur["samples"] + 1}
+        data[packer] = cur
+        try:
+            _write_json_atomic(THROUGHPUT_FILE, data)
+        except Exception:
+            pass
+
+def prescan(items: List[UwpItem], packer: str = None, workers: int = 8, on_result=None,
+            cancel: threading.Event = None) -> List[TreeScan]:
+    """并发扫描 items 的安装目录并填好估算值；on_result(index, TreeScan) 在每个包扫描完时回调。"""
+    hist = load_throughput(packer or default_packer())
+    bytes_per_s = hist["mb_per_s"] * 1048576
+    scans = [TreeScan() for _ in items]
+
+    def one(idx: int):
+        if cancel is not None and cancel.is_set():
+            return
+        sc = scan_tree(items[idx].install_path)
+        sc.est_out_bytes = int(sc.bytes * hist["ratio"])
+        sc.est_seconds = sc.bytes / bytes_per_s
+        scans[idx] = sc
+        if on_result:
+            on_result(idx, sc)
+
+    if items:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items))),
+                                thread_name_prefix="scan") as pool:
+            for f in [pool.submit(one, i) for i in range(len(items))]:
+                f.result()
+    return scans
+
+# 估算之外额外预留的空间（签名、证书、文件系统开销）
+SPACE_MARGIN = 256 * 1048576
+
+def _existing_parent(path: pathlib.Path) -> pathlib.Path:
+    path = pathlib.Path(path).absolute()
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+def check_free_space(out_dir: pathlib.Path, items: List[UwpItem], scans: List[TreeScan],
+                     in_flight: int = 1):
+    """返回 (需要的字节数, 可用字节数)。
+
+    旧的同名 .appx 在新包完成后才被替换，其大小计入可用空间，但同时在打包的
+    in_flight 个包里最大的几个旧文件在替换前仍占着空间，不计入。"""
+    out_dir = pathlib.Path(out_dir)
+    need = int(sum(sc.est_out_bytes for sc in scans) * 1.05) + SPACE_MARGIN
+    old = []
+    for it in items:
+        try:
+            old.append((out_dir / f"{pathlib.Path(it.install_path).name}.appx").stat().st_size)
+        except OSError:
+            pass
+    old.sort()
+    reclaim = sum(old[:-in_flight]) if in_flight > 0 else sum(old)
+    free = shutil.disk_usage(_existing_parent(out_dir)).free
+    return need, free + reclaim
+
+# --------------------------------------------------
+# 备份目录清单：记录已导出的包，增量备份时跳过未变化的包
+# --------------------------------------------------
+CATALOG_NAME = "backup_catalog.json"
+CATALOG_VERSION = 1
+# 清单写盘的最小间隔（秒），避免大批量时每个包都整体重写一次
+CATALOG_SAVE_INTERVAL = 5.0
+
+def file_sha256(path, block: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(block)
+            if not buf:
+                break
+            h.update(buf)
+    return h.hexdigest()
+
+class BackupCatalog:
+    """out_dir/backup_catalog.json：每个已导出包的全名、源目录指纹、输出文件哈希与签名证书。"""
+
+    def __init__(self, out_dir: pathlib.Path):
+        self.out_dir = pathlib.Path(out_dir)
+        self.path = self.out_dir / CATALOG_NAME
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self.entries = data.get("packages") or {}
+        except Exception:
+            pass
+
+    def is_current(self, item: UwpItem, scan: TreeScan, signed: bool) -> bool:
+        """同一 PackageFullName、源目录未变化、输出仍在且签名要求已满足时视为最新。"""
+        e = self.entries.get(item.pkg_fullname)
+        if not e or not scan.fingerprint or e.get("fingerprint") != scan.fingerprint:
+            return False
+        if signed and not e.get("signed"):
+            return False
+        try:
+            return (self.out_dir / e["file"]).stat().st_size == e.get("size")
+        except (OSError, KeyError):
+            return False
+
+    def record(self, item: UwpItem, scan: TreeScan, appx_file: pathlib.Path,
+               cer_file: pathlib.Path = None, publisher: str = ""):
+        """任务完成后登记（在工作线程中调用，会计算输出文件哈希）。"""
+        entry = {
+            "file": appx_file.name,
+            "name": item.name,
+            "version": item.version,
+            "arch": item.arch,
+            "fingerprint": scan.fingerprint if scan else "",
+            "size": appx_file.stat().st_size,
+            "sha256": file_sha256(appx_file),
+            "signed": cer_file is not None,
+            "cert": None,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        if cer_file is not None:
+            # 证书指纹（与 Windows 证书管理器中的 Thumbprint 相同）
+            entry["cert"] = {"publisher": publisher,
+                             "sha1": hashlib.sha1(cer_file.read_bytes()).hexdigest().upper()}
+        with self._lock:
+            self.entries[item.pkg_fullname] = entry
+            self._dirty = True
+        if time.monotonic() - self._last_save >= CATALOG_SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            _write_json_atomic(self.path, {"version": CATALOG_VERSION, "packages": self.entries})
+
+# --------------------------------------------------
+# 任务日志：批量任务每完成一个阶段追加一行，崩溃或重启后从最后完成的阶段续跑
+# --------------------------------------------------
+JOURNAL_NAME = ".uwp_journal.jsonl"
+PARTIAL_SUFFIX = ".partial.appx"
+STAGE_PACKED = "packed"
+STAGE_CERT = "cert"
+STAGE_SIGNED = "signed"
+
+class JobJournal:
+    """out_dir/.uwp_journal.jsonl：每行一条 {pkg, stage, fingerprint, file, size, ...}，写入后立即 fsync。
+
+    只追加不改写，崩溃时最多丢失（或截断）最后一行，读取时跳过损坏的行即可。
+    批次结束后 compact() 去掉已完成的包；全部完成时删除日志文件。"""
+
+    def __init__(self, out_dir: pathlib.Path):
+        self.out_dir = pathlib.Path(out_dir)
+        self.path = self.out_dir / JOURNAL_NAME
+        self.state = {}
+        self._lock = threading.Lock()
+        self._fh = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(rec, dict) and rec.get("pkg"):
+                        self.state[rec["pkg"]] = rec
+        except OSError:
+            pass
+
+    def resume_stage(self, item: UwpItem, scan: TreeScan) -> str:
+        """返回可以续跑的阶段；源目录有变化或中间产物已不在时返回 None（从头开始）。"""
+        rec = self.state.get(item.pkg_fullname)
+        if not rec or not scan or not scan.fingerprint or rec.get("fingerprint") != scan.fingerprint:
+            return None
+        # 找到大小一致的中间产物才算数；已签名的包可能已替换为最终名
+        names = [rec.get("file")]
+        if rec.get("stage") == STAGE_SIGNED:
+            names.append(f"{pathlib.Path(item.install_path).name}.appx")
+        for name in names:
+            try:
+                if name and (self.out_dir / name).stat().st_size == rec.get("size"):
+                    break
+            except OSError:
+                continue
+        else:
+            return None
+        stage = rec.get("stage")
+        if stage == STAGE_CERT and not (rec.get("cer") and (self.out_dir / rec["cer"]).exists()):
+            # .cer 被删掉了：重新准备证书即可，不必重新打包
+            stage = STAGE_PACKED
+        return stage
+
+    def record(self, pkg: str) -> dict:
+        return self.state.get(pkg) or {}
+
+    def mark(self, item: UwpItem, stage: str, scan: TreeScan, file: pathlib.Path, **extra):
+        """记录 item 完成了 stage；同一包之前记录的 publisher/cer 会沿用。"""
+        prev = self.state.get(item.pkg_fullname) or {}
+        rec = {"pkg": item.pkg_fullname, "stage": stage,
+               "fingerprint": scan.fingerprint if scan else "",
+               "file": file.name, "size": file.stat().st_size,
+               "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        rec.update({k: prev[k] for k in ("publisher", "cer") if k in prev})
+        rec.update(extra)
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.state[item.pkg_fullname] = rec
+
+    def compact(self, finished):
+        """去掉 finished 中（已完成并登记到备份清单）的包，其余保留到下次续跑。"""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            for pkg in finished:
+                self.state.pop(pkg, None)
+            if not self.state:
+                self.path.unlink(missing_ok=True)
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for rec in self.state.values():
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+
+# --------------------------------------------------
+# 浏览输出目录：只读各包的中央目录与清单，不解压
+# --------------------------------------------------
+def list_archives(out_dir, workers: int = 8) -> List[appx_reader.ArchiveSummary]:
+    """列出 out_dir 中已完成的 .appx/.msix（跳过续跑用的临时包），按文件名排序。"""
+    out_dir = pathlib.Path(out_dir)
+    paths = sorted(p for p in out_dir.iterdir()
+                   if p.is_file() and p.suffix.lower() in appx_reader.PACKAGE_SUFFIXES
+                   and not p.name.lower().endswith(PARTIAL_SUFFIX))
+    if not paths:
+        return []
+    with tracing.span("list_archives", count=len(paths)):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths))),
+                                thread_name_prefix="inspect") as pool:
+            return list(pool.map(appx_reader.summarize, paths))
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+# --------------------------------------------------
+# 依赖框架：按清单中的 PackageDependency 把 VCLibs / .NET Native / UI.Xaml 等一并导出
+# --------------------------------------------------
+def version_key(v: str):
+    return tuple(int(p) if p.isdigit() else 0 for p in (v or "").split("."))
+
+def identity_name(item: UwpItem) -> str:
+    return item.pkg_fullname.split("_", 1)[0]
+
+def _arch_compatible(app_arch: str, dep_arch: str) -> bool:
+    # 中性应用在各架构上都可能加载对应架构的框架，全部带上
+    if dep_arch == ARCH_NEUTRAL or app_arch in (ARCH_NEUTRAL, "Unknown"):
+        return True
+    return dep_arch == app_arch
+
+@dataclass
+class DependencyPlan:
+    items: List[UwpItem]           # 选中的包在前，自动加入的框架在后
+    deps: Dict[int, List[int]]     # 下标 -> 它依赖的包的下标
+    added: List[UwpItem]
+    missing: List[tuple]           # (UwpItem, PackageDependency)：本机没有满足条件的已安装包
+
+def match_dependency(item: UwpItem, dep, by_name: dict) -> List[UwpItem]:
+    """在已安装包中为 item 的一条依赖挑选包：名称一致、版本不低于 MinVersion、架构兼容、
+    Publisher 一致（两边都有时）；每种架构取版本最高的一个。"""
+    best = {}
+    for cand in by_name.get(dep.name.lower(), ()):
+        if dep.min_version and version_key(cand.version) < version_key(dep.min_version):
+            continue
+        if dep.publisher and cand.publisher and dep.publisher != cand.publisher:
+            continue
+        if not _arch_compatible(item.arch, cand.arch):
+            continue
+        cur = best.get(cand.arch)
+        if cur is None or version_key(cand.version) > version_key(cur.version):
+            best[cand.arch] = cand
+    return list(best.values())
+
+def plan_dependencies(selected: List[UwpItem], installed: List[UwpItem]) -> DependencyPlan:
+    """把 selected 依赖的框架（递归）加入批次；同一个框架无论被多少个包依赖都只导出一次。"""
+    items = list(selected)
+    index = {it.pkg_fullname: i for i, it in enumerate(items)}
+    by_name = {}
+    for it in installed:
+        by_name.setdefault(identity_name(it).lower(), []).append(it)
+    deps, added, missing = {}, [], []
+    i = 0
+    while i < len(items):
+        item = items[i]
+        mi = load_manifest(item.install_path)
+        for dep in (mi.dependencies if mi else ()):
+            if dep.optional:
+                continue
+            found = match_dependency(item, dep, by_name)
+            if not found:
+                missing.append((item, dep))
+            for cand in found:
+                j = index.get(cand.pkg_fullname)
+                if j is None:
+                    j = index[cand.pkg_fullname] = len(items)
+                    items.append(cand)
+                    added.append(cand)
+                if j != i and j not in deps.setdefault(i, []):
+                    deps[i].append(j)
+        i += 1
+    _break_cycles(deps, len(items))
+    return DependencyPlan(items, deps, added, missing)
+
+def _break_cycles(deps: Dict[int, List[int]], n: int):
+    # 依赖成环时（清单异常）去掉环上的边，保证调度不会互相等待
+    waiting = {i: len(deps.get(i, ())) for i in range(n)}
+    users = {}
+    for i, ds in deps.items():
+        for j in ds:
+            users.setdefault(j, []).append(i)
+    ready = [i for i in range(n) if not waiting[i]]
+    while ready:
+        j = ready.pop()
+        for i in users.get(j, ()):
+            waiting[i] -= 1
+            if not waiting[i]:
+                ready.append(i)
+    for i, left in waiting.items():
+        if left:
+            deps.pop(i, None)
+
+# --------------------------------------------------
+# 批量调度：有界线程池 + 打包/签名分别限流
+# --------------------------------------------------
+JOB_QUEUED = "queued"
+JOB_PACKING = "packing"
+JOB_SIGNING = "signing"
+JOB_VERIFYING = "verifying"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+# 增量备份：输出目录中已有相同版本且源目录未变化
+JOB_SKIPPED = "skipped"
+
+CPU_COUNT = os.cpu_count() or 2
+
+@dataclass
+class BatchConfig:
+    workers: int = max(2, min(8, CPU_COUNT))
+    # makeappx pack 主要受磁盘 I/O 限制，并发过高反而互相抢磁盘
+    pack_limit: int = 2
+    # makecert / signtool 主要消耗 CPU
+    sign_limit: int = CPU_COUNT
+    skip_sign: bool = False
+    packer: str = None
+    cert_backend: str = None
+    cert_key: str = certgen.KEY_RSA2048
+    # 同一证书的包攒够多少个就发起一次批量 signtool 调用
+    sign_chunk: int = SIGN_CHUNK
+    # 记录各阶段耗时；已有激活的 Tracer（如命令行）时记到其中，否则每次运行单独导出
+    trace: bool = True
+    trace_path: str = None
+    # 开始前检查输出盘剩余空间，不足时不启动任何任务
+    check_space: bool = True
+    # 只备份新增或有变化的包（依据输出目录中的 backup_catalog.json）
+    changed_only: bool = False
+    # 按清单中的 PackageDependency 自动加入已安装的框架包（需要传入 installed）
+    include_deps: bool = True
+    # 最后一步：顺序读一遍生成的包，核对块哈希、CRC 与源目录的文件清单
+    verify: bool = False
+
+@dataclass
+class JobResult:
+    item: UwpItem
+    status: str = JOB_QUEUED
+    error: str = ""
+    elapsed: float = 0.0
+
+class BatchScheduler:
+    """接收任意数量的 UwpItem，按 BatchConfig 在线程池中并发执行 PackSignJob。
+
+    打包完成的包按证书分组，攒够 sign_chunk 个（或全部打包结束后）再用一次
+    signtool 调用批量签名，逐文件解析结果后分别设置每个包的状态。
+
+    每个包完成的阶段（已打包、证书就绪、已签名）记入 out_dir 中的 JobJournal；
+    中断后重新运行同一批次时，源目录未变化的包从最后完成的阶段继续。
+
+    传入 installed（全部已安装包）且 cfg.include_deps 时，先按清单依赖把框架包加入
+    self.items（排在选中的包之后，同一框架只出现一次）。任务按依赖关系组成 DAG：
+    一个包在它依赖的包打包完成后才开始打包，互不相关的包照常并行；依赖打包失败时
+    依赖它的包直接标记为失败。
+
+    on_status(index, status) 在每次状态变化时回调，on_log(msg) 接收带包名前缀的日志，
+    on_progress(index, 比例 0~1, MB/s) 在打包过程中按 PROGRESS_INTERVAL 节流回调，
+    on_scan(index, TreeScan) 在开始打包前的预扫描中回调；回调都会在工作线程中被调用。
+
+    cfg.verify 时每个包在替换为最终文件前先经过 appx_reader.verify_package() 校验，
+    校验失败的包标记为失败，临时包被删除。"""
+
+    PROGRESS_INTERVAL = 0.25
+    # 主线程分段等待任务结束的间隔（秒）；Windows 上无超时的锁等待收不到 Ctrl+C
+    WAIT_SLICE = 0.5
+
+    def __init__(self, items: List[UwpItem], out_dir: pathlib.Path, cfg: BatchConfig = None,
+                 on_status=None, on_log=None, on_progress=None, on_scan=None,
+                 installed: List[UwpItem] = None):
+        self.cfg = cfg or BatchConfig()
+        self.plan = None
+        if self.cfg.include_deps and installed is not None:
+            self.plan = plan_dependencies(items, installed)
+            items = self.plan.items
+        self.items = list(items)
+        self.deps = self.plan.deps if self.plan else {}
+        self.out_dir = pathlib.Path(out_dir)
+        self.on_status = on_status or (lambda idx, status: None)
+        self.on_log = on_log or print
+        self.on_progress = on_progress
+        self.on_scan = on_scan
+        self.scans: List[TreeScan] = []
+        self.results = [JobResult(it) for it in self.items]
+        self._pack_slots = threading.BoundedSemaphore(max(1, self.cfg.pack_limit))
+        self._sign_slots = threading.BoundedSemaphore(max(1, self.cfg.sign_limit))
+        self._cancel = threading.Event()
+        self.cert_store = CertStore(backend=self.cfg.cert_backend, key_type=self.cfg.cert_key)
+        self.catalog = BackupCatalog(self.out_dir)
+        self.journal = JobJournal(self.out_dir)
+        # 下标 -> 上次运行已完成的阶段（预扫描后确定）
+        self._resume = {}
+        self._jobs = {}
+        self._started = {}
+        # pfx -> 等待签名的任务下标
+        self._sign_groups = {}
+        self._sign_lock = threading.Lock()
+        self._sign_futures = []
+        self._pool = None
+        # 校验以顺序读盘为主，与打包一样限制并发
+        self._verify_slots = threading.BoundedSemaphore(max(1, self.cfg.pack_limit))
+        # 依赖 DAG：下标 -> 尚未打包完成的依赖；依赖 -> 等待它的包
+        self._dag_lock = threading.Lock()
+        self._waiting = {}
+        self._users = {}
+        self._released = set()
+        self._pack_futures = []
+
+    def cancel(self):
+        # 正在运行的工具进程连同子进程一起结束，尚未开始的阶段不再启动
+        self._cancel.set()
+
+    def _progress_cb(self, idx: int):
+        if self.on_progress is None:
+            return None
+        start = time.perf_counter()
+        last = [0.0]
+
+        def cb(done: int, total: int):
+            now = time.perf_counter()
+            if now - last[0] < self.PROGRESS_INTERVAL and done < total:
+                return
+            last[0] = now
+            rate = done / 1048576 / (now - start) if now > start else 0.0
+            self.on_progress(idx, done / total if total else 1.0, rate)
+        return cb
+
+    def _set_status(self, idx: int, status: str, error: str = ""):
+        res = self.results[idx]
+        res.status = status
+        res.error = error
+        if status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED) and idx in self._started:
+            res.elapsed = time.perf_counter() - self._started[idx]
+        self.on_status(idx, status)
+
+    def _journal(self, idx: int, stage: str, file: pathlib.Path, **extra):
+        # 日志写不进去只影响续跑，不影响本次任务
+        try:
+            self.journal.mark(self.items[idx], stage, self.scans[idx] if self.scans else None,
+                              file, **extra)
+        except OSError as e:
+            self.on_log(t("journal_error", err=e))
+
+    def _run_one(self, idx: int):
+        item = self.items[idx]
+        tag = item.name or item.pkg_fullname
+        job = PackSignJob(item, self.out_dir, log=lambda msg: self.on_log(f"[{tag}] {msg}"),
+                          packer=self.cfg.packer, cert_store=self.cert_store,
+                          cancel=self._cancel, on_progress=self._progress_cb(idx))
+        self._jobs[idx] = job
+        self._started[idx] = time.perf_counter()
+        stage = self._resume.get(idx)
+        try:
+            if stage is None:
+                with self._pack_slots:
+                    if self._cancel.is_set():
+                        self._set_status(idx, JOB_CANCELLED)
+                        return
+                    self._set_status(idx, JOB_PACKING)
+                    job.pack()
+                self._journal(idx, STAGE_PACKED, job.work_file)
+            else:
+                job.restore(self.journal.record(item.pkg_fullname))
+                job.log(t("journal_resume", stage=t("journal_stage_" + stage)))
+            self._release(idx, packed=True)
+            if self.cfg.skip_sign or stage == STAGE_SIGNED:
+                if self.cfg.skip_sign:
+                    job.log(t("pack_log_skipped"))
+                self._finish(idx)
+                return
+            with self._sign_slots:
+                if self._cancel.is_set():
+                    self._set_status(idx, JOB_CANCELLED)
+                    return
+                self._set_status(idx, JOB_SIGNING)
+                pfx_file = job.prepare_sign()
+            if stage != STAGE_CERT:
+                self._journal(idx, STAGE_CERT, job.work_file, publisher=job.publisher,
+                              cer=job.cer_file.name)
+            self._queue_sign(idx, pfx_file)
+        except toolrun.ToolCancelled:
+            self._set_status(idx, JOB_CANCELLED)
+        except Exception as e:
+            job.log(t("pack_error", err=e))
+            self._set_status(idx, JOB_FAILED, str(e))
+        finally:
+            self._release(idx, packed=False)
+
+    # ---------- 依赖 DAG ----------
+    def _submit(self, fn, *args):
+        """提交到线程池；批次已取消（中断时线程池已关闭）时不再提交，返回 None。"""
+        if self._cancel.is_set():
+            return None
+        try:
+            return self._pool.submit(tracing.bind(fn), *args)
+        except RuntimeError:
+            return None
+
+    def _submit_pack(self, idx: int):
+        fut = self._submit(self._run_one, idx)
+        if fut is None:
+            self._set_status(idx, JOB_CANCELLED)
+            self._release(idx, packed=False)
+            return
+        with self._dag_lock:
+            self._pack_futures.append(fut)
+
+    def _release(self, idx: int, packed: bool):
+        """idx 的打包阶段结束：成功时启动依赖已全部就绪的包，否则让等待它的包（递归）失败。
+        每个下标只有第一次调用生效。"""
+        with self._dag_lock:
+            if idx in self._released:
+                return
+            self._released.add(idx)
+            users = self._users.pop(idx, [])
+            ready = []
+            for u in users:
+                self._waiting[u].discard(idx)
+                if packed and not self._waiting[u] and u not in self._released:
+                    ready.append(u)
+        if packed:
+            for u in ready:
+                self._submit_pack(u)
+            return
+        dep = self.items[idx]
+        for u in users:
+            if self.results[u].status != JOB_QUEUED:
+                continue
+            if self._cancel.is_set() or self.results[idx].status == JOB_CANCELLED:
+                self._set_status(u, JOB_CANCELLED)
+            else:
+                msg = t("dep_failed", name=dep.name or dep.pkg_fullname)
+                self.on_log(f"[{self.items[u].name or self.items[u].pkg_fullname}] {msg}")
+                self._set_status(u, JOB_FAILED, msg)
+            self._release(u, packed=False)
+
+    def _wait_futures(self, lock: threading.Lock, futures: list):
+        # 任务在运行中还会继续提交新任务，列表会在等待过程中增长
+        done = 0
+        while True:
+            with lock:
+                batch = futures[done:]
+            if not batch:
+                return
+            pending = set(batch)
+            while pending:
+                _, pending = wait(pending, timeout=self.WAIT_SLICE)
+            for f in batch:
+                f.result()
+            done += len(batch)
+
+    def _wait_packs(self):
+        self._wait_futures(self._dag_lock, self._pack_futures)
+
+    def _queue_sign(self, idx: int, pfx_file: pathlib.Path):
+        chunk = None
+        with self._sign_lock:
+            group = self._sign_groups.setdefault(str(pfx_file), [])
+            group.append(idx)
+            if len(group) >= max(1, self.cfg.sign_chunk):
+                chunk = list(group)
+                group.clear()
+        if chunk:
+            self._submit_sign(pfx_file, chunk)
+
+    def _submit_sign(self, pfx_file, idxs: list):
+        files = [self._jobs[i].work_file for i in idxs]
+        by_file = dict(zip(files, idxs))
+        # 命令行过长时再拆分
+        for part in chunk_sign_files(files, chunk=len(files)):
+            part = [by_file[f] for f in part]
+            fut = self._submit(self._sign_chunk, pathlib.Path(pfx_file), part)
+            if fut is None:
+                for i in part:
+                    self._set_status(i, JOB_CANCELLED)
+                continue
+            with self._sign_lock:
+                self._sign_futures.append(fut)
+
+    def _sign_chunk(self, pfx_file: pathlib.Path, idxs: list):
+        with self._sign_slots:
+            if self._cancel.is_set():
+                for i in idxs:
+                    self._set_status(i, JOB_CANCELLED)
+                return
+            self.on_log(t("pack_log_signing_batch", count=len(idxs)))
+            try:
+                results = sign_files(pfx_file, [self._jobs[i].work_file for i in idxs],
+                                     cancel=self._cancel)
+            except toolrun.ToolCancelled:
+                for i in idxs:
+                    self._set_status(i, JOB_CANCELLED)
+                return
+            except Exception as e:
+                # signtool 本身无法启动：整组失败
+                results = {self._jobs[i].work_file: str(e) for i in idxs}
+        for i in idxs:
+            job = self._jobs[i]
+            err = results.get(job.work_file, "")
+            if err:
+                job.log(t("pack_error", err=err))
+                self._set_status(i, JOB_FAILED, err)
+                continue
+            job.log(t("pack_log_sign_success"))
+            self._journal(i, STAGE_SIGNED, job.work_file)
+            if self.cfg.verify:
+                # 每个包单独校验，不占用这一组的签名线程
+                fut = self._submit(self._finish, i)
+                if fut is None:
+                    self._set_status(i, JOB_CANCELLED)
+                    continue
+                with self._sign_lock:
+                    self._sign_futures.append(fut)
+            else:
+                self._finish(i)
+
+    def _finish(self, idx: int):
+        """最后阶段：（可选）校验，再把临时包替换为最终的 .appx 并登记到备份清单。"""
+        job = self._jobs[idx]
+        try:
+            if self.cfg.verify:
+                with self._verify_slots:
+                    if self._cancel.is_set():
+                        self._set_status(idx, JOB_CANCELLED)
+                        return
+                    self._set_status(idx, JOB_VERIFYING)
+                    job.verify()
+            job.finalize()
+        except toolrun.ToolCancelled:
+            self._set_status(idx, JOB_CANCELLED)
+            return
+        except Exception as e:
+            job.log(t("pack_error", err=e))
+            self._set_status(idx, JOB_FAILED, str(e))
+            return
+        self._finish_ok(idx)
+
+    def run(self) -> List[JobResult]:
+        if not self.items:
+            return self.results
+        if not self.cfg.trace or tracing.current() is not None:
+            return self._run_all()
+        tracer = tracing.Tracer("batch")
+        with tracer.activate():
+            self._run_all()
+        finish_trace(tracer, self.cfg.trace_path, self.on_log)
+        return self.results
+
+    def _prescan(self) -> bool:
+        """预扫描并检查剩余空间；空间不足时把所有任务标为失败并返回 False。"""
+        with tracing.span("prescan", packages=len(self.items)) as sp:
+            self.scans = prescan(self.items, self.cfg.packer, workers=max(4, self.cfg.workers),
+                                 on_result=self.on_scan, cancel=self._cancel)
+            sp["bytes"] = total = sum(sc.bytes for sc in self.scans)
+        eta = sum(sc.est_seconds for sc in self.scans)
+        self.on_log(t("prescan_summary", count=len(self.items), size=format_bytes(total),
+                      out=format_bytes(sum(sc.est_out_bytes for sc in self.scans)),
+                      eta=format_duration(eta)))
+        for idx, item in enumerate(self.items):
+            stage = self.journal.resume_stage(item, self.scans[idx])
+            if stage:
+                self._resume[idx] = stage
+        if not self.cfg.check_space:
+            return True
+        # 已打包完成、只需续签的包不再占用新空间
+        todo = [i for i in range(len(self.items)) if i not in self._resume]
+        need, free = check_free_space(self.out_dir, [self.items[i] for i in todo],
+                                      [self.scans[i] for i in todo], in_flight=self.cfg.pack_limit)
+        if need <= free:
+            return True
+        msg = t("space_insufficient", path=self.out_dir, need=format_bytes(need), free=format_bytes(free))
+        self.on_log(msg)
+        for idx in range(len(self.items)):
+            self._set_status(idx, JOB_FAILED, msg)
+        return False
+
+    def _finish_ok(self, idx: int):
+        job = self._jobs[idx]
+        try:
+            self.catalog.record(self.items[idx], self.scans[idx] if self.scans else None,
+                                job.appx_file, job.cer_file, job.publisher)
+        except Exception as e:
+            # 清单登记失败不影响包本身，只是下次增量备份会重新导出
+            job.log(t("catalog_error", err=e))
+        self._set_status(idx, JOB_DONE)
+
+    def _pending(self) -> List[int]:
+        """增量模式下跳过清单中已是最新的包，返回需要执行的下标。"""
+        if not self.cfg.changed_only:
+            return list(range(len(self.items)))
+        signed = not self.cfg.skip_sign
+        pending = []
+        for idx, item in enumerate(self.items):
+            if self.catalog.is_current(item, self.scans[idx], signed):
+                self._set_status(idx, JOB_SKIPPED)
+            else:
+                pending.append(idx)
+        self.on_log(t("catalog_skip_summary", skipped=len(self.items) - len(pending), queued=len(pending)))
+        return pending
+
+    def _log_plan(self):
+        plan = self.plan
+        if plan.added:
+            self.on_log(t("deps_added", count=len(plan.added),
+                          names=", ".join(it.pkg_fullname for it in plan.added)))
+        for item, dep in plan.missing:
+            self.on_log(t("dep_missing", name=item.name or item.pkg_fullname, dep=dep.name,
+                          version=dep.min_version or "-"))
+
+    def _run_all(self) -> List[JobResult]:
+        if self.plan:
+            self._log_plan()
+        if not self._prescan():
+            return self.results
+        pending = self._pending()
+        if not pending:
+            return self.results
+        # 只有同在本次待执行列表中的依赖才需要等待（已跳过的视为就绪）
+        todo = set(pending)
+        for i in pending:
+            self._waiting[i] = {j for j in self.deps.get(i, ()) if j in todo}
+            for j in self._waiting[i]:
+                self._users.setdefault(j, []).append(i)
+        workers = max(1, min(self.cfg.workers, len(pending)))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pack")
+        try:
+            # 先取出就绪列表再提交：先提交的任务可能很快结束并修改 _waiting
+            for i in [i for i in pending if not self._waiting[i]]:
+                self._submit_pack(i)
+            self._wait_packs()
+            # 全部打包结束：不足一组的剩余包也各自签掉
+            with self._sign_lock:
+                groups = [(pfx, list(idxs)) for pfx, idxs in self._sign_groups.items() if idxs]
+                self._sign_groups.clear()
+            for pfx, idxs in groups:
+                self._submit_sign(pfx, idxs)
+            # 签名任务会继续提交校验任务
+            self._wait_futures(self._sign_lock, self._sign_futures)
+        except BaseException:
+            # Ctrl+C 等：先结束正在运行的工具进程、丢弃排队的任务，
+            # 否则线程池退出时要等所有任务跑完
+            self.cancel()
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            for idx in pending:
+                if self.results[idx].status not in (JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_SKIPPED):
+                    self._set_status(idx, JOB_CANCELLED)
+            self._save_state()
+            raise
+        finally:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._save_state()
+        return self.results
+
+    def _save_state(self):
+        try:
+            self.catalog.save()
+        except OSError as e:
+            self.on_log(t("catalog_error", err=e))
+        # 已完成的包不再需要续跑记录；失败/取消的保留到下次
+        try:
+            self.journal.compact(r.item.pkg_fullname for r in self.results
+                                 if r.status in (JOB_DONE, JOB_SKIPPED))
+        except OSError as e:
+            self.on_log(t("journal_error", err=e))